@@ -0,0 +1,116 @@
+"""
+Cache des pages publiques (catalogue et fiches articles) pour les visiteurs anonymes.
+
+Chaque page mise en cache dépend de jetons de version stockés dans le cache :
+- `catalog` : toutes les pages du catalogue (accueil, recherche, filtres) ;
+- `article:<id>` : la fiche d'un article.
+
+Les signaux d'articles/signals.py remplacent ces jetons lorsqu'un article ou un
+utilisateur change : les anciennes entrées ne sont plus jamais lues et expirent
+d'elles-mêmes, sans parcourir ni vider le cache.
+"""
+
+import hashlib
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+
+CATALOG = 'catalog'
+
+# Paramètres sans effet sur le contenu de la page
+IGNORED_PARAMS = {'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content', 'fbclid', 'gclid'}
+
+
+def article_scope(article_id):
+    return f'article:{article_id}'
+
+
+def _version_key(scope):
+    return f'page_cache:version:{scope}'
+
+
+def get_versions(scopes):
+    """Jetons de version courants des portées demandées (créés si absents)"""
+    keys = {_version_key(scope): scope for scope in scopes}
+    found = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in found}
+    if missing:
+        # Pas d'expiration : un jeton perdu invaliderait simplement les pages associées
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def invalidate(*scopes):
+    """Invalide les pages des portées données (nouveaux jetons de version)"""
+    if scopes:
+        cache.set_many({_version_key(scope): uuid.uuid4().hex for scope in scopes}, timeout=None)
+
+
+def normalized_query(query_dict):
+    """
+    Chaîne de requête canonique : paramètres triés, valeurs vides et
+    paramètres de suivi ignorés (`?b=2&a=1&c=` et `?a=1&b=2` partagent une entrée).
+    """
+    items = sorted(
+        (key, value.strip())
+        for key, values in query_dict.lists() if key not in IGNORED_PARAMS
+        for value in values if value.strip()
+    )
+    return '&'.join(f'{key}={value}' for key, value in items)
+
+
+def page_cache_key(request, versions):
+    raw = '|'.join([request.path, normalized_query(request.GET), *versions])
+    return f'page_cache:page:{hashlib.md5(raw.encode()).hexdigest()}'
+
+
+def _is_cacheable_request(request):
+    if request.method not in ('GET', 'HEAD') or request.user.is_authenticated:
+        return False
+    # Un message flash en attente (ex: après déconnexion) doit être affiché puis consommé
+    if request.COOKIES.get('messages') or '_messages' in request.session:
+        return False
+    return True
+
+
+def _is_cacheable_response(response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not response.has_header('Set-Cookie')
+    )
+
+
+def cache_anonymous_page(scopes):
+    """
+    Met en cache la page rendue pour les visiteurs anonymes.
+
+    `scopes(request, *args, **kwargs)` retourne les portées dont dépend la page ;
+    la clé combine le chemin, la chaîne de requête normalisée et leurs versions.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            timeout = settings.PAGE_CACHE_TIMEOUT
+            if not timeout or not _is_cacheable_request(request):
+                return view_func(request, *args, **kwargs)
+
+            key = page_cache_key(request, get_versions(scopes(request, *args, **kwargs)))
+            response = cache.get(key)
+            if response is not None:
+                response['X-Page-Cache'] = 'HIT'
+                return response
+
+            response = view_func(request, *args, **kwargs)
+            patch_vary_headers(response, ['Cookie'])
+            if _is_cacheable_response(response):
+                cache.set(key, response, timeout)
+                response['X-Page-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,88 @@
+"""
+Nombre de résultats par gamme de prix et par vendeur (facettes du catalogue).
+
+Une seule requête `GROUP BY vendeur, gamme` (gamme calculée par un CASE) sur
+les articles correspondant à la recherche et aux prix min/max donne les deux
+facettes : chaque facette ignore son propre filtre (les autres gammes restent
+visibles quand une gamme est choisie) mais tient compte de l'autre. Les
+lignes sont mises en cache par jeu de filtres normalisé et par version du
+catalogue (articles/cache.py).
+"""
+
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Case, CharField, Count, Q, Value, When
+
+from .cache import CATALOG, get_versions
+from .forms import ArticleSearchForm
+from .models import Article
+from .search import search_articles, tokenize
+
+FACETS_TIMEOUT = 600
+
+
+def price_range_condition(price_range):
+    """Condition sur le prix d'une gamme de ArticleSearchForm.PRICE_RANGES"""
+    low, high = ArticleSearchForm.PRICE_RANGE_BOUNDS[price_range]
+    condition = Q()
+    if low is not None:
+        condition &= Q(price__gte=low)
+    if high is not None:
+        condition &= Q(price__lt=high)
+    return condition
+
+
+def price_bucket():
+    """Gamme de prix d'un article (clé de PRICE_RANGES)"""
+    return Case(
+        *[When(price_range_condition(key), then=Value(key)) for key in ArticleSearchForm.PRICE_RANGE_BOUNDS],
+        default=Value(''),
+        output_field=CharField(),
+    )
+
+
+def _cache_key(search, min_price, max_price):
+    raw = '|'.join([' '.join(tokenize(search or '')), str(min_price or ''), str(max_price or '')])
+    version, = get_versions([CATALOG])
+    return f'facets:{version}:{hashlib.md5(raw.encode()).hexdigest()}'
+
+
+def grouped_counts(search=None, min_price=None, max_price=None):
+    """[(vendeur, gamme, nombre)] des articles correspondant à la recherche et aux prix min/max"""
+    key = _cache_key(search, min_price, max_price)
+    rows = cache.get(key)
+    if rows is None:
+        articles = Article.objects.all()
+        if search:
+            articles = search_articles(articles, search)
+        if min_price:
+            articles = articles.filter(price__gte=min_price)
+        if max_price:
+            articles = articles.filter(price__lte=max_price)
+        rows = list(
+            articles.order_by().annotate(bucket=price_bucket())
+            .values_list('seller_id', 'bucket').annotate(total=Count('id'))
+        )
+        cache.set(key, rows, FACETS_TIMEOUT)
+    return rows
+
+
+def compute_facets(cleaned_data):
+    """
+    Facettes pour les filtres validés du formulaire de recherche :
+    {'price_range': {gamme: nombre}, 'seller': {vendeur: nombre}}.
+    """
+    seller = cleaned_data.get('seller')
+    price_range = cleaned_data.get('price_range')
+    prices = dict.fromkeys(ArticleSearchForm.PRICE_RANGE_BOUNDS, 0)
+    sellers = {}
+    for seller_id, bucket, total in grouped_counts(
+        cleaned_data.get('search'), cleaned_data.get('min_price'), cleaned_data.get('max_price'),
+    ):
+        if not seller or seller_id == seller:
+            prices[bucket] = prices.get(bucket, 0) + total
+        if not price_range or bucket == price_range:
+            sellers[seller_id] = sellers.get(seller_id, 0) + total
+    prices.pop('', None)
+    return {'price_range': prices, 'seller': sellers}
@@ -1,6 +1,32 @@
 from django import forms
+from django.conf import settings
+from django.urls import reverse
+from jobs.queue import enqueue
+from .images import stage_upload
 from .models import Article
-from users.models import User
+from .sellers import seller_choices
+
+
+def save_with_deferred_image(form, **attrs):
+    """
+    Enregistre l'article d'un formulaire sans envoyer l'image pendant la requête.
+
+    Une nouvelle image est déposée localement puis traitée par la tâche
+    `articles.process_image` ; l'article est publié aussitôt, avec l'image
+    précédente (ou un espace réservé) jusqu'à la fin du traitement.
+    """
+    upload = form.cleaned_data.get('images') if 'images' in form.changed_data else None
+    article = form.save(commit=False)
+    for name, value in attrs.items():
+        setattr(article, name, value)
+    if upload:
+        previous = form.initial.get('images')
+        article.images = previous.name if previous else None
+        article.pending_image = stage_upload(upload)
+    article.save()
+    if upload:
+        enqueue('articles.process_image', article_id=article.pk, staged_name=article.pending_image)
+    return article
 
 
 class ArticleForm(forms.ModelForm):
@@ -79,6 +105,81 @@ class ArticleForm(forms.ModelForm):
         return description.strip() if description else description
 
 
+class SellerAutocompleteWidget(forms.Widget):
+    """Champ texte à saisie semi-automatique ; l'identifiant du vendeur choisi est envoyé dans un champ caché"""
+    template_name = 'articles/widgets/seller_autocomplete.html'
+
+    def __init__(self, labels=None, placeholder='', attrs=None):
+        super().__init__(attrs)
+        self.labels = labels or {}
+        self.placeholder = placeholder
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        try:
+            label = self.labels.get(int(value), '')
+        except (TypeError, ValueError):
+            label = ''
+        context['widget'].update({
+            'label': label,
+            'placeholder': self.placeholder,
+            'url': reverse('articles:seller_autocomplete'),
+        })
+        return context
+
+
+class SellerChoiceField(forms.TypedChoiceField):
+    """
+    Vendeur choisi dans la liste en cache (articles/sellers.py) ; la valeur
+    nettoyée est son identifiant. Au-delà de SELLER_AUTOCOMPLETE_THRESHOLD
+    vendeurs, la liste déroulante devient un champ à saisie semi-automatique.
+    """
+
+    def __init__(self, *, empty_label, **kwargs):
+        self.empty_label = empty_label
+        super().__init__(coerce=int, empty_value=None, **kwargs)
+
+    def load_choices(self):
+        """À appeler à l'instanciation du formulaire (liste lue dans le cache)"""
+        sellers = seller_choices()
+        if len(sellers) > settings.SELLER_AUTOCOMPLETE_THRESHOLD:
+            self.widget = SellerAutocompleteWidget(
+                labels=dict(sellers), placeholder=self.empty_label, attrs=self.widget.attrs,
+            )
+        self.choices = [('', self.empty_label), *sellers]
+        self._seller_ids = {str(pk) for pk, _ in sellers}
+
+    def valid_value(self, value):
+        return str(value) in self._seller_ids
+
+    @property
+    def is_autocomplete(self):
+        return isinstance(self.widget, SellerAutocompleteWidget)
+
+    def show_counts(self, counts):
+        """Nombre de résultats de chaque vendeur dans la liste déroulante"""
+        if self.is_autocomplete:
+            return
+        self.choices = [
+            (pk, f'{label} ({counts.get(pk, 0)})' if pk else label) for pk, label in self.choices
+        ]
+
+
+class SellerFilterForm(forms.Form):
+    """Filtre par vendeur des listes d'administration"""
+
+    seller = SellerChoiceField(
+        empty_label='Tous les vendeurs',
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-control'}),
+        label='Vendeur'
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['seller'].load_choices()
+
+
 class ArticleSearchForm(forms.Form):
     """Formulaire de recherche et filtrage des articles"""
 
@@ -103,6 +204,15 @@ class ArticleSearchForm(forms.Form):
         ('500-1000', '500€ - 1000€'),
         ('1000+', 'Plus de 1000€'),
     ]
+    # Bornes (incluse, exclue) de chaque gamme ; None : pas de borne
+    PRICE_RANGE_BOUNDS = {
+        '0-50': (None, 50),
+        '50-100': (50, 100),
+        '100-250': (100, 250),
+        '250-500': (250, 500),
+        '500-1000': (500, 1000),
+        '1000+': (1000, None),
+    }
 
     search = forms.CharField(
         required=False,
@@ -114,8 +224,7 @@ class ArticleSearchForm(forms.Form):
         label='Recherche'
     )
 
-    seller = forms.ModelChoiceField(
-        queryset=User.objects.filter(role='seller').order_by('username'),
+    seller = SellerChoiceField(
         required=False,
         empty_label='Tous les vendeurs',
         widget=forms.Select(attrs={
@@ -164,6 +273,18 @@ class ArticleSearchForm(forms.Form):
         label='Trier par'
     )
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['seller'].load_choices()
+
+    def show_facets(self, facets):
+        """Ajoute aux libellés le nombre de résultats de chaque gamme de prix et de chaque vendeur"""
+        self.fields['price_range'].choices = [
+            (key, f"{label} ({facets['price_range'].get(key, 0)})" if key else label)
+            for key, label in self.PRICE_RANGES
+        ]
+        self.fields['seller'].show_counts(facets['seller'])
+
     def clean(self):
         """Validation croisée des champs"""
         cleaned_data = super().clean()
@@ -0,0 +1,175 @@
+"""
+Variantes redimensionnées des images d'articles (vignettes, retina, WebP).
+
+Pour chaque image envoyée, Pillow génère les tailles de VARIANTS en densité
+1x et 2x, au format JPEG (repli) et WebP. Les fichiers sont enregistrés à côté
+de l'original (`articles/variants/<nom>/`) et décrits dans
+`Article.image_variants` :
+
+    {'source': 'articles/velo.jpg',
+     'variants': {'card': [{'format': 'webp', 'density': 2, 'width': 800,
+                            'height': 600, 'name': 'articles/variants/velo/card-2x.webp'}, ...]}}
+
+Le tag `{% article_image %}` (articles/templatetags/article_images.py) en tire
+un élément <picture> avec `srcset`. Les articles existants se rattrapent avec
+`python manage.py generate_image_variants`.
+
+Les images envoyées par formulaire ne sont pas traitées pendant la requête :
+elles sont déposées dans IMAGE_STAGING_ROOT puis nettoyées (EXIF), envoyées
+vers le stockage et déclinées en variantes par les tâches d'articles/tasks.py.
+"""
+
+import io
+import posixpath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from PIL import Image, ImageOps
+
+# Taille (largeur, hauteur) en densité 1x ; `crop` recadre au format exact,
+# sinon l'image est contenue dans le cadre sans être agrandie
+VARIANTS = {
+    'list': {'size': (80, 80), 'crop': True},
+    'card': {'size': (400, 300), 'crop': True},
+    'detail': {'size': (800, 800), 'crop': False},
+}
+DENSITIES = (1, 2)
+
+FORMATS = {
+    'jpeg': {'extension': 'jpg', 'options': {'quality': 82, 'optimize': True, 'progressive': True}},
+    'webp': {'extension': 'webp', 'options': {'quality': 80, 'method': 4}},
+}
+
+# Plus grande dimension produite : permet à Pillow de décoder les JPEG à échelle réduite
+MAX_DIMENSION = max(max(spec['size']) for spec in VARIANTS.values()) * max(DENSITIES)
+
+
+def variants_directory(source_name):
+    stem = posixpath.splitext(posixpath.basename(source_name))[0]
+    return posixpath.join(posixpath.dirname(source_name), 'variants', stem)
+
+
+# Formats ré-encodés sans métadonnées ; les autres (GIF animé...) sont conservés tels quels
+STRIPPED_FORMATS = {
+    'JPEG': {'quality': 90, 'optimize': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 90},
+}
+
+
+def staging_storage():
+    """Stockage local des images en attente de traitement"""
+    return FileSystemStorage(location=settings.IMAGE_STAGING_ROOT)
+
+
+def stage_upload(upload):
+    """Dépose un fichier envoyé dans le dossier d'attente et retourne son nom"""
+    return staging_storage().save(posixpath.basename(upload.name), upload)
+
+
+def strip_metadata(data):
+    """Ré-encode une image sans ses métadonnées EXIF (orientation appliquée aux pixels)"""
+    with Image.open(io.BytesIO(data)) as image:
+        image_format = image.format
+        if image_format not in STRIPPED_FORMATS:
+            return data
+        image = ImageOps.exif_transpose(image)
+        if image_format == 'JPEG' and image.mode not in ('RGB', 'L', 'CMYK'):
+            image = image.convert('RGB')
+        buffer = io.BytesIO()
+        image.save(buffer, format=image_format, exif=b'', **STRIPPED_FORMATS[image_format])
+    return buffer.getvalue()
+
+
+def has_current_variants(article):
+    """Les variantes enregistrées correspondent-elles à l'image actuelle ?"""
+    source = article.images.name if article.images else ''
+    return (article.image_variants or {}).get('source', '') == source
+
+
+def _open_source(field):
+    with field.open('rb') as file:
+        image = Image.open(file)
+        image.draft('RGB', (MAX_DIMENSION, MAX_DIMENSION))
+        image.load()
+    # Applique l'orientation EXIF ; les métadonnées ne sont pas recopiées dans les variantes
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def _resize(image, size, crop):
+    if crop:
+        return ImageOps.fit(image, size, Image.Resampling.LANCZOS)
+    resized = image.copy()
+    resized.thumbnail(size, Image.Resampling.LANCZOS)
+    return resized
+
+
+def render_variants(image):
+    """Génère (nom de variante, densité, image redimensionnée) pour toutes les tailles"""
+    for variant, spec in VARIANTS.items():
+        width, height = spec['size']
+        for density in DENSITIES:
+            yield variant, density, _resize(image, (width * density, height * density), spec['crop'])
+
+
+def delete_variants(variants, storage):
+    for entries in (variants or {}).get('variants', {}).values():
+        for entry in entries:
+            storage.delete(entry['name'])
+
+
+def generate_variants(article):
+    """
+    (Re)génère les variantes de l'image d'un article et met à jour
+    `image_variants` ; retourne la nouvelle description.
+    """
+    field = article.images
+    storage = field.storage
+    previous = article.image_variants or {}
+
+    variants = {'source': field.name if field else '', 'variants': {}}
+    if field:
+        image = _open_source(field)
+        directory = variants_directory(field.name)
+        for variant, density, resized in render_variants(image):
+            for image_format, spec in FORMATS.items():
+                buffer = io.BytesIO()
+                resized.save(buffer, format=image_format.upper(), **spec['options'])
+                name = posixpath.join(directory, f"{variant}-{density}x.{spec['extension']}")
+                name = storage.save(name, ContentFile(buffer.getvalue()))
+                variants['variants'].setdefault(variant, []).append({
+                    'format': image_format, 'density': density,
+                    'width': resized.width, 'height': resized.height, 'name': name,
+                })
+
+    # Les nouvelles variantes sont enregistrées avant de libérer les anciennes : avec le
+    # stockage dédupliqué, un fichier identique change seulement de référence
+    delete_variants(previous, storage)
+    # update() : ne redéclenche pas les signaux post_save
+    type(article).objects.filter(pk=article.pk).update(image_variants=variants)
+    article.image_variants = variants
+    return variants
+
+
+def variant_sources(article, variant):
+    """
+    Fichiers d'une variante groupés par format, triés par densité :
+    {'jpeg': [(url, densité, largeur, hauteur), ...], 'webp': [...]}
+    """
+    if not article.images or not has_current_variants(article):
+        return {}
+    storage = article.images.storage
+    sources = {}
+    entries = article.image_variants.get('variants', {}).get(variant, [])
+    for entry in sorted(entries, key=lambda entry: entry['density']):
+        sources.setdefault(entry['format'], []).append(
+            (storage.url(entry['name']), entry['density'], entry['width'], entry['height'])
+        )
+    return sources
@@ -0,0 +1,103 @@
+from collections import Counter
+
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from articles.images import generate_variants
+from articles.models import Article, StoredFile
+from articles.storage import article_storage, content_hash, hashed_name, is_content_addressed
+
+
+def referenced_names():
+    """Nombre de références de chaque fichier (images et vignettes des articles)"""
+    counts = Counter()
+    rows = Article.objects.values_list('images', 'image_variants').iterator(chunk_size=1000)
+    for image, variants in rows:
+        if image:
+            counts[image] += 1
+        for entries in (variants or {}).get('variants', {}).values():
+            for entry in entries:
+                counts[entry['name']] += 1
+    return counts
+
+
+class Command(BaseCommand):
+    help = (
+        "Renomme les images d'articles d'après l'empreinte de leur contenu, fusionne "
+        "les doublons et recalcule les compteurs de références du stockage dédupliqué"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Afficher le résultat sans rien modifier')
+        parser.add_argument('--keep-originals', action='store_true',
+                            help='Conserver les fichiers d\'origine après renommage')
+        parser.add_argument('--delete-orphans', action='store_true',
+                            help='Supprimer les fichiers de articles/ qui ne sont référencés par aucun article')
+
+    def handle(self, *args, **options):
+        backend = article_storage.backend
+        dry_run = options['dry_run']
+
+        # 1. Empreinte des images existantes ; copie sous leur nom adressé par contenu
+        renamed = {}
+        names = (
+            Article.objects.exclude(images='').exclude(images__isnull=True)
+            .values_list('images', flat=True).distinct().order_by()
+        )
+        for name in names.iterator():
+            if is_content_addressed(name):
+                continue
+            if not backend.exists(name):
+                self.stderr.write(f'Fichier introuvable : {name}')
+                continue
+            with backend.open(name, 'rb') as file:
+                target = hashed_name(name, content_hash(File(file)))
+                if not dry_run and not backend.exists(target):
+                    saved = backend.save(target, File(file))
+                    if saved != target:
+                        self.stderr.write(f'{target} enregistré sous {saved}')
+                        target = saved
+            renamed[name] = target
+
+        duplicates = len(renamed) - len(set(renamed.values()))
+        self.stdout.write(f'{len(renamed)} image(s) à renommer, dont {duplicates} doublon(s).')
+        if dry_run:
+            return
+
+        # 2. Articles repointés vers les nouveaux noms, vignettes régénérées
+        with transaction.atomic():
+            for old, new in renamed.items():
+                Article.objects.filter(images=old).update(images=new)
+        for article in Article.objects.filter(images__in=set(renamed.values())).iterator(chunk_size=100):
+            try:
+                generate_variants(article)
+            except (OSError, ValueError) as exc:
+                self.stderr.write(f'Vignettes de l\'article {article.pk} : {exc}')
+
+        # 3. Compteurs de références recalculés depuis les articles
+        counts = referenced_names()
+        with transaction.atomic():
+            StoredFile.objects.all().delete()
+            StoredFile.objects.bulk_create(
+                [StoredFile(name=name, refcount=count) for name, count in counts.items()], batch_size=1000
+            )
+
+        # 4. Fichiers d'origine (et orphelins) devenus inutiles
+        removed = 0
+        if not options['keep_originals']:
+            for old in renamed:
+                if old not in counts:
+                    backend.delete(old)
+                    removed += 1
+        if options['delete_orphans']:
+            _, files = backend.listdir('articles')
+            for filename in files:
+                name = f'articles/{filename}'
+                if name not in counts and name not in renamed:
+                    backend.delete(name)
+                    removed += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(counts)} fichier(s) référencé(s), {removed} fichier(s) supprimé(s).'
+        ))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from articles.images import generate_variants, has_current_variants
+from articles.models import Article
+
+
+class Command(BaseCommand):
+    help = "Génère les vignettes et versions WebP des images d'articles existantes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Régénérer même les variantes à jour')
+        parser.add_argument('--batch-size', type=int, default=100, help="Nombre d'articles lus par lot")
+
+    def handle(self, *args, **options):
+        articles = Article.objects.exclude(images='').exclude(images__isnull=True).order_by('id')
+        generated = skipped = failed = 0
+        for article in articles.only('id', 'images', 'image_variants').iterator(chunk_size=options['batch_size']):
+            if not options['force'] and has_current_variants(article):
+                skipped += 1
+                continue
+            try:
+                generate_variants(article)
+            except (OSError, ValueError) as exc:
+                failed += 1
+                self.stderr.write(f'Article {article.pk} ({article.images.name}) : {exc}')
+                continue
+            generated += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{generated} article(s) traité(s), {skipped} déjà à jour, {failed} en erreur.'
+        ))
@@ -0,0 +1,136 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:19
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Copie figée de articles/search.py au moment de la migration : les
+# changements ultérieurs du moteur ne doivent pas modifier son effet.
+FTS_TABLE = 'articles_article_fts'
+GIN_INDEX_NAME = 'articles_search_gin'
+
+_WORD_RE = re.compile(r'\w+')
+_LIGATURES = str.maketrans({'œ': 'oe', 'æ': 'ae', 'ß': 'ss'})
+
+
+def fold(text):
+    text = (text or '').lower().translate(_LIGATURES)
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def stem(word):
+    if len(word) < 6:
+        return word
+    if word.endswith('x'):
+        if word.endswith('aux') and word[-4] != 'e':
+            return word[:-2] + 'l'
+        return word[:-1]
+    if word.endswith('s'):
+        word = word[:-1]
+    if word.endswith('r'):
+        word = word[:-1]
+    if word.endswith('e'):
+        word = word[:-1]
+    if word[-1] == word[-2] and word[-1].isalpha():
+        word = word[:-1]
+    return word
+
+
+def stem_text(text):
+    return ' '.join(stem(word) for word in text.split())
+
+
+def document_fields(title, description):
+    return {
+        'title': ' '.join(_WORD_RE.findall(fold(title))),
+        'body': ' '.join(_WORD_RE.findall(fold(description))),
+    }
+
+
+def search_vector():
+    from django.contrib.postgres.search import SearchVector
+
+    return (
+        SearchVector('title', weight='A', config='french') +
+        SearchVector('body', weight='B', config='french')
+    )
+
+
+def sqlite_fts_available(cursor):
+    try:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+    except Exception:
+        return False
+
+
+def create_search_index(apps, schema_editor):
+    """Index plein texte spécifique au moteur (GIN sur PostgreSQL, FTS5 sur SQLite)"""
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.indexes import GinIndex
+
+        model = apps.get_model('articles', 'ArticleSearchDocument')
+        schema_editor.add_index(model, GinIndex(search_vector(), name=GIN_INDEX_NAME))
+    elif connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            if sqlite_fts_available(cursor):
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+                    f"USING fts5(title, body, tokenize='unicode61 remove_diacritics 2')"
+                )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.indexes import GinIndex
+
+        model = apps.get_model('articles', 'ArticleSearchDocument')
+        schema_editor.remove_index(model, GinIndex(search_vector(), name=GIN_INDEX_NAME))
+    elif connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def backfill_search_documents(apps, schema_editor):
+    """Indexer les articles existants"""
+    Article = apps.get_model('articles', 'Article')
+    ArticleSearchDocument = apps.get_model('articles', 'ArticleSearchDocument')
+    connection = schema_editor.connection
+    use_fts = connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names()
+
+    documents = []
+    for article in Article.objects.only('id', 'title', 'description').iterator():
+        fields = document_fields(article.title, article.description)
+        documents.append(ArticleSearchDocument(article_id=article.pk, **fields))
+        if use_fts:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (%s, %s, %s)',
+                    [article.pk, stem_text(fields['title']), stem_text(fields['body'])]
+                )
+    ArticleSearchDocument.objects.bulk_create(documents, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleSearchDocument',
+            fields=[
+                ('article', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='articles.article')),
+                ('title', models.TextField()),
+                ('body', models.TextField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(backfill_search_documents, migrations.RunPython.noop),
+    ]
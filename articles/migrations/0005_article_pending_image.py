@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0004_article_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='pending_image',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:36
+
+import articles.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0005_article_pending_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredFile',
+            fields=[
+                ('name', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('refcount', models.PositiveIntegerField(default=1)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='article',
+            name='images',
+            field=models.ImageField(blank=True, null=True, storage=articles.storage.article_image_storage, upload_to='articles/'),
+        ),
+    ]
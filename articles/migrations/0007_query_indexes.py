@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0006_content_addressed_storage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['-created_at', '-id'], name='article_created_id'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['seller', '-created_at', '-id'], name='article_seller_created'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['price', 'id'], name='article_price_id'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['title', 'id'], name='article_title_id'),
+        ),
+    ]
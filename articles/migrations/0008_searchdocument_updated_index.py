@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0007_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='articlesearchdocument',
+            index=models.Index(fields=['updated_at'], name='searchdocument_updated'),
+        ),
+    ]
@@ -1,15 +1,47 @@
 from django.db import models
 
 from users.models import User
+from .storage import article_image_storage
+
+# Champs lus par les cartes et listes d'articles (tag article_image, vendeur, lien WhatsApp)
+CARD_FIELDS = (
+    'id', 'title', 'description', 'price', 'images', 'image_variants', 'pending_image', 'created_at',
+    'seller__id', 'seller__username', 'seller__first_name', 'seller__last_name', 'seller__whatsapp_number',
+)
+
+
+class ArticleQuerySet(models.QuerySet):
+    def for_cards(self):
+        """Articles avec leur vendeur, limités aux champs affichés (une seule requête)"""
+        return self.select_related('seller').only(*CARD_FIELDS)
+
 
 class Article(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
-    images = models.ImageField(upload_to='articles/', blank=True, null=True)
+    # Fichiers nommés par empreinte du contenu et dédupliqués (voir articles/storage.py)
+    images = models.ImageField(upload_to='articles/', storage=article_image_storage, blank=True, null=True)
+    # Vignettes et versions WebP générées depuis `images` (voir articles/images.py)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # Image envoyée en attente de traitement (nom dans IMAGE_STAGING_ROOT)
+    pending_image = models.CharField(max_length=255, blank=True, editable=False)
     seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='articles')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ArticleQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Catalogue : tri par date (pagination par curseur sur created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='article_created_id'),
+            # Articles d'un vendeur (filtre du catalogue, admin, dashboard vendeur)
+            models.Index(fields=['seller', '-created_at', '-id'], name='article_seller_created'),
+            # Tri et tranches de prix, tri par titre
+            models.Index(fields=['price', 'id'], name='article_price_id'),
+            models.Index(fields=['title', 'id'], name='article_title_id'),
+        ]
+
     def whatsapp_link(self):
         if self.seller.whatsapp_number:
             return f"https://wa.me/{self.seller.whatsapp_number}"
@@ -17,3 +49,44 @@ class Article(models.Model):
 
     def __str__(self):
         return self.title
+
+
+class ArticleSearchDocument(models.Model):
+    """Document de recherche normalisé d'un article (voir articles/search.py)"""
+    article = models.OneToOneField(
+        Article, on_delete=models.CASCADE, primary_key=True, related_name='search_document'
+    )
+    title = models.TextField()
+    body = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Documents modifiés depuis la dernière synchronisation des suggestions (articles/suggest.py)
+            models.Index(fields=['updated_at'], name='searchdocument_updated'),
+        ]
+
+    def __str__(self):
+        return f"Document de recherche : {self.article_id}"
+
+
+class DeletedArticle(models.Model):
+    """
+    Article supprimé (journal lu par la synchronisation des suggestions,
+    articles/suggest.py) ; les lignes plus anciennes que TOMBSTONE_TTL sont purgées.
+    """
+    article_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"Article supprimé : {self.article_id}"
+
+
+class StoredFile(models.Model):
+    """Nombre de références à un fichier du stockage dédupliqué (voir articles/storage.py)"""
+    name = models.CharField(max_length=255, primary_key=True)
+    refcount = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount})"
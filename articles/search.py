@@ -0,0 +1,271 @@
+"""
+Moteur de recherche plein texte des articles.
+
+Chaque article possède un document de recherche (ArticleSearchDocument) contenant
+son titre et sa description normalisés (minuscules, sans accents). L'indexation
+dépend du moteur de base de données :
+
+- PostgreSQL : SearchVector (configuration 'french') avec un index GIN sur le document
+- SQLite : table virtuelle FTS5 alimentée avec les mots racinisés
+- Autres moteurs : repli sur une recherche icontains dans le document normalisé
+"""
+
+import re
+import time
+import unicodedata
+
+from django.db import connection, transaction
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .cache import invalidate
+
+FTS_TABLE = 'articles_article_fts'
+GIN_INDEX_NAME = 'articles_search_gin'
+
+# Poids du titre et de la description dans le classement
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+_WORD_RE = re.compile(r'\w+')
+_LIGATURES = str.maketrans({'œ': 'oe', 'æ': 'ae', 'ß': 'ss'})
+
+
+def fold(text):
+    """Met le texte en minuscules et supprime les accents"""
+    text = (text or '').lower().translate(_LIGATURES)
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def stem(word):
+    """Racinisation française minimale (pluriels, féminins, doubles consonnes)"""
+    if len(word) < 6:
+        return word
+    if word.endswith('x'):
+        if word.endswith('aux') and word[-4] != 'e':
+            return word[:-2] + 'l'
+        return word[:-1]
+    if word.endswith('s'):
+        word = word[:-1]
+    if word.endswith('r'):
+        word = word[:-1]
+    if word.endswith('e'):
+        word = word[:-1]
+    if word[-1] == word[-2] and word[-1].isalpha():
+        word = word[:-1]
+    return word
+
+
+def stem_text(text):
+    """Racinise chaque mot d'un texte déjà normalisé"""
+    return ' '.join(stem(word) for word in text.split())
+
+
+def tokenize(text):
+    """Découpe un texte en mots normalisés"""
+    return _WORD_RE.findall(fold(text))
+
+
+def document_fields(title, description):
+    """Champs du document de recherche pour un titre et une description"""
+    return {
+        'title': ' '.join(tokenize(title)),
+        'body': ' '.join(tokenize(description)),
+    }
+
+
+def search_vector(prefix=''):
+    """Vecteur PostgreSQL pondéré (titre A, description B) partagé par l'index et les requêtes"""
+    from django.contrib.postgres.search import SearchVector
+
+    return (
+        SearchVector(f'{prefix}title', weight='A', config='french') +
+        SearchVector(f'{prefix}body', weight='B', config='french')
+    )
+
+
+class FallbackBackend:
+    """Recherche icontains dans le document normalisé (moteurs sans plein texte)"""
+
+    def index(self, article_id, fields):
+        pass
+
+    def index_new(self, entries):
+        """Indexe des articles absents de l'index : [(article_id, fields), ...]"""
+        for article_id, fields in entries:
+            self.index(article_id, fields)
+
+    def remove(self, article_id):
+        pass
+
+    def clear(self):
+        pass
+
+    def filter(self, queryset, words):
+        condition = Q()
+        for word in words:
+            condition &= (
+                Q(search_document__title__icontains=word) |
+                Q(search_document__body__icontains=word)
+            )
+        return queryset.filter(condition).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+
+
+class PostgresBackend(FallbackBackend):
+    """Recherche via to_tsvector('french', ...) et l'index GIN du document"""
+
+    def filter(self, queryset, words):
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        # Le dernier mot est traité comme un préfixe (recherche pendant la saisie)
+        terms = words[:-1] + [f'{words[-1]}:*']
+        query = SearchQuery(' & '.join(terms), config='french', search_type='raw')
+        vector = search_vector('search_document__')
+        return queryset.annotate(
+            search_vector=vector,
+            search_rank=SearchRank(vector, query),
+        ).filter(search_vector=query)
+
+
+class SqliteBackend(FallbackBackend):
+    """Recherche via la table virtuelle FTS5 (classement bm25)"""
+
+    def index(self, article_id, fields):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [article_id])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (%s, %s, %s)',
+                [article_id, stem_text(fields['title']), stem_text(fields['body'])]
+            )
+
+    def index_new(self, entries):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (%s, %s, %s)',
+                [(article_id, stem_text(fields['title']), stem_text(fields['body']))
+                 for article_id, fields in entries]
+            )
+
+    def remove(self, article_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [article_id])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+    def filter(self, queryset, words):
+        stems = [stem(word) for word in words]
+        # Le dernier mot est traité comme un préfixe (recherche pendant la saisie)
+        match = ' '.join(f'"{word}"' for word in stems[:-1])
+        match = f'{match} "{stems[-1]}"*'.strip()
+
+        table = queryset.model._meta.db_table
+        matching_ids = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+        rank = RawSQL(
+            f'SELECT -bm25({FTS_TABLE}, %s, %s) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = "{table}"."id"',
+            [TITLE_WEIGHT, BODY_WEIGHT, match],
+            output_field=FloatField(),
+        )
+        return queryset.filter(pk__in=matching_ids).annotate(search_rank=rank)
+
+
+def sqlite_fts_available(cursor):
+    """Vérifie que SQLite a été compilé avec FTS5"""
+    try:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+    except Exception:
+        return False
+
+
+# Backend par moteur ; le repli SQLite (table FTS5 absente, migration pas
+# encore appliquée) est réexaminé après FALLBACK_RECHECK secondes
+FALLBACK_RECHECK = 60
+
+_backends = {}
+
+
+def get_backend():
+    """Backend de recherche adapté à la base de données courante"""
+    vendor = connection.vendor
+    backend, expires = _backends.get(vendor, (None, None))
+    if backend is None or (expires is not None and time.monotonic() >= expires):
+        expires = None
+        if vendor == 'postgresql':
+            backend = PostgresBackend()
+        elif vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names():
+            backend = SqliteBackend()
+        else:
+            backend = FallbackBackend()
+            if vendor == 'sqlite':
+                expires = time.monotonic() + FALLBACK_RECHECK
+        _backends[vendor] = backend, expires
+    return backend
+
+
+def index_article(article):
+    """Crée ou met à jour le document de recherche d'un article"""
+    from .models import ArticleSearchDocument
+
+    fields = document_fields(article.title, article.description)
+    ArticleSearchDocument.objects.update_or_create(article_id=article.pk, defaults=fields)
+    get_backend().index(article.pk, fields)
+
+
+def remove_article(article_id):
+    """Retire un article de l'index (le document est supprimé en cascade)"""
+    get_backend().remove(article_id)
+
+
+def rebuild_index(batch_size=500):
+    """Reconstruit entièrement l'index de recherche, retourne le nombre d'articles indexés"""
+    from .models import Article, ArticleSearchDocument
+
+    backend = get_backend()
+    ArticleSearchDocument.objects.all().delete()
+    backend.clear()
+
+    def flush(batch):
+        # Une transaction et une insertion groupée par lot
+        with transaction.atomic():
+            ArticleSearchDocument.objects.bulk_create(
+                [ArticleSearchDocument(article_id=article_id, **fields) for article_id, fields in batch]
+            )
+            backend.index_new(batch)
+        return len(batch)
+
+    count = 0
+    articles = Article.objects.only('id', 'title', 'description').order_by('pk')
+    batch = []
+    for article in articles.iterator(chunk_size=batch_size):
+        batch.append((article.pk, document_fields(article.title, article.description)))
+        if len(batch) >= batch_size:
+            count += flush(batch)
+            batch = []
+    if batch:
+        count += flush(batch)
+
+    # Documents recréés : l'index de suggestions de chaque worker doit les relire
+    from . import suggest
+
+    invalidate(suggest.SUGGEST)
+    suggest.reset()
+    return count
+
+
+def search_articles(queryset, query):
+    """
+    Filtre un queryset d'articles avec une recherche plein texte.
+
+    Le queryset retourné est annoté avec `search_rank` (plus élevé = plus pertinent)
+    et peut être combiné avec d'autres filtres.
+    """
+    words = tokenize(query)
+    if not words:
+        return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+    return get_backend().filter(queryset, words)
@@ -0,0 +1,63 @@
+"""
+Liste des vendeurs proposée par les filtres (catalogue, listes d'administration).
+
+La liste est lue une fois puis gardée en cache sous la version `sellers`
+(voir articles/cache.py) ; les signaux d'articles/signals.py la remplacent
+quand un utilisateur devient ou cesse d'être vendeur, ou quand le nom d'un
+vendeur change. Au-delà de SELLER_AUTOCOMPLETE_THRESHOLD vendeurs, les
+formulaires affichent un champ à saisie semi-automatique (vue
+`articles:seller_autocomplete`) au lieu d'une liste déroulante complète.
+"""
+
+from django.core.cache import cache
+
+from users.models import User
+from .cache import get_versions
+from .search import fold
+
+SELLERS = 'sellers'
+
+# Durée de vie d'une version de la liste (remplacée bien avant en cas de changement)
+CHOICES_TIMEOUT = 24 * 3600
+
+SUGGESTION_LIMIT = 10
+
+
+def seller_label(username, first_name, last_name):
+    full_name = f'{first_name} {last_name}'.strip()
+    return f'{full_name} (@{username})' if full_name else username
+
+
+def seller_choices():
+    """[(id, libellé)] de tous les vendeurs, triés par nom d'utilisateur"""
+    version, = get_versions([SELLERS])
+    key = f'sellers:choices:{version}'
+    choices = cache.get(key)
+    if choices is None:
+        rows = (
+            User.objects.filter(role='seller').order_by('username')
+            .values_list('id', 'username', 'first_name', 'last_name')
+        )
+        choices = [(pk, seller_label(username, first, last)) for pk, username, first, last in rows]
+        cache.set(key, choices, CHOICES_TIMEOUT)
+    return choices
+
+
+def suggest_sellers(query, limit=SUGGESTION_LIMIT):
+    """
+    Vendeurs dont le libellé contient `query` (accents et casse ignorés) ;
+    ceux dont le nom ou l'identifiant commence par `query` d'abord.
+    """
+    query = fold(query).strip()
+    if not query:
+        return []
+    prefix, contains = [], []
+    for pk, label in seller_choices():
+        folded = fold(label)
+        if folded.startswith(query) or f'@{query}' in folded:
+            prefix.append((pk, label))
+        elif query in folded:
+            contains.append((pk, label))
+        if len(prefix) >= limit:
+            break
+    return (prefix + contains)[:limit]
@@ -0,0 +1,122 @@
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+from articles.models import Article
+from articles import cache, images, search, sellers, suggest
+from jobs.queue import enqueue
+
+
+@receiver(post_save, sender=Article)
+def update_search_document(sender, instance, raw=False, **kwargs):
+    """Maintenir le document de recherche à jour après chaque sauvegarde"""
+    if raw:
+        return
+    search.index_article(instance)
+
+
+@receiver(post_delete, sender=Article)
+def remove_search_document(sender, instance, **kwargs):
+    """Retirer l'article de l'index plein texte"""
+    search.remove_article(instance.pk)
+
+
+@receiver(post_save, sender=Article)
+def update_suggestions(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Mettre à jour l'index des suggestions (titre nouveau ou modifié)"""
+    if raw or (update_fields is not None and 'title' not in update_fields):
+        return
+    suggest.article_changed(instance)
+
+
+@receiver(post_delete, sender=Article)
+def remove_suggestions(sender, instance, **kwargs):
+    suggest.article_removed(instance.pk)
+
+
+@receiver(post_save, sender=Article)
+def update_image_variants(sender, instance, raw=False, **kwargs):
+    """Programmer la génération des vignettes lorsque l'image a changé"""
+    if raw or images.has_current_variants(instance):
+        return
+    enqueue('articles.generate_variants', article_id=instance.pk)
+
+
+@receiver(pre_save, sender=Article)
+def remember_replaced_image(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Noter l'image remplacée pour libérer sa référence après la sauvegarde"""
+    if raw or instance.pk is None or (update_fields is not None and 'images' not in update_fields):
+        return
+    previous = Article.objects.filter(pk=instance.pk).values_list('images', flat=True).first()
+    new_upload = bool(instance.images) and not instance.images._committed
+    if previous and (new_upload or previous != instance.images.name):
+        instance._replaced_image = previous
+
+
+@receiver(post_save, sender=Article)
+def release_replaced_image(sender, instance, **kwargs):
+    """Libérer la référence à l'image remplacée (fichier supprimé s'il n'est plus utilisé)"""
+    previous = instance.__dict__.pop('_replaced_image', None)
+    if previous:
+        instance.images.storage.delete(previous)
+
+
+@receiver(post_delete, sender=Article)
+def remove_image_variants(sender, instance, **kwargs):
+    """Libérer l'image et les vignettes de l'article"""
+    if instance.images:
+        images.delete_variants(instance.image_variants, instance.images.storage)
+        instance.images.storage.delete(instance.images.name)
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def invalidate_article_pages(sender, instance, **kwargs):
+    """Invalider le catalogue et la fiche de l'article en cache"""
+    cache.invalidate(cache.CATALOG, cache.article_scope(instance.pk))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_seller_pages(sender, instance, update_fields=None, **kwargs):
+    """Invalider le catalogue et les fiches des articles du vendeur (nom, WhatsApp, liste des vendeurs)"""
+    if update_fields and set(update_fields) <= {'last_login'}:
+        # Connexion : rien d'affiché dans les pages publiques ne change
+        return
+    article_ids = Article.objects.filter(seller_id=instance.pk).values_list('id', flat=True)
+    cache.invalidate(cache.CATALOG, *[cache.article_scope(article_id) for article_id in article_ids])
+
+
+# Champs d'un utilisateur qui figurent dans la liste des vendeurs
+SELLER_LIST_FIELDS = ('role', 'username', 'first_name', 'last_name')
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def remember_seller_listing(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Noter le rôle et les noms avant la sauvegarde"""
+    instance._previous_listing = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(SELLER_LIST_FIELDS):
+        return
+    instance._previous_listing = sender.objects.filter(pk=instance.pk).values_list(*SELLER_LIST_FIELDS).first()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_seller_choices(sender, instance, created, raw=False, **kwargs):
+    """Remplacer la liste des vendeurs en cache si l'utilisateur y entre, en sort ou y change de nom"""
+    if raw:
+        return
+    current = tuple(getattr(instance, field) for field in SELLER_LIST_FIELDS)
+    previous = getattr(instance, '_previous_listing', None)
+    if created:
+        changed = instance.role == 'seller'
+    else:
+        changed = previous is not None and previous != current and 'seller' in (previous[0], instance.role)
+    if changed:
+        cache.invalidate(sellers.SELLERS)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def remove_from_seller_choices(sender, instance, **kwargs):
+    if instance.role == 'seller':
+        cache.invalidate(sellers.SELLERS)
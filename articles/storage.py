@@ -0,0 +1,157 @@
+"""
+Stockage adressé par contenu des images d'articles.
+
+`ContentAddressedStorage` enveloppe le stockage par défaut (disque,
+Cloudinary ou S3 selon DEFAULT_FILE_STORAGE) et nomme chaque fichier d'après
+l'empreinte SHA-256 de son contenu : `articles/<sha256>.jpg`. Une même photo
+envoyée pour plusieurs articles n'est stockée qu'une fois ; le nombre de
+références est tenu dans la table StoredFile et le fichier n'est supprimé
+qu'avec sa dernière référence (après le commit de la transaction).
+
+Le contenu d'un nom ne changeant jamais, ces fichiers peuvent être mis en
+cache sans limite (voir config/middleware.py). Les fichiers existants se
+migrent avec `python manage.py dedup_article_images`.
+"""
+
+import hashlib
+import posixpath
+import re
+
+from django.core.files import File
+from django.core.files.storage import Storage, default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+CHUNK_SIZE = 64 * 1024
+
+HASHED_NAME_RE = re.compile(r'^[0-9a-f]{64}(\.\w+)?$')
+
+
+def content_hash(content):
+    """Empreinte SHA-256 d'un fichier (lu par blocs, position remise au début)"""
+    digest = hashlib.sha256()
+    for chunk in content.chunks(CHUNK_SIZE):
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def hashed_name(name, digest):
+    """Nom adressé par contenu : même dossier, empreinte + extension d'origine"""
+    extension = posixpath.splitext(name)[1].lower()
+    return posixpath.join(posixpath.dirname(name), f'{digest}{extension}')
+
+
+def is_content_addressed(name):
+    return bool(HASHED_NAME_RE.match(posixpath.basename(name)))
+
+
+class ContentAddressedStorage(Storage):
+    """Stockage dédupliqué et à compteur de références, au-dessus d'un autre stockage"""
+
+    def __init__(self, backend=None):
+        self._backend = backend
+
+    @property
+    def backend(self):
+        return self._backend if self._backend is not None else default_storage
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = hashed_name(name, content_hash(content))
+        if self.acquire(name) or not self.backend.exists(name):
+            # Premier exemplaire (ou fichier disparu du stockage) : écriture
+            try:
+                saved = self.backend.save(name, content, max_length=max_length)
+            except Exception:
+                # Écriture échouée : la référence ne désigne aucun fichier
+                self.release_reference(name)
+                raise
+            if saved != name:
+                # Le stockage sous-jacent a renommé le fichier : conserver son nom
+                self.release_reference(name)
+                self.acquire(saved)
+                name = saved
+        return name
+
+    def acquire(self, name):
+        """Ajoute une référence au fichier ; retourne True s'il n'était pas encore suivi"""
+        from .models import StoredFile
+
+        if StoredFile.objects.filter(name=name).update(refcount=F('refcount') + 1):
+            return False
+        try:
+            with transaction.atomic():
+                StoredFile.objects.create(name=name, refcount=1)
+            return True
+        except IntegrityError:
+            # Créé entre-temps par une autre requête
+            StoredFile.objects.filter(name=name).update(refcount=F('refcount') + 1)
+            return False
+
+    def release_reference(self, name):
+        """Retire une référence ; retourne True si c'était la dernière"""
+        from .models import StoredFile
+
+        with transaction.atomic():
+            stored = StoredFile.objects.select_for_update().filter(name=name).first()
+            if stored is None:
+                # Fichier antérieur au stockage dédupliqué : référence unique
+                return True
+            if stored.refcount > 1:
+                StoredFile.objects.filter(name=name).update(refcount=F('refcount') - 1)
+                return False
+            stored.delete()
+            return True
+
+    def delete(self, name):
+        if name and self.release_reference(name):
+            backend = self.backend
+            transaction.on_commit(lambda: backend.delete(name))
+
+    # Délégation au stockage sous-jacent
+
+    def _open(self, name, mode='rb'):
+        return self.backend.open(name, mode)
+
+    def get_available_name(self, name, max_length=None):
+        # Un nom adressé par contenu désigne toujours le même fichier
+        return name
+
+    def generate_filename(self, filename):
+        return self.backend.generate_filename(filename)
+
+    def exists(self, name):
+        return self.backend.exists(name)
+
+    def url(self, name):
+        return self.backend.url(name)
+
+    def size(self, name):
+        return self.backend.size(name)
+
+    def path(self, name):
+        return self.backend.path(name)
+
+    def listdir(self, path):
+        return self.backend.listdir(path)
+
+    def get_accessed_time(self, name):
+        return self.backend.get_accessed_time(name)
+
+    def get_created_time(self, name):
+        return self.backend.get_created_time(name)
+
+    def get_modified_time(self, name):
+        return self.backend.get_modified_time(name)
+
+
+article_storage = ContentAddressedStorage()
+
+
+def article_image_storage():
+    """Stockage du champ Article.images (callable : non figé dans les migrations)"""
+    return article_storage
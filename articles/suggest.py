@@ -0,0 +1,264 @@
+"""
+Suggestions de la barre de recherche (titres d'articles et noms de vendeurs).
+
+Chaque worker garde en mémoire un index de préfixes : une liste triée de clés
+normalisées (voir search.fold) parcourue avec `bisect`. Un titre est indexé à
+partir de chacun de ses premiers mots, « lampe » trouve donc aussi « Grande
+lampe de bureau » ; un titre partagé par plusieurs articles ne l'est qu'une fois.
+
+L'index est construit à la première suggestion demandée puis tenu à jour :
+- dans le worker qui modifie un article, par les signaux d'articles/signals.py ;
+- dans les autres, à la suggestion suivante : le jeton de version `suggest`
+  (articles/cache.py) a changé, seuls les documents de recherche modifiés
+  depuis la dernière synchronisation sont relus (updated_at), ainsi que les
+  articles supprimés depuis (journal DeletedArticle, écrit avec la
+  suppression). Un index resté plus de TOMBSTONE_TTL sans synchronisation
+  est reconstruit : le journal est purgé au-delà.
+"""
+
+import bisect
+import datetime
+import itertools
+import sys
+import threading
+from urllib.parse import urlencode
+
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from .cache import get_versions, invalidate
+from .models import Article, ArticleSearchDocument, DeletedArticle
+from .search import fold
+from .sellers import SELLERS, seller_choices
+
+SUGGEST = 'suggest'
+
+# Longueur minimale de la saisie et nombre de suggestions renvoyées
+MIN_QUERY_LENGTH = 2
+LIMIT = 8
+SELLER_LIMIT = 3
+
+# Nombre de mots d'un titre à partir desquels il est indexé
+INDEXED_WORDS = 6
+
+# Nombre maximal d'entrées parcourues par suggestion (titres très répandus)
+SCAN_LIMIT = 500
+
+SEPARATOR = '\x00'
+
+# Marge de relecture des documents modifiés (horloges des workers légèrement décalées)
+SYNC_OVERLAP = datetime.timedelta(seconds=5)
+
+# Durée de conservation du journal des suppressions
+TOMBSTONE_TTL = datetime.timedelta(days=1)
+# Purge du journal toutes les N suppressions (pas à chacune : suppressions en masse)
+TOMBSTONE_PRUNE_EVERY = 100
+
+
+def normalize(text):
+    return ' '.join(fold(text).replace(SEPARATOR, '').split())
+
+
+def title_keys(title):
+    """Clés d'un titre (ou nom de vendeur) : le texte normalisé à partir de chacun de ses premiers mots"""
+    words = normalize(title).split()
+    return [' '.join(words[position:]) for position in range(min(len(words), INDEXED_WORDS))]
+
+
+def make_entry(key, position, kind, value):
+    # Une chaîne par entrée (bien plus compacte qu'un tuple) ; le séparateur, inférieur à
+    # tout caractère, garde l'ordre des clés : « lampe » avant « lampe torche »
+    return f'{key}{SEPARATOR}{position}{kind}{value}'
+
+
+def parse_entry(entry):
+    suffix = entry.rsplit(SEPARATOR, 1)[1]
+    return int(suffix[0]), suffix[1], suffix[2:]
+
+
+class SuggestionIndex:
+    """
+    Index de préfixes : liste triée d'entrées « clé, position du mot, type,
+    valeur » ; la valeur est le titre (type a, indexé une fois quel que soit
+    le nombre d'articles qui le portent) ou l'identifiant du vendeur (type s).
+    """
+
+    def __init__(self):
+        self.entries = []
+        self.titles = {}
+        self.articles_by_title = {}
+        self.sellers = {}
+        self.synced_at = None
+        self.sellers_version = None
+
+    def __len__(self):
+        return len(self.titles)
+
+    @staticmethod
+    def _title_entries(title):
+        return [make_entry(key, position, 'a', title) for position, key in enumerate(title_keys(title))]
+
+    def _link(self, article_id, title):
+        """Associe l'article à son titre ; True si le titre est nouveau"""
+        title = sys.intern(title)
+        self.titles[article_id] = title
+        ids = self.articles_by_title.setdefault(title, set())
+        ids.add(article_id)
+        return len(ids) == 1
+
+    def add_article(self, article_id, title):
+        if self.titles.get(article_id) == title:
+            return
+        self.remove_article(article_id)
+        if self._link(article_id, title):
+            for entry in self._title_entries(title):
+                bisect.insort(self.entries, entry)
+
+    def remove_article(self, article_id):
+        title = self.titles.pop(article_id, None)
+        if title is None:
+            return
+        ids = self.articles_by_title[title]
+        ids.discard(article_id)
+        if ids:
+            return
+        del self.articles_by_title[title]
+        for entry in self._title_entries(title):
+            index = bisect.bisect_left(self.entries, entry)
+            if index < len(self.entries) and self.entries[index] == entry:
+                del self.entries[index]
+
+    def set_sellers(self, choices):
+        entries = [entry for entry in self.entries if parse_entry(entry)[1] != 's']
+        self.sellers = dict(choices)
+        for seller_id, label in choices:
+            entries.extend(make_entry(key, position, 's', seller_id) for position, key in enumerate(title_keys(label)))
+        entries.sort()
+        self.entries = entries
+
+    def search(self, query, limit=LIMIT, seller_limit=SELLER_LIMIT):
+        """
+        Suggestions dont une clé commence par `query` : début de titre d'abord,
+        puis titres plus courts. Pour un titre porté par plusieurs articles,
+        l'identifiant est None.
+        """
+        query = normalize(query)
+        if len(query) < MIN_QUERY_LENGTH:
+            return []
+        matches = {}
+        start = bisect.bisect_left(self.entries, query)
+        for entry in itertools.islice(self.entries, start, start + SCAN_LIMIT):
+            if not entry.startswith(query) or len(matches) >= limit * 5:
+                break
+            position, kind, value = parse_entry(entry)
+            if kind == 's':
+                seller_id = int(value)
+                label, object_id = self.sellers[seller_id], seller_id
+            else:
+                ids = self.articles_by_title[value]
+                label, object_id = value, next(iter(ids)) if len(ids) == 1 else None
+            if (kind, object_id, label) not in matches:
+                matches[(kind, object_id, label)] = (position, len(label), label)
+
+        ranked = sorted(matches, key=matches.get)
+        sellers = [('seller', object_id, label) for kind, object_id, label in ranked if kind == 's']
+        articles = [('article', object_id, label) for kind, object_id, label in ranked if kind == 'a']
+        sellers = sellers[:seller_limit]
+        return articles[:limit - len(sellers)] + sellers
+
+
+_index = None
+_version = None
+_lock = threading.Lock()
+
+
+def _build():
+    index = SuggestionIndex()
+    index.synced_at = timezone.now()
+    for article_id, title in Article.objects.values_list('id', 'title').iterator(chunk_size=5000):
+        if index._link(article_id, title):
+            index.entries.extend(index._title_entries(title))
+    index.entries.sort()
+    return index
+
+
+def _sync(index):
+    """Relit les documents modifiés et les articles supprimés depuis la dernière synchronisation"""
+    now = timezone.now()
+    since = index.synced_at - SYNC_OVERLAP
+    if since < now - TOMBSTONE_TTL:
+        # Journal des suppressions déjà purgé pour cette période
+        return _build()
+    changed = (
+        ArticleSearchDocument.objects.filter(updated_at__gte=since)
+        .values_list('article_id', 'article__title')
+    )
+    for article_id, title in changed:
+        index.add_article(article_id, title)
+    for article_id in DeletedArticle.objects.filter(deleted_at__gte=since).values_list('article_id', flat=True):
+        index.remove_article(article_id)
+    index.synced_at = now
+    return index
+
+
+def get_index():
+    """Index du worker, construit ou synchronisé si la version partagée a changé"""
+    global _index, _version
+    version, sellers_version = get_versions([SUGGEST, SELLERS])
+    with _lock:
+        if _index is None:
+            _index = _build()
+        elif version != _version:
+            _index = _sync(_index)
+        _version = version
+        if _index.sellers_version != sellers_version:
+            _index.set_sellers(seller_choices())
+            _index.sellers_version = sellers_version
+        return _index
+
+
+def suggest(query):
+    """[{type, label, url}] pour la saisie `query`"""
+    results = []
+    for kind, object_id, label in get_index().search(query):
+        if kind == 'seller':
+            url = f"{reverse('home')}?{urlencode({'seller': object_id})}"
+        elif object_id is None:
+            # Titre partagé par plusieurs articles : recherche sur ce titre
+            url = f"{reverse('home')}?{urlencode({'search': label})}"
+        else:
+            url = reverse('articles:detail', args=[object_id])
+        results.append({'type': kind, 'label': label, 'url': url})
+    return results
+
+
+def _invalidate_after_commit():
+    # Après le commit : les autres workers doivent voir le document modifié en se synchronisant
+    transaction.on_commit(lambda: invalidate(SUGGEST))
+
+
+def article_changed(article):
+    """Mise à jour immédiate de l'index du worker ; les autres se synchroniseront"""
+    with _lock:
+        if _index is not None:
+            _index.add_article(article.pk, article.title)
+    _invalidate_after_commit()
+
+
+def article_removed(article_id):
+    """Retire l'article de l'index du worker et le note au journal des suppressions (autres workers)"""
+    tombstone = DeletedArticle.objects.create(article_id=article_id)
+    if tombstone.pk % TOMBSTONE_PRUNE_EVERY == 0:
+        DeletedArticle.objects.filter(deleted_at__lt=timezone.now() - TOMBSTONE_TTL).delete()
+    with _lock:
+        if _index is not None:
+            _index.remove_article(article_id)
+    _invalidate_after_commit()
+
+
+def reset():
+    """Oublie l'index du worker (tests, import massif)"""
+    global _index, _version
+    with _lock:
+        _index = _version = None
@@ -0,0 +1,49 @@
+"""
+Tâches en arrière-plan des articles (exécutées par `python manage.py run_jobs`).
+"""
+
+import posixpath
+
+from django.core.files.base import ContentFile
+
+from jobs.queue import enqueue, task
+from . import cache
+from .images import generate_variants, has_current_variants, staging_storage, strip_metadata
+from .models import Article
+
+
+@task('articles.process_image')
+def process_image(article_id, staged_name):
+    """Nettoie l'image déposée, l'envoie vers le stockage et programme ses vignettes"""
+    staging = staging_storage()
+    article = Article.objects.filter(pk=article_id).first()
+    if article is None or article.pending_image != staged_name:
+        # Article supprimé ou image remplacée entre-temps
+        staging.delete(staged_name)
+        return
+
+    with staging.open(staged_name, 'rb') as file:
+        data = strip_metadata(file.read())
+    previous = article.images.name
+    # Envoi vers le stockage configuré (disque, Cloudinary ou S3), dédupliqué par contenu
+    article.images.save(posixpath.basename(staged_name), ContentFile(data), save=False)
+    updated = Article.objects.filter(pk=article_id, pending_image=staged_name).update(
+        images=article.images.name, pending_image=''
+    )
+    storage = article.images.storage
+    # Libère la référence remplacée : l'ancienne image, ou la nouvelle si l'envoi est périmé
+    storage.delete(previous if updated else article.images.name)
+    staging.delete(staged_name)
+    if updated:
+        cache.invalidate(cache.CATALOG, cache.article_scope(article_id))
+        enqueue('articles.generate_variants', article_id=article_id)
+
+
+@task('articles.generate_variants')
+def generate_article_variants(article_id):
+    """Génère les vignettes et versions WebP de l'image d'un article"""
+    article = Article.objects.filter(pk=article_id).first()
+    if article is None or has_current_variants(article):
+        return
+    generate_variants(article)
+    cache.invalidate(cache.CATALOG, cache.article_scope(article_id))
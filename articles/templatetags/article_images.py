@@ -0,0 +1,53 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from articles.images import VARIANTS, variant_sources
+
+register = template.Library()
+
+
+def _srcset(sources):
+    return ', '.join(f'{url} {density}x' for url, density, _, _ in sources)
+
+
+@register.simple_tag
+def article_image(article, variant='card', **attrs):
+    """
+    Image d'un article dans la taille `variant` (list, card, detail) :
+    <picture> avec sources WebP et JPEG en 1x/2x, l'original si les variantes
+    ne sont pas encore générées, ou un espace réservé pendant le traitement.
+
+    Usage : {% article_image article 'card' class="card-img-top" style="height: 220px;" %}
+    """
+    if variant not in VARIANTS:
+        raise template.TemplateSyntaxError(f"Variante d'image inconnue : {variant}")
+    if not article.images:
+        if article.pending_image:
+            # Nouvelle image en cours de traitement par le worker
+            return format_html(
+                '<div class="{} bg-light d-flex align-items-center justify-content-center text-muted" '
+                'style="{}" role="img" aria-label="Image en cours de traitement">'
+                '<i class="fas fa-hourglass-half"></i></div>',
+                attrs.get('class', ''), attrs.get('style', ''),
+            )
+        return ''
+
+    attrs.setdefault('alt', article.title)
+    attrs.setdefault('loading', 'lazy')
+    attrs.setdefault('decoding', 'async')
+    sources = variant_sources(article, variant)
+    fallback = sources.get('jpeg')
+    if not fallback:
+        attributes = format_html_join(' ', '{}="{}"', sorted(attrs.items()))
+        return format_html('<img src="{}" {}>', article.images.url, attributes)
+
+    url, _, width, height = fallback[0]
+    attrs.setdefault('width', width)
+    attrs.setdefault('height', height)
+    attributes = format_html_join(' ', '{}="{}"', sorted(attrs.items()))
+    webp = ''
+    if sources.get('webp'):
+        webp = format_html('<source type="image/webp" srcset="{}">', _srcset(sources['webp']))
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" {}></picture>', webp, url, _srcset(fallback), attributes
+    )
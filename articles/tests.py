@@ -1,3 +1,456 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+import time
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from PIL import Image
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from config.testing import QueryBudgetMixin
+from users.models import User
+from jobs.models import Job
+from jobs.queue import run_pending
+from .forms import ArticleForm, ArticleSearchForm, SellerAutocompleteWidget, save_with_deferred_image
+from .models import Article, ArticleSearchDocument, StoredFile
+from .storage import ContentAddressedStorage, article_storage, is_content_addressed
+from .search import fold, search_articles, stem
+from .facets import compute_facets
+from .sellers import seller_choices
+from . import search, suggest
+from .cache import get_versions, invalidate
+
+
+class SearchNormalizationTests(TestCase):
+    def test_fold_removes_accents_and_ligatures(self):
+        self.assertEqual(fold('Élégant Cœur'), 'elegant coeur')
+
+    def test_stem_merges_plural_and_feminine_forms(self):
+        self.assertEqual(stem('chaussures'), stem('chaussure'))
+        self.assertEqual(stem('chevaux'), 'cheval')
+        self.assertEqual(stem('sac'), 'sac')
+
+
+class ArticleSearchTests(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(username='vendeur', password='x', role='seller')
+
+    def create_article(self, title, description, price='10.00'):
+        return Article.objects.create(
+            title=title, description=description, price=Decimal(price), seller=self.seller
+        )
+
+    def test_document_follows_article_lifecycle(self):
+        article = self.create_article('Téléphone reconditionné', 'Très bon état général')
+        self.assertEqual(article.search_document.title, 'telephone reconditionne')
+
+        article.title = 'Tablette reconditionnée'
+        article.save()
+        self.assertEqual(list(search_articles(Article.objects.all(), 'tablette')), [article])
+        self.assertFalse(search_articles(Article.objects.all(), 'telephone').exists())
+
+        article.delete()
+        self.assertFalse(ArticleSearchDocument.objects.exists())
+        self.assertFalse(search_articles(Article.objects.all(), 'tablette').exists())
+
+    def test_search_ignores_accents_plurals_and_matches_prefixes(self):
+        article = self.create_article('Chaussures de randonnée', 'Pointure 42, cuir véritable')
+        for query in ['chaussure', 'RANDONNEE', 'cuir verit', 'chaus']:
+            with self.subTest(query=query):
+                self.assertEqual(list(search_articles(Article.objects.all(), query)), [article])
+
+    def test_title_matches_rank_first(self):
+        in_description = self.create_article('Sac à dos', 'Idéal pour ranger une lampe frontale')
+        in_title = self.create_article('Lampe frontale LED', 'Autonomie de dix heures')
+        results = search_articles(Article.objects.all(), 'lampe').order_by('-search_rank')
+        self.assertEqual(list(results), [in_title, in_description])
+
+    def test_home_combines_search_with_form_filters(self):
+        cheap = self.create_article('Montre classique', 'Bracelet en cuir marron', price='40.00')
+        self.create_article('Montre connectée', 'Bracelet silicone noir', price='300.00')
+        response = self.client.get(reverse('home'), {'search': 'montre', 'price_range': '0-50'})
+        self.assertEqual(list(response.context['page_obj']), [cheap])
+        self.assertEqual(response.context['total_articles'], 1)
+
+    def test_fallback_backend_is_rechecked(self):
+        # Table FTS5 absente (migration pas encore appliquée) : repli temporaire
+        introspection = connection.introspection
+        with mock.patch.dict(search._backends, clear=True):
+            with mock.patch.object(introspection, 'table_names', return_value=[]):
+                self.assertIs(type(search.get_backend()), search.FallbackBackend)
+            self.assertIs(type(search.get_backend()), search.FallbackBackend)
+            with mock.patch.object(search.time, 'monotonic', return_value=time.monotonic() + search.FALLBACK_RECHECK):
+                self.assertIs(type(search.get_backend()), search.SqliteBackend)
+            # Backend trouvé : conservé sans nouvelle introspection
+            with mock.patch.object(introspection, 'table_names', side_effect=AssertionError):
+                self.assertIs(type(search.get_backend()), search.SqliteBackend)
+
+
+class AnonymousPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.seller = User.objects.create_user(username='vendeur', password='x', role='seller')
+        self.article = Article.objects.create(
+            title='Vélo de ville', description='Cadre aluminium', price=Decimal('120.00'), seller=self.seller
+        )
+        self.other = Article.objects.create(
+            title='Casque', description='Taille M', price=Decimal('25.00'), seller=self.seller
+        )
+
+    def get(self, url, data=None):
+        return self.client.get(url, data).headers.get('X-Page-Cache')
+
+    def test_catalog_is_keyed_on_normalized_query(self):
+        url = reverse('home')
+        self.assertEqual(self.get(url, {'search': 'velo', 'seller': ''}), 'MISS')
+        self.assertEqual(self.get(url + '?seller=&search=velo&utm_source=x'), 'HIT')
+        self.assertEqual(self.get(url, {'search': 'casque'}), 'MISS')
+
+    def test_article_change_invalidates_catalog_and_its_page_only(self):
+        home, detail = reverse('home'), reverse('articles:detail', args=[self.article.id])
+        other_detail = reverse('articles:detail', args=[self.other.id])
+        for url in (home, detail, other_detail):
+            self.get(url)
+
+        self.article.price = Decimal('99.00')
+        self.article.save()
+        self.assertEqual(self.get(home), 'MISS')
+        self.assertEqual(self.get(detail), 'MISS')
+        self.assertEqual(self.get(other_detail), 'HIT')
+
+    def test_seller_change_invalidates_pages_but_not_login(self):
+        detail = reverse('articles:detail', args=[self.article.id])
+        self.get(detail)
+        self.client.login(username='vendeur', password='x')  # met à jour last_login
+        self.client.logout()
+        self.assertEqual(self.get(detail), 'HIT')
+
+        self.seller.first_name = 'Awa'
+        self.seller.save()
+        response = self.client.get(detail)
+        self.assertEqual(response.headers['X-Page-Cache'], 'MISS')
+        self.assertContains(response, 'Awa')
+
+    def test_authenticated_users_bypass_cache(self):
+        self.client.force_login(self.seller)
+        response = self.client.get(reverse('home'))
+        self.assertNotIn('X-Page-Cache', response.headers)
+
+
+class TemporaryMediaMixin:
+    """MEDIA_ROOT temporaire et tâches exécutées juste après le commit, sans worker"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        override = override_settings(
+            MEDIA_ROOT=media_root, IMAGE_STAGING_ROOT=f'{media_root}/staging', JOBS_INLINE=True
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        self.seller = User.objects.create_user(username='vendeur', password='x', role='seller')
+
+    def upload(self, name='photo.jpg', size=(1200, 900), color='navy'):
+        buffer = io.BytesIO()
+        exif = Image.Exif()
+        exif[0x010F] = 'Appareil'  # Make
+        Image.new('RGB', size, color).save(buffer, format='JPEG', exif=exif)
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+    def create_with_form(self, run_jobs=True):
+        form = ArticleForm(
+            {'title': 'Vélo de ville', 'description': 'Cadre aluminium, très bon état', 'price': '120.00'},
+            {'images': self.upload()},
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        with self.captureOnCommitCallbacks(execute=run_jobs):
+            article = save_with_deferred_image(form, seller=self.seller)
+        article.refresh_from_db()
+        return article
+
+
+class ImageVariantTests(TemporaryMediaMixin, TestCase):
+    def test_article_is_published_before_image_is_processed(self):
+        article = self.create_with_form(run_jobs=False)
+        self.assertFalse(article.images)
+        self.assertTrue(article.pending_image)
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, 'Image en cours de traitement')
+
+        # Envoi de l'image, puis génération des vignettes
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(run_pending(), 1)
+        article.refresh_from_db()
+        self.assertFalse(article.pending_image)
+        self.assertEqual(article.image_variants['source'], article.images.name)
+        with article.images.open('rb') as file, Image.open(file) as image:
+            self.assertFalse(image.getexif())
+        self.assertFalse(Job.objects.exists())
+
+    def test_upload_generates_sized_variants_in_both_formats(self):
+        article = self.create_with_form()
+        card = article.image_variants['variants']['card']
+        self.assertEqual(article.image_variants['source'], article.images.name)
+        self.assertEqual(
+            sorted((entry['format'], entry['width'], entry['height']) for entry in card),
+            [('jpeg', 400, 300), ('jpeg', 800, 600), ('webp', 400, 300), ('webp', 800, 600)],
+        )
+        storage = article.images.storage
+        self.assertTrue(all(storage.exists(entry['name']) for entry in card))
+        # « detail » conserve les proportions sans agrandir l'image
+        detail = {entry['density']: entry for entry in article.image_variants['variants']['detail']}
+        self.assertEqual((detail[1]['width'], detail[1]['height']), (800, 600))
+        self.assertEqual((detail[2]['width'], detail[2]['height']), (1200, 900))
+
+    def test_replacing_image_removes_previous_variants(self):
+        article = self.create_with_form()
+        old_names = [entry['name'] for entry in article.image_variants['variants']['list']]
+        article.images = self.upload('autre.jpg')
+        with self.captureOnCommitCallbacks(execute=True):
+            article.save()
+        article.refresh_from_db()
+        storage = article.images.storage
+        self.assertFalse(any(storage.exists(name) for name in old_names))
+        self.assertEqual(article.image_variants['source'], article.images.name)
+
+    def test_template_tag_renders_srcset(self):
+        article = self.create_with_form()
+        html = Template("{% load article_images %}{% article_image article 'card' class='card-img-top' %}").render(
+            Context({'article': article})
+        )
+        self.assertIn('<source type="image/webp" srcset="', html)
+        self.assertRegex(html, r'/[0-9a-f]{64}\.webp 2x"')
+        self.assertIn('class="card-img-top"', html)
+
+    def test_backfill_command_processes_existing_images(self):
+        article = self.create_with_form()
+        Article.objects.filter(pk=article.pk).update(image_variants={})
+        call_command('generate_image_variants', stdout=io.StringIO())
+        article.refresh_from_db()
+        self.assertEqual(article.image_variants['source'], article.images.name)
+
+
+class ContentAddressedStorageTests(TemporaryMediaMixin, TestCase):
+    def test_identical_uploads_share_one_reference_counted_file(self):
+        first, second = self.create_with_form(), self.create_with_form()
+        self.assertTrue(is_content_addressed(first.images.name))
+        self.assertEqual(first.images.name, second.images.name)
+        self.assertEqual(StoredFile.objects.get(name=first.images.name).refcount, 2)
+
+        name = first.images.name
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(article_storage.exists(name))
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(article_storage.exists(name))
+        self.assertFalse(StoredFile.objects.exists())
+
+    def test_dedup_command_renames_and_merges_existing_files(self):
+        backend = article_storage.backend
+        content = self.upload().read()
+        legacy = [backend.save(f'articles/photo_{index}.jpg', ContentFile(content)) for index in range(2)]
+        for index, name in enumerate(legacy):
+            Article.objects.create(title=f'Article {index}', description='Description',
+                                   price=Decimal('10.00'), seller=self.seller, images=name)
+        # Fichiers antérieurs : pas encore suivis
+        StoredFile.objects.all().delete()
+
+        call_command('dedup_article_images', stdout=io.StringIO())
+        names = set(Article.objects.values_list('images', flat=True))
+        self.assertEqual(len(names), 1)
+        name = names.pop()
+        self.assertTrue(is_content_addressed(name))
+        self.assertEqual(StoredFile.objects.get(name=name).refcount, 2)
+        self.assertFalse(any(backend.exists(old) for old in legacy))
+
+    def test_failed_write_releases_the_reference(self):
+        storage = ContentAddressedStorage(article_storage.backend)
+        with mock.patch.object(storage.backend, 'save', side_effect=OSError('disque plein')):
+            with self.assertRaises(OSError):
+                storage.save('articles/photo.jpg', ContentFile(b'contenu'))
+        self.assertFalse(StoredFile.objects.exists())
+        name = storage.save('articles/photo.jpg', ContentFile(b'contenu'))
+        self.assertEqual(StoredFile.objects.get(name=name).refcount, 1)
+        self.assertTrue(storage.exists(name))
+
+
+class ArticleViewQueryBudgetTests(QueryBudgetMixin, TestCase):
+    def test_article_detail_budget(self):
+        seller = User.objects.create_user(username='vendeur', password='x', role='seller')
+        article = Article.objects.create(
+            title='Lampe', description='Lampe de bureau', price=Decimal('120.00'), seller=seller,
+        )
+        self.assertQueryBudget(2, reverse('articles:detail', args=[article.pk]))
+        self.assertQueryBudget(4, reverse('articles:detail', args=[article.pk]), user=seller)
+
+
+class SellerChoicesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.seller = User.objects.create_user(username='helene', password='x', role='seller',
+                                               first_name='Hélène', last_name='Martin')
+
+    def test_choices_are_cached_until_a_seller_changes(self):
+        self.assertEqual(seller_choices(), [(self.seller.pk, 'Hélène Martin (@helene)')])
+        with self.assertNumQueries(0):
+            ArticleSearchForm({'seller': self.seller.pk}).is_valid()
+
+        # Un client n'entre pas dans la liste ; un vendeur renommé ou rétrogradé en sort
+        User.objects.create_user(username='client', password='x', role='client')
+        with self.assertNumQueries(0):
+            seller_choices()
+        self.seller.first_name = self.seller.last_name = ''
+        self.seller.save()
+        self.assertEqual(seller_choices(), [(self.seller.pk, 'helene')])
+        self.seller.role = 'client'
+        self.seller.save(update_fields=['role'])
+        self.assertEqual(seller_choices(), [])
+
+    def test_search_form_validates_against_cached_choices(self):
+        self.assertEqual(ArticleSearchForm({'seller': self.seller.pk}).is_valid(), True)
+        client = User.objects.create_user(username='client', password='x', role='client')
+        self.assertEqual(ArticleSearchForm({'seller': client.pk}).is_valid(), False)
+        self.assertEqual(ArticleSearchForm({'seller': 'abc'}).is_valid(), False)
+
+    @override_settings(SELLER_AUTOCOMPLETE_THRESHOLD=1)
+    def test_autocomplete_mode_above_threshold(self):
+        User.objects.create_user(username='marc', password='x', role='seller')
+        form = ArticleSearchForm({'seller': self.seller.pk})
+        self.assertIsInstance(form.fields['seller'].widget, SellerAutocompleteWidget)
+        self.assertTrue(form.is_valid())
+        html = str(form['seller'])
+        self.assertIn('value="Hélène Martin (@helene)"', html)
+        self.assertNotIn('<option', html)
+
+        response = self.client.get(reverse('articles:seller_autocomplete'), {'q': 'hele'})
+        self.assertEqual(response.json(), {'results': [{'id': self.seller.pk, 'label': 'Hélène Martin (@helene)'}]})
+        response = self.client.get(reverse('articles:seller_autocomplete'), {'q': 'mar'})
+        self.assertEqual([result['label'] for result in response.json()['results']], ['marc', 'Hélène Martin (@helene)'])
+
+
+class SearchSuggestionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        suggest.reset()
+        self.seller = User.objects.create_user(username='lamartine', password='x', role='seller')
+        self.lamp = self.create('Grande lampe de bureau')
+        self.create('Lampadaire en métal')
+        self.chair = self.create('Chaise pliante')
+
+    def create(self, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Article.objects.create(title=title, description='Description', price=Decimal('10.00'),
+                                          seller=self.seller)
+
+    def labels(self, query):
+        response = self.client.get(reverse('articles:suggest'), {'q': query})
+        return [result['label'] for result in response.json()['results']]
+
+    def test_prefix_matches_titles_and_sellers(self):
+        # Début de titre d'abord, puis mot suivant ; accents ignorés ; vendeurs en fin de liste
+        self.assertEqual(self.labels('LAMP'), ['Lampadaire en métal', 'Grande lampe de bureau'])
+        self.assertEqual(self.labels('metal'), ['Lampadaire en métal'])
+        self.assertEqual(self.labels('lama'), ['lamartine'])
+        self.assertEqual(self.labels('l'), [])
+
+        response = self.client.get(reverse('articles:suggest'), {'q': 'chai'})
+        self.assertIn('max-age=60', response['Cache-Control'])
+        self.assertEqual(response.json()['results'][0]['url'], reverse('articles:detail', args=[self.chair.pk]))
+
+    def test_index_follows_changes_in_this_worker(self):
+        self.labels('lamp')
+        with self.assertNumQueries(0):
+            suggest.get_index()
+
+        self.create('Lampe torche')
+        self.lamp.title = 'Grand bureau'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lamp.save()
+        self.assertEqual(self.labels('lamp'), ['Lampe torche', 'Lampadaire en métal'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lamp.delete()
+        self.assertEqual(self.labels('bureau'), [])
+
+    def test_other_workers_sync_from_search_documents(self):
+        self.labels('lamp')
+        # Modifications faites par un autre worker : seul le jeton de version partagé change
+        Article.objects.filter(pk=self.lamp.pk).update(title='Lampe frontale')
+        ArticleSearchDocument.objects.filter(article=self.lamp).update(updated_at=timezone.now())
+        invalidate(suggest.SUGGEST)
+        self.assertEqual(self.labels('lampe'), ['Lampe frontale'])
+
+    def test_rebuild_index_refreshes_suggestions(self):
+        self.labels('lamp')
+        # Articles importés sans signaux puis réindexés
+        Article.objects.bulk_create([Article(title='Lampe de chevet', description='Description',
+                                             price=Decimal('10.00'), seller=self.seller)])
+        version = get_versions([suggest.SUGGEST])
+        search.rebuild_index()
+        self.assertNotEqual(get_versions([suggest.SUGGEST]), version)
+        self.assertIn('Lampe de chevet', self.labels('lampe'))
+
+        # Suppression dans un autre worker : simulée en remettant l'article dans cet index
+        index = suggest.get_index()
+        lampadaire = Article.objects.get(title='Lampadaire en métal')
+        article_id = lampadaire.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            lampadaire.delete()
+        index.add_article(article_id, lampadaire.title)
+        invalidate(suggest.SUGGEST)
+        # Journal des suppressions relu, sans reconstruction (documents, suppressions)
+        with self.assertNumQueries(2):
+            suggest.get_index()
+        self.assertEqual(self.labels('lampa'), [])
+        self.assertEqual(len(suggest.get_index()), Article.objects.count())
+
+
+class FacetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(username='alice', password='x', role='seller')
+        self.bruno = User.objects.create_user(username='bruno', password='x', role='seller')
+        for seller, title, price in (
+            (self.alice, 'Lampe de bureau', '20.00'),
+            (self.alice, 'Lampe halogène', '75.00'),
+            (self.bruno, 'Lampe de chevet', '30.00'),
+            (self.bruno, 'Lampe industrielle', '1500.00'),
+            (self.bruno, 'Chaise', '30.00'),
+        ):
+            Article.objects.create(title=title, description=title, price=Decimal(price), seller=seller)
+
+    def test_one_grouped_query_then_cache(self):
+        with self.assertNumQueries(1):
+            facets = compute_facets({'search': 'lampe'})
+        self.assertEqual(facets['price_range'], {
+            '0-50': 2, '50-100': 1, '100-250': 0, '250-500': 0, '500-1000': 0, '1000+': 1,
+        })
+        self.assertEqual(facets['seller'], {self.alice.pk: 2, self.bruno.pk: 2})
+
+        # Chaque facette ignore son propre filtre mais pas celui de l'autre (mêmes lignes en cache)
+        with self.assertNumQueries(0):
+            facets = compute_facets({'search': 'lampe', 'seller': self.bruno.pk, 'price_range': '0-50'})
+        self.assertEqual(facets['price_range']['0-50'], 1)
+        self.assertEqual(facets['price_range']['1000+'], 1)
+        self.assertEqual(facets['seller'], {self.alice.pk: 1, self.bruno.pk: 1})
+
+    def test_new_article_refreshes_counts(self):
+        self.assertEqual(compute_facets({})['seller'][self.alice.pk], 2)
+        Article.objects.create(title='Table', description='Table', price=Decimal('5.00'), seller=self.alice)
+        self.assertEqual(compute_facets({})['seller'][self.alice.pk], 3)
+
+    @override_settings(PAGE_CACHE_TIMEOUT=0)
+    def test_counts_are_shown_in_filter_panel(self):
+        response = self.client.get(reverse('home'), {'search': 'lampe'})
+        self.assertContains(response, 'Moins de 50€ (2)')
+        self.assertContains(response, 'alice (2)')
@@ -8,4 +8,6 @@ urlpatterns = [
     path('<int:article_id>/', views.article_detail, name='detail'),
     path('<int:article_id>/edit/', views.edit_article, name='edit'),
     path('<int:article_id>/delete/', views.delete_article, name='delete'),
+    path('sellers/', views.seller_autocomplete, name='seller_autocomplete'),
+    path('suggest/', views.search_suggestions, name='suggest'),
 ]
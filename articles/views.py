@@ -1,9 +1,13 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import Http404
+from django.http import Http404, JsonResponse
+from django.utils.cache import patch_cache_control
+from .cache import article_scope, cache_anonymous_page
 from .models import Article
-from .forms import ArticleForm
+from .forms import ArticleForm, save_with_deferred_image
+from .sellers import suggest_sellers
+from .suggest import suggest
 
 
 @login_required
@@ -17,9 +21,8 @@ def create_article(request):
     if request.method == 'POST':
         form = ArticleForm(request.POST, request.FILES)
         if form.is_valid():
-            article = form.save(commit=False)
-            article.seller = request.user  # Associer l'article au vendeur connecté
-            article.save()
+            # Associer l'article au vendeur connecté ; l'image est traitée en arrière-plan
+            article = save_with_deferred_image(form, seller=request.user)
             messages.success(
                 request,
                 f'Votre article "{article.title}" a été publié avec succès !'
@@ -47,7 +50,7 @@ def edit_article(request, article_id):
     if request.method == 'POST':
         form = ArticleForm(request.POST, request.FILES, instance=article)
         if form.is_valid():
-            form.save()
+            save_with_deferred_image(form)
             messages.success(
                 request,
                 f'Votre article "{article.title}" a été mis à jour avec succès !'
@@ -89,12 +92,31 @@ def delete_article(request, article_id):
     return render(request, 'articles/delete_article.html', context)
 
 
+@cache_anonymous_page(lambda request, article_id: [article_scope(article_id)])
 def article_detail(request, article_id):
     """Vue pour afficher le détail d'un article"""
-    article = get_object_or_404(Article, id=article_id)
+    article = get_object_or_404(Article.objects.select_related('seller'), id=article_id)
 
     context = {
         'article': article,
         'page_title': article.title
     }
     return render(request, 'articles/article_detail.html', context)
+
+
+def seller_autocomplete(request):
+    """Suggestions de vendeurs (JSON) pour le filtre à saisie semi-automatique"""
+    results = [{'id': pk, 'label': label} for pk, label in suggest_sellers(request.GET.get('q', ''))]
+    return JsonResponse({'results': results})
+
+
+# Durée (secondes) pendant laquelle le navigateur réutilise une suggestion
+SUGGEST_MAX_AGE = 60
+
+
+def search_suggestions(request):
+    """Suggestions (JSON) de la barre de recherche : articles et vendeurs"""
+    query = request.GET.get('q', '')[:100]
+    response = JsonResponse({'query': query, 'results': suggest(query)})
+    patch_cache_control(response, public=True, max_age=SUGGEST_MAX_AGE)
+    return response
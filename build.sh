@@ -22,4 +22,8 @@ fi
 echo "🗄️ Application des migrations..."
 python manage.py migrate
 
+# Créer la table du cache (backend base de données)
+echo "🗃️ Création de la table de cache..."
+python manage.py createcachetable
+
 echo "✅ Build terminé avec succès!"
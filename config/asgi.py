@@ -9,8 +9,12 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+from config.streaming import StreamingASGIHandler  # noqa: E402
+
+# Flux SSE seulement (config/streaming.py) ; le site est servi par config.wsgi
+django.setup(set_prefix=False)
+application = StreamingASGIHandler()
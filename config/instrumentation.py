@@ -0,0 +1,154 @@
+"""
+Mesures par requête : requêtes SQL, temps en base, requêtes répétées (N+1),
+temps de rendu des templates et durée totale.
+
+- `RequestMetricsMiddleware` installe un `execute_wrapper` sur chaque
+  connexion le temps de la requête et ajoute l'en-tête `Server-Timing`
+  (lisible dans l'onglet réseau du navigateur et par `manage.py benchmark`) ;
+- `InstrumentedDjangoTemplates` (backend de TEMPLATES) chronomètre les rendus ;
+- une ligne de log JSON est écrite pour une fraction des requêtes
+  (INSTRUMENTATION_SAMPLE_RATE) et pour toutes les requêtes lentes
+  (SLOW_REQUEST_MS).
+"""
+
+import contextvars
+import json
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger(__name__)
+
+# Nombre d'exécutions d'une même requête SQL (paramètres exclus) à partir duquel elle est signalée
+DUPLICATE_THRESHOLD = 2
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Compteurs d'une requête HTTP"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = Counter()
+        self.template_time = 0.0
+        self.template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # execute_wrapper : appelé pour chaque requête SQL
+        begin = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - begin
+            self.queries += 1
+            self.statements[sql] += 1
+
+    @property
+    def duplicates(self):
+        """Exécutions répétées d'une même requête (signe d'un N+1)"""
+        return sum(count - 1 for count in self.statements.values() if count >= DUPLICATE_THRESHOLD)
+
+    def most_repeated(self):
+        if not self.statements:
+            return None, 0
+        sql, count = self.statements.most_common(1)[0]
+        return (sql, count) if count >= DUPLICATE_THRESHOLD else (None, 0)
+
+    def server_timing(self, total):
+        metrics = [
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ]
+        if self.duplicates:
+            metrics.insert(1, f'dup;desc="{self.duplicates} duplicate queries"')
+        return ', '.join(metrics)
+
+
+class InstrumentedTemplate(Template):
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return super().render(context, request)
+        # Seul le rendu le plus externe est chronométré (render_to_string imbriqués)
+        metrics.template_depth += 1
+        begin = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_depth -= 1
+            if not metrics.template_depth:
+                metrics.template_time += time.perf_counter() - begin
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """Moteur de templates Django dont les rendus sont chronométrés"""
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return InstrumentedTemplate(template.template, self)
+
+
+class RequestMetricsMiddleware:
+    """
+    Mesure chaque requête ; à placer en tête de MIDDLEWARE pour inclure la
+    durée des autres middlewares.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.INSTRUMENTATION_ENABLED:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        total = time.perf_counter() - metrics.started
+        if settings.SERVER_TIMING_HEADER:
+            response['Server-Timing'] = metrics.server_timing(total)
+        self.log(request, response, metrics, total)
+        return response
+
+    def log(self, request, response, metrics, total):
+        slow = total * 1000 >= settings.SLOW_REQUEST_MS
+        if not slow and random.random() >= settings.INSTRUMENTATION_SAMPLE_RATE:
+            return
+        match = getattr(request, 'resolver_match', None)
+        repeated_sql, repeated_count = metrics.most_repeated()
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 1),
+            'db_ms': round(metrics.db_time * 1000, 1),
+            'template_ms': round(metrics.template_time * 1000, 1),
+            'queries': metrics.queries,
+            'duplicate_queries': metrics.duplicates,
+            'slow': slow,
+        }
+        if repeated_sql:
+            record['most_repeated'] = {'sql': repeated_sql[:300], 'count': repeated_count}
+        logger.log(logging.WARNING if slow else logging.INFO, 'request %s', json.dumps(record),
+                   extra={'metrics': record})
@@ -2,34 +2,194 @@
 Middleware personnalisé pour servir les fichiers média en production
 """
 
+import mimetypes
 import os
+import re
+import stat
+
 from django.conf import settings
-from django.http import Http404
-from django.views.static import serve
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotAllowed
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+# Noms contenant une empreinte du contenu (ex: 3f9a0c1d2e4b5a67.jpg, photo.3f9a0c1d2e4b.webp) :
+# leur contenu ne change jamais, ils peuvent être mis en cache sans limite
+HASHED_NAME_RE = re.compile(r'(^|[._-])[0-9a-f]{12,64}\.\w+$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeFile:
+    """
+    Fichier limité à une plage d'octets.
+
+    Expose `fileno()` : le `wsgi.file_wrapper` de gunicorn transmet alors la
+    plage avec os.sendfile (position courante + Content-Length), sans copie.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def etag_for(file_stat):
+    """ETag fort dérivé de la date de modification (ns) et de la taille"""
+    return f'"{file_stat.st_mtime_ns:x}-{file_stat.st_size:x}"'
+
+
+def cache_control_for(path):
+    if HASHED_NAME_RE.search(os.path.basename(path)):
+        return IMMUTABLE_CACHE_CONTROL
+    return f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+
+
+def parse_range(header, size):
+    """
+    Plage demandée par l'en-tête Range, sous forme (début, fin incluse).
+
+    Retourne None si l'en-tête est absent, invalide (début après la fin) ou
+    multiple (fichier entier servi) et 'unsatisfiable' si la plage commence
+    après la fin du fichier ou ne contient aucun octet.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if start == '':
+        # Suffixe : les N derniers octets
+        length = int(end)
+        if length == 0 or size == 0:
+            # Aucun octet à renvoyer (fichier vide compris)
+            return 'unsatisfiable'
+        return max(0, size - length), size - 1
+    start = int(start)
+    if end and start > int(end):
+        # Plage syntaxiquement invalide : ignorée (RFC 9110, 14.1.1)
+        return None
+    if start >= size:
+        return 'unsatisfiable'
+    end = min(int(end), size - 1) if end else size - 1
+    return start, end
+
+
+def if_range_matches(request, etag, last_modified):
+    """La condition If-Range (ETag ou date) autorise-t-elle une réponse partielle ?"""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == int(last_modified)
+
+
+def serve_media(request, path):
+    """
+    Sert un fichier de MEDIA_ROOT : ETag/Last-Modified, réponses 304/412,
+    plages d'octets (206/416), délégation X-Sendfile/X-Accel-Redirect si
+    configurée, sinon FileResponse (os.sendfile via le file_wrapper du serveur).
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        file_stat = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError, ValueError):
+        raise Http404("Fichier média non trouvé")
+    if not stat.S_ISREG(file_stat.st_mode):
+        raise Http404("Fichier média non trouvé")
+
+    etag = etag_for(file_stat)
+    last_modified = file_stat.st_mtime
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(last_modified),
+        'Cache-Control': cache_control_for(path),
+        'Accept-Ranges': 'bytes',
+    }
+
+    # If-None-Match / If-Modified-Since (304), If-Match / If-Unmodified-Since (412)
+    conditional = get_conditional_response(request, etag=etag, last_modified=int(last_modified))
+    if conditional is not None:
+        for header, value in headers.items():
+            conditional[header] = value
+        return conditional
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+    size = file_stat.st_size
+
+    sendfile_header = settings.MEDIA_SENDFILE_HEADER
+    if sendfile_header:
+        # Le serveur frontal (nginx, Apache) envoie le fichier et gère les plages
+        response = HttpResponse(content_type=content_type)
+        if sendfile_header.lower() == 'x-accel-redirect':
+            response[sendfile_header] = settings.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + path.lstrip('/')
+        else:
+            response[sendfile_header] = full_path
+    else:
+        byte_range = None
+        if if_range_matches(request, etag, last_modified):
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        if byte_range == 'unsatisfiable':
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        if byte_range is None:
+            start, length, status = 0, size, 200
+        else:
+            start, end = byte_range
+            length, status = end - start + 1, 206
+
+        if request.method == 'HEAD':
+            response = HttpResponse(content_type=content_type, status=status)
+        else:
+            response = FileResponse(RangeFile(open(full_path, 'rb'), start, length),
+                                    content_type=content_type, status=status)
+        response['Content-Length'] = str(length)
+        if status == 206:
+            response['Content-Range'] = f'bytes {start}-{start + length - 1}/{size}'
+
+    if encoding:
+        response['Content-Encoding'] = encoding
+    for header, value in headers.items():
+        response[header] = value
+    return response
 
 
 class MediaFilesMiddleware:
     """
     Middleware pour servir les fichiers média en production
     """
-    
+
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
-        # Vérifier si la requête concerne un fichier média
-        if request.path.startswith(settings.MEDIA_URL):
-            # Construire le chemin complet du fichier
-            file_path = request.path.replace(settings.MEDIA_URL, '', 1)
-            full_path = os.path.join(settings.MEDIA_ROOT, file_path)
-            
-            # Vérifier si le fichier existe
-            if os.path.exists(full_path) and os.path.isfile(full_path):
-                # Servir le fichier
-                return serve(request, file_path, document_root=settings.MEDIA_ROOT)
-            else:
-                # Fichier non trouvé
-                raise Http404("Fichier média non trouvé")
-        
+        # Vérifier si la requête concerne un fichier média (MEDIA_URL local uniquement)
+        media_url = settings.MEDIA_URL
+        if media_url.startswith('/') and request.path.startswith(media_url):
+            return serve_media(request, request.path[len(media_url):])
+
         # Continuer avec la requête normale
         return self.get_response(request)
@@ -38,11 +38,14 @@ INSTALLED_APPS = [
     'dashboard',
     'orders',
     'notifications',
+    'jobs',
 ]
 
 MIDDLEWARE = [
+    'config.instrumentation.RequestMetricsMiddleware',  # Requêtes SQL et durées (en-tête Server-Timing)
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Pour servir les fichiers statiques
+    'config.middleware.MediaFilesMiddleware',  # Fichiers média (avant sessions et authentification)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -55,7 +58,7 @@ ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'config.instrumentation.InstrumentedDjangoTemplates',  # DjangoTemplates chronométré
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -63,6 +66,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'notifications.context_processors.unread_notifications',  # Badge des notifications non lues
             ],
         },
     },
@@ -92,6 +96,86 @@ else:
     }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+# CACHE_BACKEND : 'locmem' (défaut, propre à chaque processus), 'file' ou 'db'
+# (partagés entre les workers gunicorn ; 'db' nécessite `manage.py createcachetable`),
+# 'redis' / 'memcached' (serveur partagé, CACHE_LOCATION = URL du serveur)
+# ou le chemin complet d'un backend Django.
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'articlo'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / '.cache')),
+    'db': ('django.core.cache.backends.db.DatabaseCache', 'articlo_cache'),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+    'memcached': ('django.core.cache.backends.memcached.PyMemcacheCache', '127.0.0.1:11211'),
+}
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+_cache_backend, _cache_location = CACHE_BACKENDS.get(CACHE_BACKEND, (CACHE_BACKEND, ''))
+
+CACHES = {
+    'default': {
+        'BACKEND': _cache_backend,
+        'LOCATION': config('CACHE_LOCATION', default=_cache_location),
+        'TIMEOUT': config('CACHE_TIMEOUT', default=300, cast=int),
+        'KEY_PREFIX': config('CACHE_KEY_PREFIX', default='articlo'),
+    }
+}
+
+# Durée de vie (secondes) des pages publiques mises en cache pour les visiteurs
+# anonymes ; 0 désactive le cache de pages
+PAGE_CACHE_TIMEOUT = config('PAGE_CACHE_TIMEOUT', default=600, cast=int)
+
+# Au-delà de ce nombre de vendeurs, le filtre par vendeur devient un champ à
+# saisie semi-automatique au lieu d'une liste déroulante
+SELLER_AUTOCOMPLETE_THRESHOLD = config('SELLER_AUTOCOMPLETE_THRESHOLD', default=200, cast=int)
+
+
+# Tâches en arrière-plan (app jobs) : exécutées par `python manage.py run_jobs`,
+# ou directement après le commit si JOBS_INLINE est activé (sans worker)
+JOBS_INLINE = config('JOBS_INLINE', default=False, cast=bool)
+
+# Dossier local où les images envoyées attendent leur traitement par le worker
+# (doit être partagé entre les processus web et le worker)
+IMAGE_STAGING_ROOT = config('IMAGE_STAGING_ROOT', default=BASE_DIR / '.uploads')
+
+# Notifications des administrateurs écrites par une tâche en arrière-plan plutôt
+# que pendant la requête du client (voir notifications/services.py)
+NOTIFICATIONS_DEFER_ADMIN_FANOUT = config('NOTIFICATIONS_DEFER_ADMIN_FANOUT', default=False, cast=bool)
+
+# Flux temps réel des notifications : servi par un processus ASGI séparé
+# (`uvicorn config.asgi:application`) à l'adresse NOTIFICATIONS_STREAM_URL ; vide :
+# même origine (sous WSGI, simple rattrapage périodique). NOTIFICATIONS_STREAM_ORIGINS :
+# origines du site autorisées à lire ce flux (CORS)
+NOTIFICATIONS_STREAM_URL = config('NOTIFICATIONS_STREAM_URL', default='')
+NOTIFICATIONS_STREAM_ORIGINS = config(
+    'NOTIFICATIONS_STREAM_ORIGINS', default='', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()]
+)
+
+# Résumés des administrateurs (python manage.py send_notification_digest, à planifier) :
+# les événements de commande sont journalisés avec NOTIFICATIONS_ADMIN_DIGEST ;
+# NOTIFICATIONS_ADMIN_FANOUT=False coupe la notification de chaque administrateur par
+# événement (voir notifications/digest.py)
+NOTIFICATIONS_ADMIN_DIGEST = config('NOTIFICATIONS_ADMIN_DIGEST', default=False, cast=bool)
+NOTIFICATIONS_ADMIN_FANOUT = config('NOTIFICATIONS_ADMIN_FANOUT', default=True, cast=bool)
+
+# Rétention (python manage.py compact_notifications) : les notifications lues depuis plus
+# de NOTIFICATIONS_RETENTION_DAYS jours sont supprimées, ou archivées (table
+# NotificationArchive) avec NOTIFICATIONS_ARCHIVE ; 0 conserve tout
+NOTIFICATIONS_RETENTION_DAYS = config('NOTIFICATIONS_RETENTION_DAYS', default=90, cast=int)
+NOTIFICATIONS_ARCHIVE = config('NOTIFICATIONS_ARCHIVE', default=False, cast=bool)
+
+
+# Mesures par requête (config/instrumentation.py) : en-tête Server-Timing et
+# logs JSON pour une fraction des requêtes (0 à 1) et pour les requêtes lentes.
+# L'en-tête (nombre de requêtes SQL, temps en base) est visible de tous les
+# visiteurs : par défaut seulement en développement (DEBUG)
+INSTRUMENTATION_ENABLED = config('INSTRUMENTATION_ENABLED', default=True, cast=bool)
+SERVER_TIMING_HEADER = config('SERVER_TIMING_HEADER', default=DEBUG, cast=bool)
+INSTRUMENTATION_SAMPLE_RATE = config('INSTRUMENTATION_SAMPLE_RATE', default=0.0, cast=float)
+SLOW_REQUEST_MS = config('SLOW_REQUEST_MS', default=500, cast=int)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -136,6 +220,14 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = config('MEDIA_URL', default='/media/')
 MEDIA_ROOT = config('MEDIA_ROOT', default=BASE_DIR / 'media')
 
+# Service des fichiers média (config/middleware.py)
+# Durée de cache navigateur des médias ; les noms contenant une empreinte du contenu sont immuables
+MEDIA_CACHE_MAX_AGE = config('MEDIA_CACHE_MAX_AGE', default=3600, cast=int)
+# Délégation de l'envoi au serveur frontal : '' (désactivé), 'X-Sendfile' (Apache, lighttpd)
+# ou 'X-Accel-Redirect' (nginx, avec un emplacement `internal` sur MEDIA_ACCEL_REDIRECT_PREFIX)
+MEDIA_SENDFILE_HEADER = config('MEDIA_SENDFILE_HEADER', default='')
+MEDIA_ACCEL_REDIRECT_PREFIX = config('MEDIA_ACCEL_REDIRECT_PREFIX', default='/protected-media/')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -191,5 +283,10 @@ if not DEBUG:
                 'level': config('DJANGO_LOG_LEVEL', default='INFO'),
                 'propagate': False,
             },
+            'config.instrumentation': {
+                'handlers': ['console'],
+                'level': 'INFO',
+                'propagate': False,
+            },
         },
     }
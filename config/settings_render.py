@@ -33,6 +33,7 @@ INSTALLED_APPS = [
     'dashboard',
     'orders',
     'notifications',
+    'jobs',
 ]
 
 # Activer Cloudinary si la variable est configurée
@@ -54,22 +55,23 @@ if os.environ.get('CLOUDINARY_URL'):
         pass
 
 MIDDLEWARE = [
+    'config.instrumentation.RequestMetricsMiddleware',  # Requêtes SQL et durées (en-tête Server-Timing)
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'config.middleware.MediaFilesMiddleware',  # Fichiers média (avant sessions et authentification)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'config.middleware.MediaFilesMiddleware',  # Middleware pour les fichiers média
 ]
 
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'config.instrumentation.InstrumentedDjangoTemplates',  # DjangoTemplates chronométré
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -78,6 +80,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'notifications.context_processors.unread_notifications',  # Badge des notifications non lues
             ],
         },
     },
@@ -100,6 +103,63 @@ else:
         }
     }
 
+# Cache partagé entre les workers gunicorn (table créée par `createcachetable`)
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'articlo_cache'),
+        'TIMEOUT': int(os.environ.get('CACHE_TIMEOUT', '300')),
+        'KEY_PREFIX': 'articlo',
+    }
+}
+PAGE_CACHE_TIMEOUT = int(os.environ.get('PAGE_CACHE_TIMEOUT', '600'))
+
+# Au-delà de ce nombre de vendeurs, le filtre par vendeur devient un champ à
+# saisie semi-automatique au lieu d'une liste déroulante
+SELLER_AUTOCOMPLETE_THRESHOLD = int(os.environ.get('SELLER_AUTOCOMPLETE_THRESHOLD', '200'))
+
+# Tâches en arrière-plan : le worker tourne dans le même conteneur que gunicorn
+# (start.sh, Procfile), car les images en attente sont sur son disque local
+JOBS_INLINE = os.environ.get('JOBS_INLINE', 'False').lower() == 'true'
+IMAGE_STAGING_ROOT = BASE_DIR / '.uploads'
+NOTIFICATIONS_DEFER_ADMIN_FANOUT = os.environ.get('NOTIFICATIONS_DEFER_ADMIN_FANOUT', 'True').lower() == 'true'
+# Flux temps réel servi par le service articlo-stream (render.yaml), origine du site autorisée
+NOTIFICATIONS_STREAM_URL = os.environ.get('NOTIFICATIONS_STREAM_URL', '')
+NOTIFICATIONS_STREAM_ORIGINS = [
+    origin for origin in os.environ.get('NOTIFICATIONS_STREAM_ORIGINS', '').split(',') if origin
+]
+# Résumés toutes les 15 minutes (service cron de render.yaml) au lieu d'une notification par événement
+NOTIFICATIONS_ADMIN_DIGEST = os.environ.get('NOTIFICATIONS_ADMIN_DIGEST', 'True').lower() == 'true'
+NOTIFICATIONS_ADMIN_FANOUT = os.environ.get('NOTIFICATIONS_ADMIN_FANOUT', 'False').lower() == 'true'
+NOTIFICATIONS_RETENTION_DAYS = int(os.environ.get('NOTIFICATIONS_RETENTION_DAYS', '90'))
+NOTIFICATIONS_ARCHIVE = os.environ.get('NOTIFICATIONS_ARCHIVE', 'False').lower() == 'true'
+
+
+# Mesures par requête : Server-Timing, logs JSON échantillonnés et requêtes lentes
+INSTRUMENTATION_ENABLED = os.environ.get('INSTRUMENTATION_ENABLED', 'True').lower() == 'true'
+# En-tête Server-Timing visible de tous les visiteurs : à n'activer que le temps d'une mesure
+SERVER_TIMING_HEADER = os.environ.get('SERVER_TIMING_HEADER', 'False').lower() == 'true'
+INSTRUMENTATION_SAMPLE_RATE = float(os.environ.get('INSTRUMENTATION_SAMPLE_RATE', '0.05'))
+SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', '500'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'config.instrumentation': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -131,6 +191,11 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Service des fichiers média (config/middleware.py)
+MEDIA_CACHE_MAX_AGE = int(os.environ.get('MEDIA_CACHE_MAX_AGE', '3600'))
+MEDIA_SENDFILE_HEADER = os.environ.get('MEDIA_SENDFILE_HEADER', '')
+MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get('MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+
 # Configuration pour servir les fichiers média en production
 if not DEBUG:
     # Utiliser WhiteNoise pour les fichiers statiques
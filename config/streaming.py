@@ -0,0 +1,70 @@
+"""
+Service ASGI des flux Server-Sent Events (notifications/stream.py).
+
+Le reste de l'application est servi en WSGI (config/wsgi.py) : le
+gestionnaire ASGI de Django 4.2 lit en entier les réponses à itérateur
+synchrone (fichiers de /media/, statiques de WhiteNoise). Le processus ASGI
+ne sert donc que les flux ; les autres requêtes reçoivent une 404.
+
+Ces réponses restent ouvertes de longues minutes ; `StreamingASGIHandler`
+(point d'entrée de config/asgi.py) sert les requêtes `Accept: text/event-stream` :
+- sans pool de threads propre à la requête : Django en crée un par requête
+  (ThreadSensitiveContext) et le garde jusqu'à la fin de la réponse, soit un
+  thread inactif par connexion ouverte. Le code synchrone de ces requêtes
+  (middlewares, session) passe par le thread partagé du processus ;
+- en signalant la déconnexion du client (scope[DISCONNECTED]) : Django 4.2
+  ne lit plus les messages du serveur une fois le corps de la requête lu.
+"""
+
+import asyncio
+
+from django.core.handlers.asgi import ASGIHandler
+
+DISCONNECTED = 'articlo.disconnected'
+
+NOT_SERVED = "Service des flux de notifications : l'application est servie par config.wsgi.".encode()
+
+
+def is_event_stream(scope):
+    return scope['type'] == 'http' and any(
+        name == b'accept' and b'text/event-stream' in value for name, value in scope['headers']
+    )
+
+
+class StreamingASGIHandler(ASGIHandler):
+    """ASGIHandler de Django limité aux flux d'événements"""
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await super().__call__(scope, receive, send)
+        if not is_event_stream(scope):
+            await send({
+                'type': 'http.response.start', 'status': 404,
+                'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+            })
+            await send({'type': 'http.response.body', 'body': NOT_SERVED})
+            return
+
+        disconnected = asyncio.get_running_loop().create_future()
+        watcher = None
+
+        async def watch():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            disconnected.set_result(True)
+
+        async def read_body(*args):
+            # Corps lu par Django ; la suite des messages est suivie par `watch`
+            nonlocal watcher
+            message = await receive(*args)
+            if message['type'] == 'http.disconnect':
+                disconnected.set_result(True)
+            elif not message.get('more_body') and watcher is None:
+                watcher = asyncio.create_task(watch())
+            return message
+
+        try:
+            await self.handle({**scope, DISCONNECTED: disconnected}, read_body, send)
+        finally:
+            if watcher is not None:
+                watcher.cancel()
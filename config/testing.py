@@ -0,0 +1,52 @@
+"""
+Outils partagés par les tests des applications.
+
+`QueryBudgetMixin.assertQueryBudget` appelle une vue et échoue si elle
+exécute plus de requêtes SQL que son budget, si une même requête est répétée
+(N+1) ou si le nombre de requêtes augmente avec le volume de données.
+"""
+
+from collections import Counter
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+
+
+class QueryBudgetMixin:
+    """À combiner avec TestCase"""
+
+    def _count_queries(self, url, user, method, data):
+        client = self.client_class()
+        if user is not None:
+            client.force_login(user)
+        with override_settings(PAGE_CACHE_TIMEOUT=0):
+            if method == 'get':
+                # Requête préalable non comptée : caches applicatifs (liste des vendeurs...) remplis
+                getattr(client, method)(url, data or {})
+            with CaptureQueriesContext(connection) as captured:
+                response = getattr(client, method)(url, data or {})
+        return response, [query['sql'] for query in captured.captured_queries]
+
+    def assertQueryBudget(self, budget, url, user=None, method='get', data=None, grow=None):
+        """
+        Vérifie que la vue reste dans son budget de requêtes. `grow()` ajoute des
+        données affichées par la vue : le nombre de requêtes doit rester le même
+        après coup (indépendant du nombre de lignes et de la taille de page).
+        """
+        response, queries = self._count_queries(url, user, method, data)
+        self.assertLess(response.status_code, 400, f'{url} : statut {response.status_code}')
+        self.assertLessEqual(
+            len(queries), budget,
+            f'{url} : {len(queries)} requêtes pour un budget de {budget}\n' + '\n'.join(queries),
+        )
+        repeated = {sql: count for sql, count in Counter(queries).items() if count > 1}
+        self.assertFalse(repeated, f'{url} : requêtes répétées (N+1) {repeated}')
+
+        if grow is not None:
+            grow()
+            _, more_queries = self._count_queries(url, user, method, data)
+            self.assertEqual(
+                len(more_queries), len(queries),
+                f'{url} : le nombre de requêtes dépend du volume de données\n' + '\n'.join(more_queries),
+            )
+        return response
@@ -0,0 +1,133 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.db import connection
+from django.http import Http404
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .instrumentation import RequestMetrics
+from .middleware import IMMUTABLE_CACHE_CONTROL, serve_media
+
+
+class MediaServingTests(SimpleTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_SENDFILE_HEADER='')
+        override.enable()
+        self.addCleanup(override.disable)
+        os.makedirs(os.path.join(self.media_root, 'articles'))
+        with open(os.path.join(self.media_root, 'articles', 'photo.jpg'), 'wb') as file:
+            file.write(b'0123456789')
+        self.factory = RequestFactory()
+
+    def get(self, path='articles/photo.jpg', **headers):
+        response = serve_media(self.factory.get(f'/media/{path}', **headers), path)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        if hasattr(response, 'close'):
+            response.close()
+        return response, body
+
+    def test_full_response_has_validators(self):
+        response, body = self.get()
+        self.assertEqual(body, b'0123456789')
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', response)
+
+    def test_conditional_get_returns_304(self):
+        response, _ = self.get()
+        not_modified, body = self.get(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(body, b'')
+        not_modified, _ = self.get(HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_byte_ranges(self):
+        cases = [
+            ('bytes=2-5', 206, b'2345', 'bytes 2-5/10'),
+            ('bytes=7-', 206, b'789', 'bytes 7-9/10'),
+            ('bytes=-3', 206, b'789', 'bytes 7-9/10'),
+            ('bytes=20-', 416, b'', 'bytes */10'),
+        ]
+        for header, status, body, content_range in cases:
+            with self.subTest(header=header):
+                response, content = self.get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, status)
+                self.assertEqual(content, body)
+                self.assertEqual(response['Content-Range'], content_range)
+
+        # Début après la fin : en-tête ignoré, fichier entier
+        response, content = self.get(HTTP_RANGE='bytes=5-2')
+        self.assertEqual((response.status_code, content), (200, b'0123456789'))
+        self.assertFalse(response.has_header('Content-Range'))
+        response, _ = self.get(HTTP_RANGE='bytes=20-30')
+        self.assertEqual(response.status_code, 416)
+
+        # Fichier vide : aucun suffixe satisfaisable
+        open(os.path.join(self.media_root, 'articles', 'vide.jpg'), 'wb').close()
+        response, content = self.get('articles/vide.jpg', HTTP_RANGE='bytes=-3')
+        self.assertEqual((response.status_code, content), (416, b''))
+        self.assertEqual(response['Content-Range'], 'bytes */0')
+
+        # If-Range périmé : fichier entier
+        response, content = self.get(HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE='"autre"')
+        self.assertEqual((response.status_code, content), (200, b'0123456789'))
+
+    def test_cache_control_and_sendfile_offload(self):
+        with open(os.path.join(self.media_root, 'articles', '3f9a0c1d2e4b5a67.jpg'), 'wb') as file:
+            file.write(b'x')
+        response, _ = self.get('articles/3f9a0c1d2e4b5a67.jpg')
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        response, _ = self.get()
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+        with self.settings(MEDIA_SENDFILE_HEADER='X-Accel-Redirect'):
+            response, body = self.get()
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/articles/photo.jpg')
+        self.assertEqual(body, b'')
+
+    def test_missing_directories_and_traversal_are_404(self):
+        for path in ['articles/absent.jpg', 'articles', '../settings.py']:
+            with self.subTest(path=path), self.assertRaises(Http404):
+                self.get(path)
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0, INSTRUMENTATION_SAMPLE_RATE=0, SLOW_REQUEST_MS=60000, SERVER_TIMING_HEADER=True)
+class RequestMetricsTests(TestCase):
+    def test_server_timing_header(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse('home'))
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn(f'desc="{len(captured.captured_queries)} queries"', timing)
+        self.assertIn('tpl;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+        with override_settings(SERVER_TIMING_HEADER=False):
+            self.assertNotIn('Server-Timing', self.client.get(reverse('home')))
+
+    def test_duplicate_queries_are_counted(self):
+        metrics = RequestMetrics()
+        execute = lambda sql, params, many, context: None  # noqa: E731
+        for pk in range(3):
+            metrics(execute, 'SELECT * FROM users_user WHERE id = %s', [pk], False, {})
+        metrics(execute, 'SELECT 1', [], False, {})
+        self.assertEqual(metrics.queries, 4)
+        self.assertEqual(metrics.duplicates, 2)
+        self.assertEqual(metrics.most_repeated(), ('SELECT * FROM users_user WHERE id = %s', 3))
+        self.assertIn('dup;desc="2 duplicate queries"', metrics.server_timing(0.01))
+
+    @override_settings(SLOW_REQUEST_MS=0)
+    def test_slow_requests_are_logged(self):
+        with self.assertLogs('config.instrumentation', 'WARNING') as logs:
+            self.client.get(reverse('home'))
+        record = json.loads(logs.records[0].getMessage().split(' ', 1)[1])
+        self.assertEqual(record['view'], 'home')
+        self.assertTrue(record['slow'])
+        self.assertGreater(record['queries'], 0)
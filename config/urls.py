@@ -16,21 +16,15 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from django.conf import settings
-from django.conf.urls.static import static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('users.urls')),  # URLs d'authentification
     path('articles/', include('articles.urls')),  # URLs des articles
     path('orders/', include('orders.urls')),  # URLs des commandes
+    path('notifications/', include('notifications.urls')),  # Flux temps réel des notifications
     path('', include('dashboard.urls')),
 ]
 
-# Serve media files in development
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-
-# Serve media files in production (Render)
-if not settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Les fichiers média sont servis par config.middleware.MediaFilesMiddleware
+# (ETag, 304, plages d'octets, X-Sendfile) en développement comme en production
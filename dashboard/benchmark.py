@@ -0,0 +1,368 @@
+"""
+Banc d'essai HTTP des pages les plus sollicitées.
+
+Chaque scénario (accueil avec chaque combinaison de filtres, fiche article,
+commande, tableau de bord vendeur, pages d'administration) est joué
+plusieurs fois :
+- soit en processus avec le client de test de Django : latence, nombre de
+  requêtes SQL et temps passé en base par requête HTTP ;
+- soit en HTTP contre un serveur réel (gunicorn lancé pour l'occasion ou
+  URL existante), avec plusieurs connexions en parallèle ; requêtes SQL et
+  temps en base sont alors lus dans l'en-tête Server-Timing (activé pour le
+  gunicorn lancé ; SERVER_TIMING_HEADER pour un serveur existant).
+
+Le rapport JSON donne par scénario les percentiles p50/p95/p99, le débit et
+les requêtes SQL ; `compare` le confronte à un rapport de référence et
+signale les régressions.
+
+Utilisé par `python manage.py benchmark` (données : `generate_data`).
+"""
+
+import fnmatch
+import http.client
+import itertools
+import os
+import secrets
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from articles.models import Article
+from orders import placement
+
+# Filtres du catalogue combinés deux à deux, trois à trois... (le vendeur est ajouté à l'exécution)
+HOME_FILTERS = {'search': 'lampe', 'price_range': '100-250', 'sort_by': 'price'}
+
+ORDER_DATA = {
+    'client_name': 'Client Benchmark',
+    'client_phone': '0700000000',
+    'client_email': 'benchmark@example.com',
+    'message': 'Commande de test de charge',
+}
+
+
+def order_data(article):
+    """Données d'une nouvelle commande avec un jeton neuf (un jeton déjà envoyé ne créerait rien)"""
+    return dict(ORDER_DATA, submission_token=placement.issue(article))
+
+
+# Régression : p95 plus lent de `threshold` (relatif) et d'au moins MIN_DELTA_MS
+DEFAULT_THRESHOLD = 0.2
+MIN_DELTA_MS = 2.0
+
+
+def home_scenarios(seller):
+    filters = dict(HOME_FILTERS)
+    if seller is not None:
+        filters['seller'] = seller.pk
+    home = reverse('home')
+    items = []
+    for size in range(len(filters) + 1):
+        for keys in itertools.combinations(sorted(filters), size):
+            name = 'home[' + '+'.join(keys) + ']' if keys else 'home'
+            items.append({'name': name, 'url': home, 'params': {key: filters[key] for key in keys}})
+    items.append({'name': 'home[page=20]', 'url': home, 'params': {'page': 20}})
+    return items
+
+
+def scenarios(seller, admin):
+    """
+    Scénarios : nom, méthode, URL, paramètres GET ou données POST (ou fonction
+    les produisant à chaque requête), utilisateur connecté
+    """
+    items = home_scenarios(seller)
+    items += [
+        {'name': f'suggest[{query}]', 'url': reverse('articles:suggest'), 'params': {'q': query}}
+        for query in ('la', 'lampe')
+    ]
+    article = Article.objects.filter(seller=seller).order_by('-id').first() if seller else None
+    if article:
+        items += [
+            {'name': 'article_detail', 'url': reverse('articles:detail', args=[article.pk])},
+            {'name': 'order_article', 'method': 'POST', 'data': lambda: order_data(article),
+             'url': reverse('orders:order_article', args=[article.pk]), 'expect': (302,)},
+        ]
+    if seller:
+        items += [
+            {'name': 'seller_dashboard', 'url': reverse('seller_dashboard'), 'user': seller},
+            {'name': 'seller_articles_panel', 'url': reverse('seller_articles_panel'), 'user': seller},
+            {'name': 'seller_orders_panel', 'url': reverse('seller_orders_panel'), 'user': seller},
+            {'name': 'seller_orders_panel[status]', 'url': reverse('seller_orders_panel'), 'user': seller,
+             'params': {'status': 'pending'}},
+        ]
+    if admin:
+        items += [
+            {'name': name, 'url': reverse(url_name), 'user': admin, 'params': params}
+            for name, url_name, params in (
+                ('admin_dashboard', 'admin_dashboard', {}),
+                ('admin_users', 'admin_users', {}),
+                ('admin_articles', 'admin_articles', {}),
+                ('admin_orders', 'admin_orders', {}),
+                ('admin_orders[status]', 'admin_orders', {'status': 'pending'}),
+                ('admin_notifications', 'admin_notifications', {}),
+            )
+        ]
+    for item in items:
+        item.setdefault('method', 'GET')
+        item.setdefault('params', {})
+        item.setdefault('user', None)
+        item.setdefault('expect', (200,))
+    return items
+
+
+def select(items, patterns):
+    """Scénarios nommés ou correspondant à l'un des motifs (ex: 'home*', 'admin_*')"""
+    if not patterns:
+        return items
+    return [
+        item for item in items
+        if any(item['name'] == pattern or fnmatch.fnmatchcase(item['name'], pattern) for pattern in patterns)
+    ]
+
+
+def summarize(latencies, elapsed, errors, queries=None, db_times=None):
+    """Percentiles (ms), débit (requêtes/s), requêtes SQL et temps en base moyens"""
+    ordered = sorted(latencies)
+    if len(ordered) > 1:
+        cuts = statistics.quantiles(ordered, n=100, method='inclusive')
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = ordered[0] if ordered else 0.0
+    result = {
+        'requests': len(ordered),
+        'errors': errors,
+        'p50_ms': round(p50 * 1000, 3),
+        'p95_ms': round(p95 * 1000, 3),
+        'p99_ms': round(p99 * 1000, 3),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3) if ordered else 0.0,
+        'max_ms': round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        'throughput_rps': round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+    }
+    if queries is not None:
+        result['queries'] = round(statistics.fmean(queries), 2) if queries else 0.0
+        result['db_ms'] = round(statistics.fmean(db_times) * 1000, 3) if db_times else 0.0
+    return result
+
+
+# Client de test (en processus)
+
+def run_client(scenario, iterations, warmup):
+    client = Client()
+    if scenario['user'] is not None:
+        client.force_login(scenario['user'])
+    method = scenario['method'].lower()
+
+    def payload():
+        if scenario['method'] != 'POST':
+            return scenario['params']
+        return scenario['data']() if callable(scenario['data']) else scenario['data']
+
+    for _ in range(warmup):
+        getattr(client, method)(scenario['url'], payload())
+
+    latencies, queries, db_times, errors = [], [], [], 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        data = payload()
+        with CaptureQueriesContext(connection) as captured:
+            begin = time.perf_counter()
+            response = getattr(client, method)(scenario['url'], data)
+            latencies.append(time.perf_counter() - begin)
+        errors += response.status_code not in scenario['expect']
+        queries.append(len(captured.captured_queries))
+        db_times.append(sum(float(query['time']) for query in captured.captured_queries))
+    return summarize(latencies, time.perf_counter() - started, errors, queries, db_times)
+
+
+# Serveur HTTP réel
+
+def session_cookies(user):
+    """Cookies d'une session ouverte pour `user` (sessions en base, partagées avec le serveur)"""
+    cookies = {settings.CSRF_COOKIE_NAME: secrets.token_hex(16)}
+    if user is not None:
+        client = Client()
+        client.force_login(user)
+        cookies[settings.SESSION_COOKIE_NAME] = client.cookies[settings.SESSION_COOKIE_NAME].value
+    return cookies
+
+
+def run_http(scenario, base_url, iterations, warmup, concurrency):
+    target = urlsplit(base_url)
+    cookies = session_cookies(scenario['user'])
+    headers = {
+        'Cookie': '; '.join(f'{name}={value}' for name, value in cookies.items()),
+        'Host': target.netloc,
+    }
+    path = target.path.rstrip('/') + scenario['url']
+    body = None
+    if scenario['method'] == 'POST':
+        data = scenario['data']
+        body = (lambda: urlencode(data())) if callable(data) else urlencode(data)
+        headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        headers['X-CSRFToken'] = cookies[settings.CSRF_COOKIE_NAME]
+    elif scenario['params']:
+        path += '?' + urlencode(scenario['params'])
+
+    local = threading.local()
+    connection_class = http.client.HTTPSConnection if target.scheme == 'https' else http.client.HTTPConnection
+
+    def request(_):
+        # Une connexion persistante par thread
+        if getattr(local, 'connection', None) is None:
+            local.connection = connection_class(target.hostname, target.port, timeout=30)
+        begin = time.perf_counter()
+        timing = {}
+        try:
+            local.connection.request(scenario['method'], path, body=body() if callable(body) else body, headers=headers)
+            response = local.connection.getresponse()
+            response.read()
+            status = response.status
+            timing = parse_server_timing(response.getheader('Server-Timing', ''))
+        except (OSError, http.client.HTTPException):
+            local.connection.close()
+            local.connection = None
+            status = None
+        return time.perf_counter() - begin, status, timing
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(request, range(warmup)))
+        started = time.perf_counter()
+        results = list(pool.map(request, range(iterations)))
+        elapsed = time.perf_counter() - started
+    errors = sum(status not in scenario['expect'] for _, status, _ in results)
+    # Requêtes SQL et temps en base annoncés par le serveur (config/instrumentation.py)
+    timings = [timing['db'] for _, _, timing in results if 'db' in timing]
+    queries = [int(db['desc'].split()[0]) for db in timings if db.get('desc', '').split(' ')[0].isdigit()]
+    db_times = [db['dur'] / 1000 for db in timings if 'dur' in db]
+    return summarize(
+        [latency for latency, _, _ in results], elapsed, errors,
+        queries if timings else None, db_times if timings else None,
+    )
+
+
+def parse_server_timing(value):
+    """'db;dur=1.5;desc="3 queries", total;dur=9' -> {'db': {'dur': 1.5, 'desc': '3 queries'}, ...}"""
+    metrics = {}
+    for entry in filter(None, (part.strip() for part in value.split(','))):
+        name, *params = [item.strip() for item in entry.split(';')]
+        metric = {}
+        for param in params:
+            key, _, raw = param.partition('=')
+            raw = raw.strip('"')
+            if key == 'dur':
+                try:
+                    metric['dur'] = float(raw)
+                except ValueError:
+                    continue
+            else:
+                metric[key] = raw
+        metrics[name] = metric
+    return metrics
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def http_server(command, name, timeout=30, env=None):
+    """
+    Lance un serveur (`command` reçoit le port, `env` complète l'environnement)
+    le temps de la mesure ; produit son URL et l'identifiant de son processus.
+    """
+    port = free_port()
+    process = subprocess.Popen(command(port), cwd=settings.BASE_DIR, env={**os.environ, **(env or {})})
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f'{name} s\'est arrêté au démarrage')
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f'{name} ne répond pas')
+                time.sleep(0.2)
+        yield f'http://127.0.0.1:{port}', process.pid
+    finally:
+        process.terminate()
+        process.wait(timeout=timeout)
+
+
+@contextmanager
+def gunicorn_server(workers=2, threads=1, timeout=30):
+    """Lance gunicorn sur un port libre le temps du banc d'essai ; produit son URL"""
+    with http_server(lambda port: [
+        sys.executable, '-m', 'gunicorn', 'config.wsgi:application',
+        '--bind', f'127.0.0.1:{port}', '--workers', str(workers), '--threads', str(threads),
+        '--log-level', 'warning',
+    # Requêtes SQL et temps en base lus dans l'en-tête Server-Timing
+    ], 'gunicorn', timeout, env={'SERVER_TIMING_HEADER': 'True'}) as (url, _pid):
+        yield url
+
+
+def run(items, iterations=50, warmup=5, base_url=None, concurrency=1, page_cache=False, log=print):
+    """
+    Joue les scénarios et retourne le rapport. Sans `base_url`, le client de test
+    est utilisé (et le cache de pages désactivé sauf `page_cache`).
+    """
+    mode = 'http' if base_url else 'client'
+    report = {
+        'meta': {
+            'mode': mode,
+            'iterations': iterations,
+            'concurrency': concurrency if base_url else 1,
+            'page_cache': page_cache if not base_url else None,
+            'database': connection.vendor,
+            'created_at': timezone.now().isoformat(),
+        },
+        'scenarios': {},
+    }
+    overrides = {'ALLOWED_HOSTS': ['*']}
+    if not page_cache:
+        overrides['PAGE_CACHE_TIMEOUT'] = 0
+    with override_settings(**overrides) if mode == 'client' else nullcontext():
+        for scenario in items:
+            if mode == 'client':
+                result = run_client(scenario, iterations, warmup)
+            else:
+                result = run_http(scenario, base_url, iterations, warmup, concurrency)
+            report['scenarios'][scenario['name']] = result
+            log(scenario['name'], result)
+    return report
+
+
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Régressions par rapport à la référence : p95 plus lent au-delà du seuil,
+    requêtes SQL plus nombreuses, ou erreurs apparues.
+    """
+    regressions = []
+    for name, current in report['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if previous is None:
+            continue
+        delta = current['p95_ms'] - previous['p95_ms']
+        if delta > MIN_DELTA_MS and current['p95_ms'] > previous['p95_ms'] * (1 + threshold):
+            regressions.append(f"{name} : p95 {previous['p95_ms']:.1f} -> {current['p95_ms']:.1f} ms")
+        if 'queries' in current and 'queries' in previous and current['queries'] > previous['queries']:
+            regressions.append(f"{name} : {previous['queries']:g} -> {current['queries']:g} requête(s) SQL")
+        if current['errors'] > previous['errors']:
+            regressions.append(f"{name} : {previous['errors']} -> {current['errors']} erreur(s)")
+    return regressions
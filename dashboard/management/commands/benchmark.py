@@ -0,0 +1,89 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard import benchmark
+from dashboard.query_plans import representative_users
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure la latence (p50/p95/p99), le débit et les requêtes SQL des pages les plus "
+        "sollicitées, avec le client de test ou contre un serveur HTTP réel"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help='Requêtes mesurées par scénario')
+        parser.add_argument('--warmup', type=int, default=5, help='Requêtes de chauffe par scénario')
+        parser.add_argument('--only', action='append', default=[], metavar='MOTIF',
+                            help="Scénarios à jouer (motif, ex: 'home*'), répétable")
+        parser.add_argument('--list', action='store_true', help='Lister les scénarios sans les jouer')
+        parser.add_argument('--page-cache', action='store_true',
+                            help='Garder le cache des pages anonymes (client de test)')
+
+        server = parser.add_mutually_exclusive_group()
+        server.add_argument('--url', help='Serveur HTTP déjà lancé (ex: http://127.0.0.1:8000)')
+        server.add_argument('--gunicorn', action='store_true', help='Lancer gunicorn pour la mesure')
+        parser.add_argument('--gunicorn-workers', type=int, default=2)
+        parser.add_argument('--concurrency', type=int, default=4, help='Connexions parallèles (mode HTTP)')
+
+        parser.add_argument('--output', help='Écrire le rapport JSON dans ce fichier (ex: nouvelle référence)')
+        parser.add_argument('--compare', metavar='REFERENCE', help='Rapport JSON de référence')
+        parser.add_argument('--threshold', type=float, default=benchmark.DEFAULT_THRESHOLD,
+                            help='Ralentissement relatif du p95 toléré (défaut : 0.2)')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as file:
+                    baseline = json.load(file)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f'Référence illisible : {exc}')
+
+        seller, admin = representative_users()
+        items = benchmark.select(benchmark.scenarios(seller, admin), options['only'])
+        if not items:
+            raise CommandError('Aucun scénario ne correspond ; lancez `generate_data` pour créer des données')
+        if options['list']:
+            for item in items:
+                self.stdout.write(f"{item['name']:<40} {item['method']} {item['url']}")
+            return
+
+        def log(name, result):
+            line = (
+                f"{name:<40} p50 {result['p50_ms']:8.2f}  p95 {result['p95_ms']:8.2f}  "
+                f"p99 {result['p99_ms']:8.2f} ms  {result['throughput_rps']:8.1f} req/s"
+            )
+            if 'queries' in result:
+                line += f"  {result['queries']:5.1f} SQL ({result['db_ms']:.2f} ms)"
+            if result['errors']:
+                line += self.style.ERROR(f"  {result['errors']} erreur(s)")
+            self.stdout.write(line)
+
+        run_options = {
+            'iterations': options['iterations'], 'warmup': options['warmup'],
+            'concurrency': options['concurrency'], 'page_cache': options['page_cache'], 'log': log,
+        }
+        if options['gunicorn']:
+            try:
+                with benchmark.gunicorn_server(workers=options['gunicorn_workers']) as url:
+                    report = benchmark.run(items, base_url=url, **run_options)
+            except RuntimeError as exc:
+                raise CommandError(exc)
+            report['meta']['server'] = f"gunicorn ({options['gunicorn_workers']} workers)"
+        else:
+            report = benchmark.run(items, base_url=options['url'], **run_options)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, indent=2, ensure_ascii=False)
+            self.stdout.write(f"Rapport écrit dans {options['output']}")
+
+        if baseline is not None:
+            regressions = benchmark.compare(report, baseline, options['threshold'])
+            for regression in regressions:
+                self.stderr.write(self.style.ERROR(f'Régression : {regression}'))
+            if regressions:
+                raise SystemExit(1)
+            self.stdout.write(self.style.SUCCESS('Aucune régression par rapport à la référence.'))
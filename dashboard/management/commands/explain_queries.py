@@ -0,0 +1,61 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.query_plans import explain_views, representative_users
+from dashboard.synthetic import generate
+
+
+class Command(BaseCommand):
+    help = (
+        "Lance EXPLAIN sur les requêtes SQL de chaque vue (catalogue, dashboards, admin) "
+        "et signale les parcours complets et les tris non servis par un index"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Générer d\'abord N articles, commandes et notifications '
+                                 '(voir generate_data pour régler les distributions)')
+        parser.add_argument('--analyze', action='store_true', help='EXPLAIN ANALYZE (PostgreSQL)')
+        parser.add_argument('--json', action='store_true', help='Rapport complet au format JSON')
+        parser.add_argument('--fail-on-full-scan', action='store_true',
+                            help='Code de sortie non nul si une grande table est parcourue entièrement')
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            rows = options['seed']
+            try:
+                generate(log=self.stdout.write, articles=rows, orders=rows, notifications=rows,
+                         sellers=max(10, rows // 1000), clients=max(10, rows // 100))
+            except ValueError as exc:
+                raise CommandError(exc)
+
+        seller, admin = representative_users()
+        if admin is None:
+            self.stderr.write('Aucun administrateur : les vues admin ne sont pas analysées.')
+
+        report = explain_views(seller, admin, analyze=options['analyze'])
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2, ensure_ascii=False))
+
+        full_scans = 0
+        for view in report:
+            if not options['json']:
+                self.stdout.write(self.style.MIGRATE_HEADING(f"{view['view']} ({view['status']})"))
+            for query in view['queries']:
+                full_scans += bool(query['full_scans'])
+                if options['json']:
+                    continue
+                flags = []
+                if query['full_scans']:
+                    flags.append(self.style.ERROR(f"parcours complet : {', '.join(query['full_scans'])}"))
+                if query['sorts']:
+                    flags.append(self.style.WARNING('tri'))
+                indexes = ', '.join(query['indexes']) or '-'
+                self.stdout.write(f"  index : {indexes}  {' '.join(flags)}")
+                self.stdout.write(f"    {query['sql'][:160]}")
+
+        summary = f'{len(report)} vue(s) analysée(s), {full_scans} requête(s) avec parcours complet.'
+        self.stderr.write(summary) if options['json'] else self.stdout.write(summary)
+        if options['fail_on_full_scan'] and full_scans:
+            raise SystemExit(1)
@@ -0,0 +1,68 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.synthetic import DEFAULTS, generate, parse_status_mix
+
+
+class Command(BaseCommand):
+    help = (
+        "Génère un jeu de données synthétique (utilisateurs, articles avec images, commandes, "
+        "notifications) pour les tests de charge. Ex: --articles 1000000 --orders 2000000"
+    )
+
+    def add_arguments(self, parser):
+        counts = parser.add_argument_group('volumes')
+        for name, help_text in (
+            ('admins', 'Administrateurs'), ('sellers', 'Vendeurs'), ('clients', 'Clients'),
+            ('articles', 'Articles'), ('orders', 'Commandes'), ('notifications', 'Notifications'),
+        ):
+            counts.add_argument(f'--{name}', type=int, default=DEFAULTS[name],
+                                help=f'{help_text} (défaut : {DEFAULTS[name]})')
+
+        distributions = parser.add_argument_group('distributions')
+        distributions.add_argument('--seller-skew', type=float, default=DEFAULTS['seller_skew'],
+                                   help='Exposant de Zipf de la popularité des vendeurs (0 = uniforme)')
+        distributions.add_argument('--price-median', type=float, default=DEFAULTS['price_median'],
+                                   help='Prix médian (loi log-normale)')
+        distributions.add_argument('--price-sigma', type=float, default=DEFAULTS['price_sigma'],
+                                   help='Dispersion des prix (écart type du logarithme)')
+        distributions.add_argument('--status-mix', default='pending=20,confirmed=70,cancelled=10',
+                                   help='Poids des statuts de commande')
+        distributions.add_argument('--days', type=int, default=DEFAULTS['days'],
+                                   help='Période couverte par les dates, en jours')
+        distributions.add_argument('--recency', type=float, default=DEFAULTS['recency'],
+                                   help='Concentration des dates vers aujourd\'hui (1 = uniforme)')
+        distributions.add_argument('--image-ratio', type=float, default=DEFAULTS['image_ratio'],
+                                   help='Part des articles avec image')
+        distributions.add_argument('--placeholders', type=int, default=DEFAULTS['placeholders'],
+                                   help="Nombre d'images de remplacement distinctes")
+        distributions.add_argument('--read-ratio', type=float, default=DEFAULTS['read_ratio'],
+                                   help='Part des notifications lues')
+
+        parser.add_argument('--seed', type=int, default=DEFAULTS['seed'], help='Graine aléatoire')
+        parser.add_argument('--prefix', help='Préfixe des noms d\'utilisateur (défaut : gen<graine>_)')
+        parser.add_argument('--password', default=DEFAULTS['password'], help='Mot de passe de tous les comptes')
+        parser.add_argument('--workers', type=int,
+                            help='Processus parallèles (défaut : 1 sous SQLite, nombre de CPU sinon)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULTS['batch_size'],
+                            help='Lignes par requête INSERT')
+
+    def handle(self, *args, **options):
+        try:
+            status_mix = parse_status_mix(options['status_mix'])
+        except ValueError as exc:
+            raise CommandError(exc)
+
+        started = time.monotonic()
+        try:
+            counts = generate(
+                prefix=options['prefix'], log=self.stdout.write,
+                status_mix=status_mix,
+                **{key: options[key] for key in DEFAULTS if key in options and key != 'status_mix'},
+            )
+        except ValueError as exc:
+            raise CommandError(exc)
+
+        summary = ', '.join(f'{count} {table}' for table, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'{summary} créés en {time.monotonic() - started:.1f} s.'))
@@ -0,0 +1,29 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from dashboard.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recalcule les statistiques journalières (DailyStats) depuis les tables sources"
+
+    def add_arguments(self, parser):
+        group = parser.add_mutually_exclusive_group()
+        group.add_argument('--since', help="Premier jour à recalculer (AAAA-MM-JJ)")
+        group.add_argument('--days', type=int, help="Recalculer uniquement les N derniers jours")
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = datetime.date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError("Date invalide, format attendu : AAAA-MM-JJ")
+        elif options['days']:
+            since = timezone.localdate() - datetime.timedelta(days=options['days'] - 1)
+
+        count = rebuild(since=since)
+        scope = f"depuis le {since:%d/%m/%Y}" if since else "sur tout l'historique"
+        self.stdout.write(self.style.SUCCESS(f'{count} ligne(s) de statistiques recalculée(s) {scope}.'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.seller_stats import reconcile
+
+
+class Command(BaseCommand):
+    help = "Recalcule les compteurs par vendeur (SellerStats) et corrige les écarts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Afficher les écarts sans les corriger")
+
+    def handle(self, *args, **options):
+        drift = reconcile(apply=not options['dry_run'])
+        for seller_id, differences in drift:
+            details = ', '.join(f'{field} {stored} -> {expected}' for field, (stored, expected) in differences.items())
+            self.stdout.write(f'Vendeur {seller_id} : {details}')
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Compteurs à jour.'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(drift)} vendeur(s) avec des compteurs faux (non corrigés).'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{len(drift)} vendeur(s) corrigé(s).'))
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:25
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def _grouped_counts(queryset, date_field, extra_fields):
+    fields = ['day', *extra_fields]
+    return (
+        queryset
+        .annotate(day=TruncDate(date_field, tzinfo=timezone.get_current_timezone()))
+        .values(*fields)
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+
+
+def backfill_daily_stats(apps, schema_editor):
+    """Lignes DailyStats calculées depuis les tables sources (copie figée de dashboard/rollups.py)"""
+    DailyStats = apps.get_model('dashboard', 'DailyStats')
+    User = apps.get_model('users', 'User')
+    Article = apps.get_model('articles', 'Article')
+    Order = apps.get_model('orders', 'Order')
+
+    rows = []
+    for row in _grouped_counts(User.objects.all(), 'date_joined', ['role']):
+        rows.append(DailyStats(day=row['day'], metric='users', dimension=row['role'], count=row['total']))
+    for row in _grouped_counts(Article.objects.all(), 'created_at', []):
+        rows.append(DailyStats(day=row['day'], metric='articles', count=row['total']))
+    for row in _grouped_counts(Article.objects.all(), 'created_at', ['seller_id']):
+        rows.append(DailyStats(day=row['day'], metric='articles', seller_id=row['seller_id'], count=row['total']))
+    for row in _grouped_counts(Order.objects.all(), 'created_at', ['status']):
+        rows.append(DailyStats(day=row['day'], metric='orders', dimension=row['status'], count=row['total']))
+    for row in _grouped_counts(Order.objects.all(), 'created_at', ['status', 'seller_id']):
+        rows.append(DailyStats(
+            day=row['day'], metric='orders', dimension=row['status'],
+            seller_id=row['seller_id'], count=row['total'],
+        ))
+    DailyStats.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('articles', '0003_articlesearchdocument'),
+        ('orders', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('metric', models.CharField(choices=[('users', 'Utilisateurs'), ('articles', 'Articles'), ('orders', 'Commandes')], max_length=10)),
+                ('dimension', models.CharField(blank=True, default='', max_length=10)),
+                ('count', models.IntegerField(default=0)),
+                ('seller', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['metric', 'day'], name='dailystats_metric_day')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailystats',
+            constraint=models.UniqueConstraint(condition=models.Q(('seller__isnull', True)), fields=('day', 'metric', 'dimension'), name='dailystats_unique_site_row'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailystats',
+            constraint=models.UniqueConstraint(condition=models.Q(('seller__isnull', False)), fields=('day', 'metric', 'dimension', 'seller'), name='dailystats_unique_seller_row'),
+        ),
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
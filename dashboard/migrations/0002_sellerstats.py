@@ -0,0 +1,63 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:11
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+# Compteurs de la table à la création (copie figée de dashboard/seller_stats.py)
+ORDER_STATUSES = ('pending', 'confirmed', 'cancelled')
+COUNTER_FIELDS = ('articles_count', 'orders_count', *(f'orders_{status}' for status in ORDER_STATUSES))
+
+
+def backfill_seller_stats(apps, schema_editor):
+    """Compteurs calculés depuis les articles et les commandes existants"""
+    SellerStats = apps.get_model('dashboard', 'SellerStats')
+    Article = apps.get_model('articles', 'Article')
+    Order = apps.get_model('orders', 'Order')
+
+    counters = {}
+    for seller_id, total in (
+        Article.objects.values_list('seller_id').annotate(total=Count('id')).order_by()
+    ):
+        counters.setdefault(seller_id, dict.fromkeys(COUNTER_FIELDS, 0))['articles_count'] = total
+    for seller_id, status, total in (
+        Order.objects.values_list('seller_id', 'status').annotate(total=Count('id')).order_by()
+    ):
+        seller = counters.setdefault(seller_id, dict.fromkeys(COUNTER_FIELDS, 0))
+        seller['orders_count'] += total
+        if status in ORDER_STATUSES:
+            seller[f'orders_{status}'] = total
+    SellerStats.objects.bulk_create(
+        [SellerStats(seller_id=seller_id, **values) for seller_id, values in counters.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_query_indexes'),
+        ('articles', '0007_query_indexes'),
+        ('orders', '0004_seller_order_indexes'),
+        ('dashboard', '0001_dailystats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SellerStats',
+            fields=[
+                ('seller', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='seller_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('articles_count', models.IntegerField(default=0)),
+                ('orders_count', models.IntegerField(default=0)),
+                ('orders_pending', models.IntegerField(default=0)),
+                ('orders_confirmed', models.IntegerField(default=0)),
+                ('orders_cancelled', models.IntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-articles_count', '-orders_count'], name='sellerstats_articles'), models.Index(fields=['-orders_count'], name='sellerstats_orders')],
+            },
+        ),
+        migrations.RunPython(backfill_seller_stats, migrations.RunPython.noop),
+    ]
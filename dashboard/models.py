@@ -1,3 +1,76 @@
 from django.db import models
 
-# Create your models here.
+from users.models import User
+
+
+class DailyStats(models.Model):
+    """
+    Compteurs journaliers pré-agrégés (voir dashboard/rollups.py).
+
+    - users : utilisateurs inscrits ce jour-là, par rôle (dimension)
+    - articles : articles publiés ce jour-là
+    - orders : commandes passées ce jour-là, par statut actuel (dimension)
+
+    Les lignes sans vendeur portent les totaux du site, les autres ceux d'un vendeur.
+    """
+    METRIC_CHOICES = (
+        ('users', 'Utilisateurs'),
+        ('articles', 'Articles'),
+        ('orders', 'Commandes'),
+    )
+    day = models.DateField()
+    metric = models.CharField(max_length=10, choices=METRIC_CHOICES)
+    dimension = models.CharField(max_length=10, blank=True, default='')
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='daily_stats')
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'metric', 'dimension'],
+                condition=models.Q(seller__isnull=True),
+                name='dailystats_unique_site_row',
+            ),
+            models.UniqueConstraint(
+                fields=['day', 'metric', 'dimension', 'seller'],
+                condition=models.Q(seller__isnull=False),
+                name='dailystats_unique_seller_row',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['metric', 'day'], name='dailystats_metric_day'),
+        ]
+
+    def __str__(self):
+        scope = self.seller_id or 'site'
+        return f"{self.day} {self.metric}/{self.dimension or '-'} ({scope}) : {self.count}"
+
+
+# Statuts de commande comptés dans SellerStats (un champ orders_<statut> chacun)
+ORDER_STATUSES = ('pending', 'confirmed', 'cancelled')
+
+
+class SellerStats(models.Model):
+    """
+    Compteurs courants d'un vendeur (voir dashboard/seller_stats.py).
+
+    Tenus à jour par incréments F() à chaque création/suppression d'article et
+    création/changement de statut/suppression de commande ; recalculables avec
+    `python manage.py reconcile_seller_stats`.
+    """
+    seller = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='seller_stats')
+    articles_count = models.IntegerField(default=0)
+    orders_count = models.IntegerField(default=0)
+    orders_pending = models.IntegerField(default=0)
+    orders_confirmed = models.IntegerField(default=0)
+    orders_cancelled = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Classements des vendeurs : ORDER BY ... LIMIT servi par l'index
+            models.Index(fields=['-articles_count', '-orders_count'], name='sellerstats_articles'),
+            models.Index(fields=['-orders_count'], name='sellerstats_orders'),
+        ]
+
+    def __str__(self):
+        return f"{self.seller_id} : {self.articles_count} article(s), {self.orders_count} commande(s)"
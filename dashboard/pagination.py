@@ -0,0 +1,272 @@
+"""
+Pagination par curseur (keyset) pour le catalogue et les listes d'administration.
+
+Au lieu de `OFFSET n` + `COUNT(*)`, chaque page est obtenue en filtrant sur les
+valeurs de tri du dernier (ou premier) élément affiché, par exemple
+`(created_at, id) < (x, y)`. Le coût d'une page ne dépend donc plus de sa
+profondeur. Les curseurs sont signés : ils sont opaques et non modifiables.
+
+Les liens numérotés (`?page=N`) restent disponibles pour les sauts directs et
+utilisent un OFFSET ; la navigation précédent/suivant/dernière passe par les curseurs.
+Quand le total n'est qu'une borne inférieure (« 1001+ »), le nombre de pages
+est inconnu : ni liens numérotés ni dernière page, seulement la navigation
+relative (première, précédente, suivante).
+"""
+
+import datetime
+import math
+from collections.abc import Sequence
+from decimal import Decimal
+
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+CURSOR_SALT = 'dashboard.pagination.cursor'
+
+# Au-delà de ce nombre de lignes, le total n'est plus compté exactement
+APPROXIMATE_COUNT_THRESHOLD = 1000
+
+
+def estimate_count(queryset):
+    """Estimation du nombre de lignes par le planificateur PostgreSQL (None ailleurs)"""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class CursorPaginator:
+    """
+    Paginateur keyset sur un tri stable.
+
+    `ordering` liste les champs de tri (ex: ('-created_at', '-id')) ; la clé
+    primaire est ajoutée si besoin pour départager les égalités.
+    Avec `count_mode='approximate'`, le total est compté exactement jusqu'à
+    APPROXIMATE_COUNT_THRESHOLD puis estimé (planificateur PostgreSQL).
+    """
+
+    ELLIPSIS = Paginator.ELLIPSIS
+
+    def __init__(self, queryset, per_page, ordering, count_mode='exact'):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.keys = [(field.lstrip('-'), field.startswith('-')) for field in ordering]
+        if self.keys[-1][0] not in ('id', 'pk'):
+            self.keys.append(('id', self.keys[-1][1]))
+        self.count_mode = count_mode
+
+    @property
+    def ordering(self):
+        return [f"{'-' if descending else ''}{name}" for name, descending in self.keys]
+
+    @property
+    def reversed_ordering(self):
+        return [f"{'' if descending else '-'}{name}" for name, descending in self.keys]
+
+    @cached_property
+    def _count_info(self):
+        if self.count_mode != 'approximate':
+            return self.queryset.count(), None
+        threshold = APPROXIMATE_COUNT_THRESHOLD
+        capped = self.queryset.order_by()[:threshold + 1].count()
+        if capped <= threshold:
+            return capped, None
+        estimate = estimate_count(self.queryset)
+        if estimate is None:
+            return capped, 'lower_bound'
+        return max(estimate, capped), 'estimate'
+
+    @property
+    def count(self):
+        return self._count_info[0]
+
+    @property
+    def count_is_approximate(self):
+        return self._count_info[1] is not None
+
+    @property
+    def count_label(self):
+        """Total à afficher : exact, estimé (~) ou borne inférieure (+)"""
+        kind = self._count_info[1]
+        if kind == 'estimate':
+            return f'~{self.count}'
+        if kind == 'lower_bound':
+            return f'{self.count}+'
+        return str(self.count)
+
+    @property
+    def count_is_lower_bound(self):
+        return self._count_info[1] == 'lower_bound'
+
+    @property
+    def num_pages(self):
+        """Nombre de pages ; None si le total n'est qu'une borne inférieure"""
+        if self.count_is_lower_bound:
+            return None
+        return max(1, math.ceil(self.count / self.per_page))
+
+    def get_elided_page_range(self, number):
+        if self.count_is_lower_bound:
+            return [number]
+        return Paginator(range(self.count), self.per_page).get_elided_page_range(number)
+
+    def get_page(self, cursor=None, number=None):
+        """Retourne la page désignée par un curseur, un numéro de page, ou la première page"""
+        if cursor:
+            try:
+                token = signing.loads(cursor, salt=CURSOR_SALT)
+                return self._page_from_token(token)
+            except (signing.BadSignature, KeyError, TypeError, ValueError):
+                pass
+        try:
+            number = max(1, int(number))
+        except (TypeError, ValueError):
+            number = 1
+        return self._page_from_offset(number)
+
+    def _page_from_offset(self, number):
+        offset = (number - 1) * self.per_page
+        rows = list(self.queryset.order_by(*self.ordering)[offset:offset + self.per_page + 1])
+        return CursorPage(rows[:self.per_page], number, self,
+                          has_previous=number > 1, has_next=len(rows) > self.per_page)
+
+    def _page_from_token(self, token):
+        direction, number = token['d'], int(token['p'])
+        if direction == 'last' and self.count_is_lower_bound:
+            # Numéro de la dernière page inconnu (lien non proposé) : première page
+            return self._page_from_offset(1)
+        if direction == 'last':
+            # Avec un total exact, la dernière page ne contient que le reste
+            size = self.per_page
+            if not self.count_is_approximate and self.count % self.per_page:
+                size = self.count % self.per_page
+            rows = list(self.queryset.order_by(*self.reversed_ordering)[:size + 1])
+            has_previous = len(rows) > size
+            rows = rows[:size][::-1]
+            return CursorPage(rows, self.num_pages, self, has_previous=has_previous, has_next=False)
+
+        values = [self._from_json(name, value) for (name, _), value in zip(self.keys, token['k'])]
+        forward = direction == 'next'
+        queryset = self.queryset.filter(self._keyset_filter(values, forward))
+        if forward:
+            rows = list(queryset.order_by(*self.ordering)[:self.per_page + 1])
+            return CursorPage(rows[:self.per_page], number, self,
+                              has_previous=True, has_next=len(rows) > self.per_page)
+        rows = list(queryset.order_by(*self.reversed_ordering)[:self.per_page + 1])
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+        return CursorPage(rows, number, self, has_previous=has_previous, has_next=True)
+
+    def _keyset_filter(self, values, forward):
+        """Condition `(k1, k2, ...) > (v1, v2, ...)` dans le sens d'affichage (ou inverse)"""
+        condition = Q()
+        equal = Q()
+        for (name, descending), value in zip(self.keys, values):
+            lookup = 'lt' if descending == forward else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def make_cursor(self, obj, direction, number):
+        values = [self._to_json(getattr(obj, name)) for name, _ in self.keys]
+        return signing.dumps({'k': values, 'd': direction, 'p': number}, salt=CURSOR_SALT, compress=True)
+
+    def last_cursor(self):
+        if self.count_is_lower_bound:
+            return None
+        return signing.dumps({'d': 'last', 'p': 0}, salt=CURSOR_SALT)
+
+    @staticmethod
+    def _to_json(value):
+        if isinstance(value, (datetime.datetime, datetime.date)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+    def _from_json(self, name, value):
+        try:
+            field = self.queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # Annotation (ex: score de pertinence) : valeur JSON telle quelle
+            return value
+        return field.to_python(value)
+
+
+class CursorPage(Sequence):
+    """Page de résultats, compatible avec l'interface de django.core.paginator.Page"""
+
+    def __init__(self, object_list, number, paginator, has_previous, has_next):
+        self.object_list = object_list
+        self.number = number
+        self.paginator = paginator
+        self._has_previous = has_previous
+        self._has_next = has_next
+        self.base_query = ''
+
+    def __repr__(self):
+        return f'<CursorPage {self.number}>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next and bool(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+    @property
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        return self.paginator.make_cursor(self.object_list[-1], 'next', self.number + 1)
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous() or not self.object_list:
+            return None
+        return self.paginator.make_cursor(self.object_list[0], 'previous', max(1, self.number - 1))
+
+    @property
+    def last_cursor(self):
+        return self.paginator.last_cursor()
+
+    @property
+    def elided_page_range(self):
+        return list(self.paginator.get_elided_page_range(self.number))
+
+    def start_index(self):
+        if not self.object_list:
+            return 0
+        return (self.number - 1) * self.paginator.per_page + 1
+
+    def end_index(self):
+        return self.start_index() + len(self.object_list) - 1 if self.object_list else 0
+
+
+def paginate(request, queryset, per_page, ordering, count_mode='approximate'):
+    """Pagine un queryset d'après les paramètres `cursor` / `page` de la requête"""
+    paginator = CursorPaginator(queryset, per_page, ordering, count_mode=count_mode)
+    page = paginator.get_page(cursor=request.GET.get('cursor'), number=request.GET.get('page'))
+
+    # Paramètres à conserver dans les liens de pagination (filtres, recherche...)
+    params = request.GET.copy()
+    params.pop('cursor', None)
+    params.pop('page', None)
+    page.base_query = f'{params.urlencode()}&' if params else ''
+    return page
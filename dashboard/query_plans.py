@@ -0,0 +1,141 @@
+"""
+Vérification des plans d'exécution des requêtes des vues.
+
+Chaque scénario appelle une vue avec le client de test, capture les requêtes
+SQL qu'elle exécute puis lance `EXPLAIN` sur chacune (PostgreSQL ou SQLite).
+Le rapport indique les index utilisés et signale les parcours complets
+(« Seq Scan » / « SCAN table ») des grandes tables ainsi que les tris non
+servis par un index.
+
+Utilisé par `python manage.py explain_queries`.
+"""
+
+import re
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from articles.models import Article
+from notifications.models import Notification
+from orders.models import Order
+from users.models import User
+from .models import SellerStats
+from .seller_stats import top_sellers
+
+LARGE_TABLES = {
+    Article._meta.db_table, Order._meta.db_table, Notification._meta.db_table, User._meta.db_table,
+    SellerStats._meta.db_table,
+}
+
+# Requêtes d'infrastructure sans intérêt pour les index métier
+IGNORED_TABLES = ('django_session', 'dashboard_dailystats', 'jobs_job')
+
+PG_INDEX_RE = re.compile(r'Index(?: Only)? Scan(?: Backward)? using (\w+)|Bitmap Index Scan on (\w+)')
+PG_SEQ_SCAN_RE = re.compile(r'Seq Scan on (\w+)')
+SQLITE_INDEX_RE = re.compile(r'(?:USING (?:COVERING )?INDEX|USING INTEGER PRIMARY KEY) ?(\w*)')
+SQLITE_SCAN_RE = re.compile(r'\bSCAN (?:TABLE )?(\w+)(?!.*USING)')
+# Tri explicite (ORDER BY non servi par un index)
+SORT_MARKERS = ('Sort Key:', 'TEMP B-TREE FOR ORDER BY', 'TEMP B-TREE FOR RIGHT PART OF ORDER BY')
+
+
+def representative_users():
+    """(vendeur ayant reçu le plus de commandes, premier administrateur)"""
+    leader = top_sellers(1, by='orders').first()
+    return leader.seller if leader else None, User.objects.filter(role='admin').order_by('id').first()
+
+
+def scenarios(seller, admin):
+    """(nom, utilisateur connecté, URL, paramètres GET) pour chaque vue à analyser"""
+    article = Article.objects.filter(seller=seller).order_by('-id').first() if seller else None
+    home = reverse('home')
+    items = [
+        ('home', None, home, {}),
+        ('home_search', None, home, {'search': 'lampe'}),
+        ('home_seller', None, home, {'seller': seller.pk} if seller else {}),
+        ('home_price_range', None, home, {'price_range': '100-250'}),
+        ('home_sort_price', None, home, {'sort_by': 'price'}),
+        ('home_sort_title', None, home, {'sort_by': 'title'}),
+        ('home_page_50', None, home, {'page': 50}),
+    ]
+    if article:
+        items.append(('article_detail', None, reverse('articles:detail', args=[article.pk]), {}))
+    if seller:
+        items += [
+            ('seller_dashboard', seller, reverse('seller_dashboard'), {}),
+            ('seller_articles_panel', seller, reverse('seller_articles_panel'), {}),
+            ('seller_orders_panel', seller, reverse('seller_orders_panel'), {}),
+            ('seller_orders_panel_pending', seller, reverse('seller_orders_panel'), {'status': 'pending'}),
+        ]
+    if admin:
+        items += [
+            ('admin_dashboard', admin, reverse('admin_dashboard'), {}),
+            ('admin_users', admin, reverse('admin_users'), {}),
+            ('admin_users_role', admin, reverse('admin_users'), {'role': 'seller'}),
+            ('admin_articles', admin, reverse('admin_articles'), {}),
+            ('admin_articles_seller', admin, reverse('admin_articles'), {'seller': seller.pk} if seller else {}),
+            ('admin_orders', admin, reverse('admin_orders'), {}),
+            ('admin_orders_pending', admin, reverse('admin_orders'), {'status': 'pending'}),
+            ('admin_notifications', admin, reverse('admin_notifications'), {}),
+        ]
+    return items
+
+
+def explain(sql, analyze=False):
+    """Plan d'exécution d'une requête, sous forme de lignes de texte"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f"EXPLAIN {'(ANALYZE, BUFFERS) ' if analyze else ''}{sql}")
+            return [row[0] for row in cursor.fetchall()]
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def analyse_plan(lines):
+    """Index utilisés, grandes tables parcourues entièrement, présence d'un tri"""
+    indexes, full_scans = set(), set()
+    sorts = any(marker in line for line in lines for marker in SORT_MARKERS)
+    for line in lines:
+        if connection.vendor == 'postgresql':
+            for match in PG_INDEX_RE.finditer(line):
+                indexes.add(match.group(1) or match.group(2))
+            full_scans.update(PG_SEQ_SCAN_RE.findall(line))
+        else:
+            if 'USING' in line:
+                match = SQLITE_INDEX_RE.search(line)
+                indexes.add(match.group(1) or 'PRIMARY KEY')
+            full_scans.update(SQLITE_SCAN_RE.findall(line))
+    return sorted(indexes), sorted(table for table in full_scans if table in LARGE_TABLES), sorts
+
+
+def collect_view_queries(user, url, params):
+    """Requêtes SELECT exécutées par une vue (cache de pages désactivé)"""
+    client = Client()
+    if user is not None:
+        client.force_login(user)
+    with override_settings(PAGE_CACHE_TIMEOUT=0, ALLOWED_HOSTS=['*']):
+        with CaptureQueriesContext(connection) as captured:
+            response = client.get(url, params)
+    queries = [
+        query['sql'] for query in captured.captured_queries
+        if query['sql'].lstrip().upper().startswith('SELECT')
+        and not any(table in query['sql'] for table in IGNORED_TABLES)
+    ]
+    return response.status_code, queries
+
+
+def explain_views(seller, admin, analyze=False):
+    """Rapport par vue : requêtes, index utilisés et parcours complets"""
+    report = []
+    for name, user, url, params in scenarios(seller, admin):
+        status, queries = collect_view_queries(user, url, params)
+        entries = []
+        for sql in queries:
+            plan = explain(sql, analyze)
+            indexes, full_scans, sorts = analyse_plan(plan)
+            entries.append({
+                'sql': sql, 'plan': plan, 'indexes': indexes, 'full_scans': full_scans, 'sorts': sorts,
+            })
+        report.append({'view': name, 'url': url, 'params': params, 'status': status, 'queries': entries})
+    return report
@@ -0,0 +1,114 @@
+"""
+Statistiques journalières pré-agrégées (table DailyStats).
+
+Les compteurs sont tenus à jour de façon incrémentale par les signaux de
+dashboard/signals.py (F() expressions, donc sans condition de course) et
+peuvent être recalculés depuis les tables sources avec la commande
+`python manage.py rebuild_daily_stats`.
+"""
+
+import datetime
+
+from django.apps import apps as global_apps
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def local_day(value):
+    """Jour (fuseau du site) d'un horodatage"""
+    if timezone.is_aware(value):
+        return timezone.localdate(value)
+    return value.date()
+
+
+def bump(day, metric, dimension='', seller_id=None, delta=1):
+    """Ajoute `delta` au compteur d'un jour (crée la ligne si besoin)"""
+    from .models import DailyStats
+
+    rows = DailyStats.objects.filter(day=day, metric=metric, dimension=dimension, seller_id=seller_id)
+    if rows.update(count=F('count') + delta) or delta < 0:
+        # Un décrément ne crée jamais de ligne (ex: vendeur en cours de suppression)
+        return
+    try:
+        with transaction.atomic():
+            DailyStats.objects.create(
+                day=day, metric=metric, dimension=dimension, seller_id=seller_id, count=delta
+            )
+    except IntegrityError:
+        # Ligne créée entre-temps par une autre requête
+        rows.update(count=F('count') + delta)
+
+
+def record_user(user, delta=1, role=None):
+    bump(local_day(user.date_joined), 'users', role or user.role, delta=delta)
+
+
+def record_article(article, delta=1):
+    day = local_day(article.created_at)
+    bump(day, 'articles', delta=delta)
+    bump(day, 'articles', seller_id=article.seller_id, delta=delta)
+
+
+def record_order(order, delta=1, status=None):
+    day = local_day(order.created_at)
+    status = status or order.status
+    bump(day, 'orders', status, delta=delta)
+    bump(day, 'orders', status, seller_id=order.seller_id, delta=delta)
+
+
+def _grouped_counts(queryset, date_field, extra_fields):
+    """Comptage par jour (et par champs supplémentaires) en une requête GROUP BY"""
+    fields = ['day', *extra_fields]
+    return (
+        queryset
+        .annotate(day=TruncDate(date_field, tzinfo=timezone.get_current_timezone()))
+        .values(*fields)
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+
+
+def rebuild(since=None, apps=global_apps):
+    """
+    Recalcule les lignes DailyStats depuis les tables sources.
+
+    `since` (date) limite le recalcul aux jours postérieurs ; retourne le nombre
+    de lignes écrites.
+    """
+    DailyStats = apps.get_model('dashboard', 'DailyStats')
+    User = apps.get_model('users', 'User')
+    Article = apps.get_model('articles', 'Article')
+    Order = apps.get_model('orders', 'Order')
+
+    users = User.objects.all()
+    articles = Article.objects.all()
+    orders = Order.objects.all()
+    existing = DailyStats.objects.all()
+    if since is not None:
+        start = timezone.make_aware(datetime.datetime.combine(since, datetime.time.min))
+        users = users.filter(date_joined__gte=start)
+        articles = articles.filter(created_at__gte=start)
+        orders = orders.filter(created_at__gte=start)
+        existing = existing.filter(day__gte=since)
+
+    rows = []
+    for row in _grouped_counts(users, 'date_joined', ['role']):
+        rows.append(DailyStats(day=row['day'], metric='users', dimension=row['role'], count=row['total']))
+    for row in _grouped_counts(articles, 'created_at', []):
+        rows.append(DailyStats(day=row['day'], metric='articles', count=row['total']))
+    for row in _grouped_counts(articles, 'created_at', ['seller_id']):
+        rows.append(DailyStats(day=row['day'], metric='articles', seller_id=row['seller_id'], count=row['total']))
+    for row in _grouped_counts(orders, 'created_at', ['status']):
+        rows.append(DailyStats(day=row['day'], metric='orders', dimension=row['status'], count=row['total']))
+    for row in _grouped_counts(orders, 'created_at', ['status', 'seller_id']):
+        rows.append(DailyStats(
+            day=row['day'], metric='orders', dimension=row['status'],
+            seller_id=row['seller_id'], count=row['total'],
+        ))
+
+    with transaction.atomic():
+        existing.delete()
+        DailyStats.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
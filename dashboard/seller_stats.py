@@ -0,0 +1,115 @@
+"""
+Compteurs par vendeur (table SellerStats).
+
+Chaque événement (article publié ou supprimé, commande reçue, changement de
+statut, suppression) se traduit par un seul UPDATE avec des expressions F(),
+sans lecture préalable : les mises à jour concurrentes ne se perdent pas.
+`reconcile()` recalcule les compteurs depuis les tables sources et corrige
+les écarts (données importées sans signaux, incidents...).
+"""
+
+from django.apps import apps as global_apps
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import ORDER_STATUSES, SellerStats
+
+COUNTER_FIELDS = ('articles_count', 'orders_count', *(f'orders_{status}' for status in ORDER_STATUSES))
+
+
+def adjust(seller_id, **deltas):
+    """Ajoute les `deltas` (champ -> entier) aux compteurs d'un vendeur"""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas or seller_id is None:
+        return
+    rows = SellerStats.objects.filter(seller_id=seller_id)
+    if rows.update(**{field: F(field) + delta for field, delta in deltas.items()}):
+        return
+    if any(delta < 0 for delta in deltas.values()):
+        # Un décrément ne crée jamais de ligne (ex: vendeur en cours de suppression)
+        return
+    try:
+        with transaction.atomic():
+            SellerStats.objects.create(seller_id=seller_id, **deltas)
+    except IntegrityError:
+        # Ligne créée entre-temps par une autre requête
+        rows.update(**{field: F(field) + delta for field, delta in deltas.items()})
+
+
+def record_article(article, delta=1):
+    adjust(article.seller_id, articles_count=delta)
+
+
+def record_order(order, delta=1):
+    adjust(order.seller_id, orders_count=delta, **{f'orders_{order.status}': delta})
+
+
+def record_status_change(order, previous_status):
+    adjust(order.seller_id, **{f'orders_{previous_status}': -1, f'orders_{order.status}': 1})
+
+
+def top_sellers(limit, by='articles'):
+    """Classement des vendeurs par articles (puis commandes) ou par commandes"""
+    ordering = ['-articles_count', '-orders_count'] if by == 'articles' else ['-orders_count']
+    return (
+        SellerStats.objects.filter(seller__role='seller').select_related('seller')
+        .order_by(*ordering)[:limit]
+    )
+
+
+def for_seller(seller):
+    """Compteurs d'un vendeur (à zéro s'il n'a encore rien publié ni reçu)"""
+    return SellerStats.objects.filter(seller=seller).first() or SellerStats(seller=seller)
+
+
+def expected_counters(apps=global_apps):
+    """Compteurs recalculés depuis les articles et les commandes : {seller_id: {champ: valeur}}"""
+    Article = apps.get_model('articles', 'Article')
+    Order = apps.get_model('orders', 'Order')
+
+    expected = {}
+    for seller_id, total in (
+        Article.objects.values_list('seller_id').annotate(total=Count('id')).order_by()
+    ):
+        expected.setdefault(seller_id, dict.fromkeys(COUNTER_FIELDS, 0))['articles_count'] = total
+    for seller_id, status, total in (
+        Order.objects.values_list('seller_id', 'status').annotate(total=Count('id')).order_by()
+    ):
+        counters = expected.setdefault(seller_id, dict.fromkeys(COUNTER_FIELDS, 0))
+        counters['orders_count'] += total
+        counters[f'orders_{status}'] = total
+    return expected
+
+
+def reconcile(apply=True, apps=global_apps):
+    """
+    Compare les compteurs aux tables sources.
+
+    Retourne la liste des écarts (seller_id, {champ: (stocké, attendu)}) et,
+    avec `apply`, les corrige.
+    """
+    Stats = apps.get_model('dashboard', 'SellerStats')
+    expected = expected_counters(apps)
+    stored = {row['seller_id']: row for row in Stats.objects.values('seller_id', *COUNTER_FIELDS)}
+
+    drift, to_update, to_create = [], [], []
+    zero = dict.fromkeys(COUNTER_FIELDS, 0)
+    for seller_id in stored.keys() | expected.keys():
+        actual, wanted = stored.get(seller_id), expected.get(seller_id, zero)
+        current = actual or zero
+        differences = {
+            field: (current[field], wanted[field]) for field in COUNTER_FIELDS if current[field] != wanted[field]
+        }
+        if not differences:
+            continue
+        drift.append((seller_id, differences))
+        if actual is None:
+            to_create.append(Stats(seller_id=seller_id, **wanted))
+        else:
+            to_update.append(Stats(seller_id=seller_id, **wanted))
+
+    if apply and drift:
+        with transaction.atomic():
+            Stats.objects.bulk_create(to_create, batch_size=1000)
+            Stats.objects.bulk_update(to_update, COUNTER_FIELDS, batch_size=1000)
+    return sorted(drift)
@@ -0,0 +1,75 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from articles.models import Article
+from orders.models import Order
+from users.models import User
+from dashboard import rollups, seller_stats
+
+
+def _previous_value(sender, instance, field, raw, update_fields):
+    """Valeur d'un champ en base avant la sauvegarde (None pour une création)"""
+    if raw or instance.pk is None:
+        return None
+    if update_fields is not None and field not in update_fields:
+        return None
+    return sender.objects.filter(pk=instance.pk).values_list(field, flat=True).first()
+
+
+@receiver(pre_save, sender=User)
+def remember_previous_role(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._previous_role = _previous_value(sender, instance, 'role', raw, update_fields)
+
+
+@receiver(post_save, sender=User)
+def update_user_rollups(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous_role = getattr(instance, '_previous_role', None)
+    if created:
+        rollups.record_user(instance)
+    elif previous_role and previous_role != instance.role:
+        rollups.record_user(instance, delta=-1, role=previous_role)
+        rollups.record_user(instance)
+
+
+@receiver(post_delete, sender=User)
+def remove_user_rollups(sender, instance, **kwargs):
+    rollups.record_user(instance, delta=-1)
+
+
+@receiver(post_save, sender=Article)
+def update_article_rollups(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        rollups.record_article(instance)
+        seller_stats.record_article(instance)
+
+
+@receiver(post_delete, sender=Article)
+def remove_article_rollups(sender, instance, **kwargs):
+    rollups.record_article(instance, delta=-1)
+    seller_stats.record_article(instance, delta=-1)
+
+
+@receiver(pre_save, sender=Order)
+def remember_previous_status(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._previous_status = _previous_value(sender, instance, 'status', raw, update_fields)
+
+
+@receiver(post_save, sender=Order)
+def update_order_rollups(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous_status = getattr(instance, '_previous_status', None)
+    if created:
+        rollups.record_order(instance)
+        seller_stats.record_order(instance)
+    elif previous_status and previous_status != instance.status:
+        rollups.record_order(instance, delta=-1, status=previous_status)
+        rollups.record_order(instance)
+        seller_stats.record_status_change(instance, previous_status)
+
+
+@receiver(post_delete, sender=Order)
+def remove_order_rollups(sender, instance, **kwargs):
+    rollups.record_order(instance, delta=-1)
+    seller_stats.record_order(instance, delta=-1)
@@ -0,0 +1,117 @@
+"""
+Statistiques du marketplace pour les dashboards admin et vendeur.
+
+Les compteurs sont lus dans la table de cumuls journaliers DailyStats (voir
+dashboard/rollups.py) : une seule requête par agrégation conditionnelle
+(`Sum(..., filter=Q(...))`) sur O(jours) lignes, au lieu de parcourir toutes
+les commandes, articles et utilisateurs.
+"""
+
+import datetime
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from notifications.models import Notification
+from orders.models import Order
+from users.models import User
+from .models import DailyStats
+
+
+def period_starts():
+    """Premier jour (inclus) des périodes « 7 derniers jours » et « 30 derniers jours »"""
+    today = timezone.localdate()
+    return {
+        'week': today - datetime.timedelta(days=7),
+        'month': today - datetime.timedelta(days=30),
+    }
+
+
+def _sum(condition):
+    return Coalesce(Sum('count', filter=condition), 0)
+
+
+def _metric_aggregates(metric, dimension_field, dimensions):
+    """Total, périodes et (éventuellement) répartition par dimension d'une métrique"""
+    aggregates = {f'{metric}_total': _sum(Q(metric=metric))}
+    for period, start in period_starts().items():
+        aggregates[f'{metric}_{period}'] = _sum(Q(metric=metric, day__gte=start))
+    for dimension in dimensions:
+        aggregates[f'{metric}_{dimension_field}_{dimension}'] = _sum(Q(metric=metric, dimension=dimension))
+    return aggregates
+
+
+def _metric_stats(row, metric, dimension_field=None, dimensions=()):
+    stats = {
+        'total': row[f'{metric}_total'],
+        'week': row[f'{metric}_week'],
+        'month': row[f'{metric}_month'],
+    }
+    if dimension_field:
+        stats[dimension_field] = {
+            dimension: row[f'{metric}_{dimension_field}_{dimension}'] for dimension in dimensions
+        }
+    return stats
+
+
+def notification_stats():
+    """Notifications : total et non lues"""
+    return Notification.objects.aggregate(
+        total=Count('id'),
+        unread=Count('id', filter=Q(is_read=False)),
+    )
+
+
+def get_stats(seller=None):
+    """
+    Statistiques du marketplace.
+
+    Sans vendeur : utilisateurs, articles, commandes (une requête sur les cumuls
+    du site) et notifications. Avec un vendeur : ses articles et ses commandes
+    (une requête sur ses cumuls).
+    """
+    roles = [role for role, _ in User.ROLE_CHOICES]
+    statuses = [status for status, _ in Order.STATUS_CHOICES]
+
+    aggregates = {
+        **_metric_aggregates('articles', None, ()),
+        **_metric_aggregates('orders', 'by_status', statuses),
+    }
+    if seller is None:
+        aggregates.update(_metric_aggregates('users', 'by_role', roles))
+    row = DailyStats.objects.filter(seller=seller).aggregate(**aggregates)
+
+    stats = {
+        'articles': _metric_stats(row, 'articles'),
+        'orders': _metric_stats(row, 'orders', 'by_status', statuses),
+    }
+    if seller is None:
+        stats['users'] = _metric_stats(row, 'users', 'by_role', roles)
+        stats['notifications'] = notification_stats()
+    return stats
+
+
+def time_series(metric, days=30, seller=None):
+    """
+    Série journalière d'une métrique sur les `days` derniers jours.
+
+    Retourne {'labels': [dates ISO], 'series': {dimension: [valeurs]}} ; les
+    jours sans activité valent 0.
+    """
+    today = timezone.localdate()
+    start = today - datetime.timedelta(days=days - 1)
+    labels = [start + datetime.timedelta(days=offset) for offset in range(days)]
+
+    series = {}
+    rows = DailyStats.objects.filter(metric=metric, seller=seller, day__gte=start).values_list(
+        'day', 'dimension', 'count'
+    )
+    for day, dimension, count in rows:
+        values = series.setdefault(dimension or 'total', [0] * days)
+        values[(day - start).days] += count
+    return {
+        'metric': metric,
+        'labels': [day.isoformat() for day in labels],
+        'series': series,
+    }
@@ -0,0 +1,456 @@
+"""
+Génération de données synthétiques en volume (tests de charge et de capacité).
+
+Utilisateurs, articles (avec images de remplacement), commandes et
+notifications sont insérés par `bulk_create`, par blocs traités en parallèle
+par plusieurs processus. Chaque bloc tire ses valeurs d'un générateur
+aléatoire initialisé par (graine, table, numéro de bloc) : le résultat ne
+dépend ni du nombre de processus ni de l'ordre d'exécution des blocs.
+
+Distributions réglables (voir DEFAULTS) :
+- popularité des vendeurs en loi de Zipf (`seller_skew`) : quelques vendeurs
+  concentrent la plupart des articles et des commandes ;
+- prix en loi log-normale (`price_median`, `price_sigma`) ;
+- répartition des statuts de commande (`status_mix`) ;
+- dates étalées sur `days` jours, plus denses vers aujourd'hui (`recency`).
+
+`bulk_create` ne déclenche pas les signaux : l'index de recherche et les
+statistiques journalières sont reconstruits à la fin.
+
+Utilisé par `python manage.py generate_data`.
+"""
+
+import io
+import math
+import multiprocessing
+import os
+import random
+from array import array
+from bisect import bisect
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.db import connection, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from PIL import Image, ImageDraw
+
+from articles import suggest
+from articles.cache import CATALOG, invalidate
+from articles.sellers import SELLERS
+from articles.images import generate_variants
+from articles.models import Article, StoredFile
+from articles.search import rebuild_index
+from articles.storage import article_storage
+from notifications import unread
+from notifications.models import Notification
+from orders.models import Order
+from users.models import User
+
+from .rollups import rebuild
+from .seller_stats import reconcile
+
+DEFAULTS = {
+    'seed': 42,
+    'admins': 2,
+    'sellers': 100,
+    'clients': 1000,
+    'articles': 10000,
+    'orders': 20000,
+    'notifications': 20000,
+    'seller_skew': 1.1,
+    'price_median': 50.0,
+    'price_sigma': 1.0,
+    'status_mix': {'pending': 20, 'confirmed': 70, 'cancelled': 10},
+    'days': 365,
+    'recency': 1.5,
+    'image_ratio': 0.6,
+    'placeholders': 12,
+    'read_ratio': 0.8,
+    'password': 'password',
+    'batch_size': 2000,
+    'workers': None,
+}
+
+# Lignes par bloc de travail (une transaction, plusieurs lots de bulk_create)
+CHUNK_SIZE = 20000
+
+MIN_PRICE, MAX_PRICE = Decimal('0.50'), Decimal('99999999.99')
+
+PRODUCTS = [
+    'Lampe', 'Chaise', 'Table', 'Vélo', 'Téléphone', 'Ordinateur portable', 'Casque audio',
+    'Montre', 'Sac à main', 'Chaussures', 'Veste', 'Robe', 'Canapé', 'Réfrigérateur',
+    'Machine à café', 'Appareil photo', 'Tablette', 'Console de jeux', 'Enceinte Bluetooth',
+    'Bureau', 'Matelas', 'Poussette', 'Guitare', 'Livre', 'Télévision', 'Imprimante',
+]
+QUALIFIERS = [
+    'vintage', 'neuf', 'comme neuf', 'en bois', 'en cuir', 'reconditionné', 'design',
+    'pliable', 'sans fil', 'professionnel', 'pour enfant', 'de luxe', 'compact', 'rétro',
+]
+CONDITIONS = [
+    'Très bon état, peu servi.', 'Quelques traces d\'usure.', 'Jamais utilisé, encore emballé.',
+    'Fonctionne parfaitement.', 'Vendu avec sa facture.', 'Livraison possible en ville.',
+    'Prix à débattre.', 'Disponible immédiatement.',
+]
+FIRST_NAMES = ['Awa', 'Koffi', 'Marie', 'Jean', 'Fatou', 'Moussa', 'Claire', 'Yao', 'Aminata', 'Paul']
+LAST_NAMES = ['Kouassi', 'Diallo', 'Martin', 'Traoré', 'Bernard', 'Konan', 'Camara', 'Dubois']
+
+# État partagé avec les processus de travail (hérité au fork)
+_STATE = {}
+
+
+def chunk_random(seed, table, chunk):
+    """Générateur aléatoire propre à un bloc : reproductible quel que soit le processus"""
+    return random.Random(f'{seed}:{table}:{chunk}')
+
+
+def zipf_cumulative(count, skew):
+    """Poids cumulés d'une loi de Zipf (rang 1 le plus fréquent)"""
+    cumulative, total = array('d'), 0.0
+    for rank in range(1, count + 1):
+        total += 1.0 / rank ** skew
+        cumulative.append(total)
+    return cumulative
+
+
+def pick(rng, cumulative):
+    """Indice tiré selon des poids cumulés"""
+    return min(bisect(cumulative, rng.random() * cumulative[-1]), len(cumulative) - 1)
+
+
+def past_moment(rng, now, max_age, recency):
+    """Instant dans les `max_age` secondes passées, plus probable vers `now`"""
+    return now - timedelta(seconds=max_age * rng.random() ** recency)
+
+
+def random_price(rng, median, sigma):
+    price = Decimal(str(round(rng.lognormvariate(math.log(median), sigma), 2)))
+    return min(max(price, MIN_PRICE), MAX_PRICE)
+
+
+def parse_status_mix(value):
+    """'pending=20,confirmed=70,cancelled=10' -> {'pending': 20, ...}"""
+    valid = {status for status, _ in Order.STATUS_CHOICES}
+    mix = {}
+    for item in value.split(','):
+        status, _, weight = item.partition('=')
+        status = status.strip()
+        if status not in valid:
+            raise ValueError(f'Statut inconnu : {status}')
+        mix[status] = float(weight)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError('La répartition des statuts doit avoir un poids positif')
+    return mix
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """Désactive auto_now_add pour conserver les dates générées lors de bulk_create"""
+    previous = [field.auto_now_add for field in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in zip(fields, previous):
+            field.auto_now_add = value
+
+
+# Construction des blocs
+
+def _build_users(rng, start, end):
+    state = _STATE
+    admins, sellers = state['admins'], state['sellers']
+    rows = []
+    for index in range(start, end):
+        if index < admins:
+            role, number = 'admin', index
+        elif index < admins + sellers:
+            role, number = 'seller', index - admins
+        else:
+            role, number = 'client', index - admins - sellers
+        username = f"{state['prefix']}{role}{number:07d}"
+        rows.append(User(
+            username=username, email=f'{username}@example.com', password=state['password_hash'],
+            first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES), role=role,
+            whatsapp_number=f'+22507{rng.randrange(10 ** 8):08d}' if role == 'seller' else None,
+            date_joined=past_moment(rng, state['now'], state['max_age'], state['recency']),
+        ))
+    User.objects.bulk_create(rows, batch_size=state['batch_size'])
+    return Counter(users=len(rows))
+
+
+def _build_articles(rng, start, end):
+    state = _STATE
+    now, sellers, joined = state['now'], state['seller_ids'], state['seller_joined']
+    placeholders = state['placeholders']
+    rows, usage = [], Counter()
+    for _ in range(start, end):
+        seller = pick(rng, state['seller_weights'])
+        product, qualifier = rng.choice(PRODUCTS), rng.choice(QUALIFIERS)
+        article = Article(
+            title=f'{product} {qualifier}',
+            description=f'{product} {qualifier}. {rng.choice(CONDITIONS)} {rng.choice(CONDITIONS)}',
+            price=random_price(rng, state['price_median'], state['price_sigma']),
+            seller_id=sellers[seller],
+            created_at=past_moment(rng, now, (now - joined[seller]).total_seconds(), state['recency']),
+        )
+        if placeholders and rng.random() < state['image_ratio']:
+            placeholder = rng.randrange(len(placeholders))
+            article.images = placeholders[placeholder]['name']
+            article.image_variants = placeholders[placeholder]['variants']
+            usage[placeholder] += 1
+        rows.append(article)
+    Article.objects.bulk_create(rows, batch_size=state['batch_size'])
+    usage['articles'] = len(rows)
+    return usage
+
+
+def _build_orders(rng, start, end):
+    state = _STATE
+    now, sellers, by_seller = state['now'], state['seller_ids'], state['articles_by_seller']
+    statuses, status_weights = state['statuses'], state['status_weights']
+    rows = []
+    for index in range(start, end):
+        seller = state['order_sellers'][pick(rng, state['order_seller_weights'])]
+        article_ids, article_times = by_seller[seller]
+        position = rng.randrange(len(article_ids))
+        created = datetime.fromtimestamp(article_times[position], tz=dt_timezone.utc)
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        rows.append(Order(
+            article_id=article_ids[position], seller_id=sellers[seller],
+            client_name=f'{first} {last}', client_phone=f'07{rng.randrange(10 ** 8):08d}',
+            client_email=f'{first}.{last}{index}@example.com'.lower() if rng.random() < 0.5 else None,
+            message='Toujours disponible ?' if rng.random() < 0.3 else None,
+            status=rng.choices(statuses, cum_weights=status_weights)[0],
+            created_at=past_moment(rng, now, (now - created).total_seconds(), state['recency']),
+        ))
+    Order.objects.bulk_create(rows, batch_size=state['batch_size'])
+    return Counter(orders=len(rows))
+
+
+def _build_notifications(rng, start, end):
+    state = _STATE
+    now, recipients = state['now'], state['recipient_ids']
+    rows = []
+    for _ in range(start, end):
+        recipient = recipients[pick(rng, state['recipient_weights'])]
+        rows.append(Notification(
+            recipient_id=recipient,
+            title=rng.choice(['Nouvelle commande', 'Commande confirmée', 'Commande annulée', 'Nouvel article']),
+            message=f'{rng.choice(PRODUCTS)} {rng.choice(QUALIFIERS)} : {rng.choice(CONDITIONS)}',
+            is_read=rng.random() < state['read_ratio'],
+            created_at=past_moment(rng, now, state['max_age'], state['recency']),
+        ))
+    Notification.objects.bulk_create(rows, batch_size=state['batch_size'])
+    return Counter(notifications=len(rows))
+
+
+BUILDERS = {
+    'users': _build_users,
+    'articles': _build_articles,
+    'orders': _build_orders,
+    'notifications': _build_notifications,
+}
+
+
+def _run_chunk(table, chunk, start, end):
+    rng = chunk_random(_STATE['seed'], table, chunk)
+    with transaction.atomic():
+        return BUILDERS[table](rng, start, end)
+
+
+def _run_table(table, total):
+    """Insère `total` lignes de la table, bloc par bloc, en parallèle si possible"""
+    chunks = [
+        (table, chunk, start, min(total, start + CHUNK_SIZE))
+        for chunk, start in enumerate(range(0, total, CHUNK_SIZE))
+    ]
+    workers = min(_STATE['workers'], len(chunks))
+    results = Counter()
+    if workers > 1:
+        # Les connexions ne doivent pas être partagées entre processus : chacun ouvre la sienne
+        connections.close_all()
+        with multiprocessing.get_context('fork').Pool(workers) as pool:
+            for result in pool.starmap(_run_chunk, chunks):
+                results.update(result)
+    else:
+        for chunk in chunks:
+            results.update(_run_chunk(*chunk))
+    return results
+
+
+# Préparation des données partagées
+
+def _placeholder_image(rng, number):
+    """Image de remplacement : dégradé de couleur et numéro"""
+    width, height = 1200, 900
+    start = [rng.randrange(40, 220) for _ in range(3)]
+    end = [rng.randrange(40, 220) for _ in range(3)]
+    image = Image.new('RGB', (width, height))
+    draw = ImageDraw.Draw(image)
+    for y in range(height):
+        ratio = y / height
+        draw.line([(0, y), (width, y)], fill=tuple(int(a + (b - a) * ratio) for a, b in zip(start, end)))
+    draw.rectangle([width // 3, height // 3, 2 * width // 3, 2 * height // 3], outline='white', width=12)
+    draw.text((width // 2 - 20, height // 2 - 10), f'#{number}', fill='white')
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=80)
+    return buffer.getvalue()
+
+
+def _create_placeholders(seed, count):
+    """Enregistre les images de remplacement et leurs variantes (une référence chacune)"""
+    rng = random.Random(f'{seed}:placeholders')
+    placeholders = []
+    for number in range(count):
+        name = article_storage.save(f'articles/placeholder-{number}.jpg', ContentFile(_placeholder_image(rng, number)))
+        template = Article(images=name)
+        placeholders.append({'name': name, 'variants': generate_variants(template)})
+    return placeholders
+
+
+def _placeholder_files(placeholder):
+    names = [placeholder['name']]
+    for entries in placeholder['variants'].get('variants', {}).values():
+        names += [entry['name'] for entry in entries]
+    return names
+
+
+def _settle_placeholder_references(placeholders, usage):
+    """
+    Chaque article ajoute une référence aux fichiers de son image ; la référence
+    prise à la création des images de remplacement est ensuite libérée.
+    """
+    for number, placeholder in enumerate(placeholders):
+        for name in _placeholder_files(placeholder):
+            if usage[number]:
+                StoredFile.objects.filter(name=name).update(refcount=F('refcount') + usage[number])
+            article_storage.delete(name)
+
+
+def _seller_state(prefix, skew):
+    sellers = User.objects.filter(role='seller', username__startswith=prefix).order_by('username')
+    ids, joined = array('q'), []
+    for pk, date_joined in sellers.values_list('id', 'date_joined').iterator(chunk_size=10000):
+        ids.append(pk)
+        joined.append(date_joined)
+    return {'seller_ids': ids, 'seller_joined': joined, 'seller_weights': zipf_cumulative(len(ids), skew)}
+
+
+def _article_state(prefix, skew):
+    """Articles générés regroupés par vendeur (rang), avec leur date de création"""
+    rank = {pk: index for index, pk in enumerate(_STATE['seller_ids'])}
+    by_seller = {}
+    articles = (
+        Article.objects.filter(seller__username__startswith=prefix, seller__role='seller')
+        .order_by('created_at', 'id').values_list('id', 'seller_id', 'created_at')
+    )
+    for pk, seller_id, created_at in articles.iterator(chunk_size=10000):
+        ids, times = by_seller.setdefault(rank[seller_id], (array('q'), array('d')))
+        ids.append(pk)
+        times.append(created_at.timestamp())
+    # Seuls les vendeurs ayant des articles reçoivent des commandes, selon leur popularité
+    order_sellers = sorted(by_seller)
+    weights, total = array('d'), 0.0
+    for seller in order_sellers:
+        total += 1.0 / (seller + 1) ** skew
+        weights.append(total)
+    return {'articles_by_seller': by_seller, 'order_sellers': order_sellers, 'order_seller_weights': weights}
+
+
+def _recipient_state(prefix, skew):
+    """Destinataires : vendeurs (selon leur popularité), administrateurs et quelques clients"""
+    admins = list(User.objects.filter(role='admin', username__startswith=prefix).order_by('username')
+                  .values_list('id', flat=True))
+    clients = list(User.objects.filter(role='client', username__startswith=prefix).order_by('username')
+                   .values_list('id', flat=True)[:1000])
+    recipients = array('q', _STATE['seller_ids'])
+    weights, total = array('d'), 0.0
+    for rank in range(len(recipients)):
+        total += 0.7 / (rank + 1) ** skew
+        weights.append(total)
+    for group, share in ((admins, 0.2 * total), (clients, 0.1 * total)):
+        for pk in group:
+            total += share / len(group)
+            recipients.append(pk)
+            weights.append(total)
+    return {'recipient_ids': recipients, 'recipient_weights': weights}
+
+
+def default_workers():
+    # SQLite n'accepte qu'un écrivain à la fois : les processus supplémentaires attendraient
+    if connection.vendor == 'sqlite':
+        return 1
+    return os.cpu_count() or 1
+
+
+def generate(prefix=None, log=print, **options):
+    """
+    Génère le jeu de données décrit par `options` (voir DEFAULTS) et retourne
+    le nombre de lignes créées par table. `prefix` préfixe les noms
+    d'utilisateur (par défaut `gen<graine>_`).
+    """
+    config = {**DEFAULTS, **{key: value for key, value in options.items() if value is not None}}
+    prefix = prefix or f"gen{config['seed']}_"
+    if User.objects.filter(username__startswith=prefix).exists():
+        raise ValueError(f'Des utilisateurs « {prefix}… » existent déjà : choisissez une autre graine ou un préfixe')
+
+    statuses = list(config['status_mix'])
+    status_weights, total = [], 0.0
+    for status in statuses:
+        total += config['status_mix'][status]
+        status_weights.append(total)
+
+    _STATE.clear()
+    _STATE.update(config, prefix=prefix, now=timezone.now(), max_age=config['days'] * 86400,
+                  workers=config['workers'] or default_workers(), statuses=statuses,
+                  status_weights=status_weights,
+                  password_hash=make_password(config['password'], salt=f"seed{config['seed']}"))
+    counts = Counter()
+    try:
+        with explicit_timestamps(Article._meta.get_field('created_at'), Order._meta.get_field('created_at'),
+                                 Notification._meta.get_field('created_at')):
+            log(f"Utilisateurs ({_STATE['workers']} processus)...")
+            counts.update(_run_table('users', config['admins'] + config['sellers'] + config['clients']))
+            _STATE.update(_seller_state(prefix, config['seller_skew']))
+
+            placeholders = []
+            if config['articles'] and config['sellers'] and config['image_ratio'] > 0 and config['placeholders']:
+                log('Images de remplacement...')
+                placeholders = _create_placeholders(config['seed'], config['placeholders'])
+            _STATE['placeholders'] = placeholders
+
+            log('Articles...')
+            if config['sellers']:
+                usage = _run_table('articles', config['articles'])
+                counts['articles'] = usage.pop('articles', 0)
+                _settle_placeholder_references(placeholders, usage)
+
+            _STATE.update(_article_state(prefix, config['seller_skew']))
+            if _STATE['order_sellers']:
+                log('Commandes...')
+                counts.update(_run_table('orders', config['orders']))
+
+            _STATE.update(_recipient_state(prefix, config['seller_skew']))
+            if _STATE['recipient_ids']:
+                log('Notifications...')
+                counts.update(_run_table('notifications', config['notifications']))
+    finally:
+        _STATE.clear()
+        connections.close_all()
+
+    # Données dérivées habituellement tenues à jour par les signaux
+    log("Index de recherche et statistiques...")
+    rebuild_index(batch_size=config['batch_size'])
+    rebuild()
+    reconcile()
+    unread.reconcile()
+    # Articles insérés sans signaux : index de suggestions à relire partout
+    invalidate(CATALOG, SELLERS, suggest.SUGGEST)
+    suggest.reset()
+    return dict(counts)
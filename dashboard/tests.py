@@ -1,3 +1,436 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core import signing
+from django.test import RequestFactory, TestCase, override_settings
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+
+from articles.models import Article, StoredFile
+from config.testing import QueryBudgetMixin
+from notifications.models import Notification
+from orders.models import Order
+from users.models import User
+from . import benchmark
+from .models import DailyStats, SellerStats
+from .pagination import CURSOR_SALT, CursorPaginator, paginate
+from .query_plans import explain_views
+from .rollups import rebuild
+from .seller_stats import reconcile, top_sellers
+from .stats import get_stats, time_series
+from .synthetic import generate
+
+
+class CursorPaginatorTests(TestCase):
+    def setUp(self):
+        seller = User.objects.create_user(username='vendeur', password='x', role='seller')
+        for index in range(7):
+            Article.objects.create(
+                title=f'Article {index}', description='Description de test',
+                price=Decimal(index % 3), seller=seller,
+            )
+        # Dates identiques : seul l'id départage les articles
+        Article.objects.update(created_at=timezone.now())
+
+    def walk(self, ordering):
+        paginator = CursorPaginator(Article.objects.all(), 3, ordering)
+        page = paginator.get_page()
+        pages = [list(page)]
+        while page.has_next():
+            page = paginator.get_page(cursor=page.next_cursor)
+            pages.append(list(page))
+        return paginator, page, pages
+
+    def test_forward_walk_covers_each_row_once_in_order(self):
+        orderings = [
+            (['-created_at'], ['-created_at', '-id']),
+            (['price'], ['price', 'id']),
+            (['-price'], ['-price', '-id']),
+        ]
+        for ordering, expected_ordering in orderings:
+            with self.subTest(ordering=ordering):
+                _, _, pages = self.walk(ordering)
+                rows = [article for page in pages for article in page]
+                self.assertEqual(rows, list(Article.objects.order_by(*expected_ordering)))
+                self.assertEqual([len(page) for page in pages], [3, 3, 1])
+
+    def test_previous_cursor_returns_previous_page(self):
+        paginator, last_page, pages = self.walk(['-created_at'])
+        page = paginator.get_page(cursor=last_page.previous_cursor)
+        self.assertEqual(list(page), pages[1])
+        self.assertEqual(page.number, 2)
+        page = paginator.get_page(cursor=page.previous_cursor)
+        self.assertEqual(list(page), pages[0])
+        self.assertFalse(page.has_previous())
+
+    def test_last_cursor_and_invalid_cursor(self):
+        paginator = CursorPaginator(Article.objects.all(), 3, ['-created_at'])
+        last = paginator.get_page(cursor=paginator.last_cursor())
+        # 7 articles, 3 par page : la dernière page ne contient que le reste
+        self.assertEqual(list(last), list(Article.objects.order_by('-created_at', '-id'))[-1:])
+        self.assertEqual(last.number, 3)
+        self.assertFalse(last.has_next())
+        self.assertEqual(paginator.get_page(cursor='falsifié').number, 1)
+
+    def test_paginate_keeps_filters_in_links(self):
+        request = RequestFactory().get('/', {'search': 'article', 'page': '2'})
+        page = paginate(request, Article.objects.all(), 3, ['-created_at'])
+        self.assertEqual(page.number, 2)
+        self.assertEqual(page.base_query, 'search=article&')
+        self.assertEqual(page.paginator.count_label, '7')
+        self.assertEqual(page.elided_page_range, [1, 2, 3])
+
+    @mock.patch('dashboard.pagination.APPROXIMATE_COUNT_THRESHOLD', 4)
+    def test_lower_bound_count_has_no_last_page(self):
+        # Au-delà du seuil sans estimation (SQLite) : total inconnu, navigation relative seulement
+        paginator = CursorPaginator(Article.objects.all(), 3, ['-created_at'], count_mode='approximate')
+        self.assertTrue(paginator.count_is_lower_bound)
+        self.assertEqual(paginator.count_label, '5+')
+        self.assertIsNone(paginator.num_pages)
+        self.assertIsNone(paginator.last_cursor())
+        page = paginator.get_page(number=2)
+        self.assertEqual(page.elided_page_range, [2])
+        self.assertIsNone(page.last_cursor)
+        self.assertTrue(page.has_next())
+        forged = signing.dumps({'d': 'last', 'p': 0}, salt=CURSOR_SALT)
+        self.assertEqual(paginator.get_page(cursor=forged).number, 1)
+
+
+class StatsQueryBudgetTests(TestCase):
+    """Le nombre de requêtes des dashboards ne doit pas dépendre du volume de données"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='x', role='admin')
+        cls.seller = User.objects.create_user(username='vendeur', password='x', role='seller')
+        User.objects.create_user(username='client', password='x', role='client')
+        for index in range(3):
+            article = Article.objects.create(
+                title=f'Article {index}', description='Description de test',
+                price=Decimal('10.00'), seller=cls.seller,
+            )
+            Order.objects.create(
+                article=article, seller=cls.seller, client_name='Client',
+                client_phone='0600000000', status=['pending', 'confirmed', 'cancelled'][index],
+            )
+
+    def test_get_stats_reads_rollups_in_one_query(self):
+        # cumuls du site + notifications
+        with self.assertNumQueries(2):
+            stats = get_stats()
+        self.assertEqual(stats['users']['by_role'], {'admin': 1, 'seller': 1, 'client': 1})
+        self.assertEqual(stats['orders']['by_status'], {'pending': 1, 'confirmed': 1, 'cancelled': 1})
+        self.assertEqual(stats['articles']['week'], 3)
+
+        with self.assertNumQueries(1):
+            seller_stats = get_stats(seller=self.seller)
+        self.assertEqual(seller_stats['orders']['total'], 3)
+
+    def test_admin_dashboard_query_budget(self):
+        self.client.force_login(self.admin)
+        # session + utilisateur, 2 agrégats, top vendeurs, articles et commandes récents
+        with self.assertNumQueries(7):
+            response = self.client.get(reverse('admin_dashboard'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_admin_stats_query_budget(self):
+        self.client.force_login(self.admin)
+        # session + utilisateur, 2 agrégats, top vendeurs
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('admin_stats'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_seller_dashboard_query_budget(self):
+        self.client.force_login(self.seller)
+        # session + utilisateur, 1 agrégat, notifications (listes chargées à part)
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('seller_dashboard'))
+        self.assertEqual(response.context['stats'].orders_pending, 1)
+
+
+class DailyStatsRollupTests(TestCase):
+    def snapshot(self):
+        return set(
+            DailyStats.objects.exclude(count=0).values_list('day', 'metric', 'dimension', 'seller_id', 'count')
+        )
+
+    def test_incremental_updates_match_full_rebuild(self):
+        seller = User.objects.create_user(username='vendeur', password='x', role='seller')
+        client = User.objects.create_user(username='client', password='x', role='client')
+        articles = [
+            Article.objects.create(title=f'Article {index}', description='Description',
+                                   price=Decimal('5.00'), seller=seller)
+            for index in range(3)
+        ]
+        orders = [
+            Order.objects.create(article=article, seller=seller, client_name='Client', client_phone='0600000000')
+            for article in articles
+        ]
+        orders[0].status = 'confirmed'
+        orders[0].save()
+        client.role = 'seller'
+        client.save()
+        articles[2].delete()
+
+        incremental = self.snapshot()
+        rebuild()
+        self.assertEqual(incremental, self.snapshot())
+
+        stats = get_stats(seller=seller)
+        self.assertEqual(stats['articles']['total'], 2)
+        self.assertEqual(stats['orders']['by_status'], {'pending': 1, 'confirmed': 1, 'cancelled': 0})
+
+    def test_time_series_fills_missing_days(self):
+        seller = User.objects.create_user(username='vendeur', password='x', role='seller')
+        Article.objects.create(title='Article', description='Description', price=Decimal('5.00'), seller=seller)
+        series = time_series('articles', days=7)
+        self.assertEqual(len(series['labels']), 7)
+        self.assertEqual(series['series']['total'], [0, 0, 0, 0, 0, 0, 1])
+
+    def test_timeseries_endpoint_requires_known_metric(self):
+        admin = User.objects.create_user(username='admin', password='x', role='admin')
+        self.client.force_login(admin)
+        url = reverse('admin_stats_timeseries')
+        self.assertEqual(self.client.get(url, {'metric': 'inconnue'}).status_code, 400)
+        response = self.client.get(url, {'metric': 'users', 'days': 3})
+        self.assertEqual(response.json()['series']['admin'], [0, 0, 1])
+
+
+class QueryPlanTests(TestCase):
+    def test_view_queries_use_indexes(self):
+        seller = User.objects.create_user(username='vendeur', password='x', role='seller')
+        admin = User.objects.create_user(username='admin', password='x', role='admin')
+        article = Article.objects.create(
+            title='Article', description='Description', price=Decimal('5.00'), seller=seller,
+        )
+        Order.objects.create(article=article, seller=seller, client_name='Client', client_phone='0600000000')
+
+        report = {view['view']: view for view in explain_views(seller, admin)}
+        for view in report.values():
+            self.assertEqual(view['status'], 200, view['view'])
+            for query in view['queries']:
+                self.assertEqual(query['full_scans'], [], query['sql'])
+        pending_indexes = {index for query in report['admin_orders_pending']['queries'] for index in query['indexes']}
+        self.assertIn('order_status_created', pending_indexes)
+
+
+class SyntheticDataTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def generate(self):
+        return generate(
+            log=lambda message: None, seed=7, admins=1, sellers=5, clients=5, articles=60,
+            orders=80, notifications=30, placeholders=2, image_ratio=0.5, workers=1,
+        )
+
+    def snapshot(self):
+        return sorted(Article.objects.values_list('seller__username', 'title', 'price'))
+
+    def test_generates_consistent_rows(self):
+        counts = self.generate()
+        self.assertEqual(counts, {'users': 11, 'articles': 60, 'orders': 80, 'notifications': 30})
+        self.assertFalse(Order.objects.exclude(seller=F('article__seller')).exists())
+        self.assertFalse(Order.objects.filter(created_at__lt=F('article__created_at')).exists())
+        # Une référence par article utilisant l'image de remplacement
+        for name in Article.objects.exclude(images='').values_list('images', flat=True).distinct():
+            self.assertEqual(
+                StoredFile.objects.get(name=name).refcount, Article.objects.filter(images=name).count(),
+            )
+        self.assertEqual(get_stats()['articles']['total'], 60)
+
+    def test_same_seed_gives_same_data(self):
+        self.generate()
+        first = self.snapshot()
+        User.objects.filter(username__startswith='gen7_').delete()
+        self.generate()
+        self.assertEqual(first, self.snapshot())
+
+
+class BenchmarkTests(TestCase):
+    def test_client_run_reports_latency_and_queries(self):
+        seller = User.objects.create_user(username='vendeur', password='x', role='seller')
+        admin = User.objects.create_user(username='admin', password='x', role='admin')
+        Article.objects.create(title='Lampe de bureau', description='Description', price=Decimal('5.00'), seller=seller)
+
+        items = benchmark.scenarios(seller, admin)
+        self.assertIn('home[price_range+search+seller+sort_by]', [item['name'] for item in items])
+        items = benchmark.select(items, ['home[search]', 'order_article', 'admin_orders*'])
+        report = benchmark.run(items, iterations=3, warmup=1, log=lambda name, result: None)
+
+        self.assertEqual(set(report['scenarios']), {'home[search]', 'order_article', 'admin_orders', 'admin_orders[status]'})
+        for result in report['scenarios'].values():
+            self.assertEqual(result['errors'], 0)
+            self.assertEqual(result['requests'], 3)
+            self.assertGreater(result['queries'], 0)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+        self.assertEqual(Order.objects.count(), 4)
+
+    def test_compare_flags_regressions(self):
+        def report(p95, queries):
+            return {'scenarios': {'home': {'p95_ms': p95, 'queries': queries, 'errors': 0}}}
+
+        self.assertEqual(benchmark.compare(report(10.5, 3), report(10, 3)), [])
+        # Bruit de moins de MIN_DELTA_MS ignoré même au-delà du seuil relatif
+        self.assertEqual(benchmark.compare(report(1.5, 3), report(1, 3)), [])
+        self.assertEqual(len(benchmark.compare(report(20, 4), report(10, 3))), 2)
+
+
+class ViewQueryBudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(username='vendeur', password='x', role='seller', whatsapp_number='+2250700')
+        self.admin = User.objects.create_user(username='admin', password='x', role='admin')
+        self.add_rows(3)
+
+    def add_rows(self, count):
+        for seller_index in range(2):
+            seller = User.objects.create_user(
+                username=f'vendeur_{User.objects.count()}', password='x', role='seller', whatsapp_number='+2250701',
+            )
+            for index in range(count):
+                article = Article.objects.create(
+                    title=f'Lampe {index}', description='Lampe de bureau en bon état',
+                    price=Decimal('120.00'), seller=seller if index % 2 else self.seller,
+                )
+                Order.objects.create(
+                    article=article, seller=article.seller, client_name='Client', client_phone='0600000000',
+                )
+        Notification.objects.bulk_create([
+            Notification(recipient=recipient, title='Titre', message='Message')
+            for recipient in User.objects.all()
+        ])
+
+    def test_catalog_budget(self):
+        home = reverse('home')
+        self.assertQueryBudget(4, home, grow=lambda: self.add_rows(10))
+        self.assertQueryBudget(5, home, data={'search': 'lampe', 'seller': self.seller.pk, 'price_range': '100-250'})
+        self.assertQueryBudget(6, home, user=self.seller)
+
+    def test_seller_dashboard_budget(self):
+        def grow():
+            self.add_rows(10)
+
+        self.assertQueryBudget(4, reverse('seller_dashboard'), user=self.seller, grow=grow)
+        self.assertQueryBudget(3, reverse('seller_articles_panel'), user=self.seller, grow=grow)
+        self.assertQueryBudget(3, reverse('seller_orders_panel'), user=self.seller, data={'status': 'pending'}, grow=grow)
+
+    def test_admin_views_budget(self):
+        for name, budget in (
+            ('admin_dashboard', 8), ('admin_users', 4), ('admin_articles', 5),
+            ('admin_orders', 5), ('admin_notifications', 4),
+        ):
+            with self.subTest(name):
+                self.assertQueryBudget(budget, reverse(name), user=self.admin, grow=lambda: self.add_rows(5))
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0)
+class SellerDashboardPanelTests(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(username='vendeur', password='x', role='seller')
+        article = Article.objects.create(title='Lampe', description='Lampe', price=Decimal('10.00'), seller=self.seller)
+        self.orders = [
+            Order.objects.create(
+                article=article, seller=self.seller, client_name=f'Client {index}', client_phone='0600000000',
+                status='confirmed' if index % 3 == 0 else 'pending',
+            )
+            for index in range(45)
+        ]
+        self.client.force_login(self.seller)
+
+    def walk(self, params):
+        """Identifiants des commandes affichées en suivant les liens « page suivante »"""
+        seen, params = [], dict(params)
+        while True:
+            response = self.client.get(reverse('seller_orders_panel'), params)
+            self.assertEqual(response.status_code, 200)
+            page = response.context['page_obj']
+            seen += [order.pk for order in page]
+            if not page.has_next():
+                return seen
+            params['cursor'] = page.next_cursor
+
+    def test_cursor_pages_cover_each_order_once(self):
+        expected = [order.pk for order in sorted(self.orders, key=lambda order: (order.created_at, order.pk), reverse=True)]
+        self.assertEqual(self.walk({}), expected)
+
+    def test_status_tab_filters_orders(self):
+        confirmed = self.walk({'status': 'confirmed'})
+        self.assertEqual(sorted(confirmed), sorted(order.pk for order in self.orders if order.status == 'confirmed'))
+        # Statut inconnu : onglet « Toutes »
+        response = self.client.get(reverse('seller_orders_panel'), {'status': 'inconnu'})
+        self.assertEqual(response.context['status'], '')
+
+    def test_panels_are_reserved_to_sellers(self):
+        client = User.objects.create_user(username='client', password='x', role='client')
+        self.client.force_login(client)
+        self.assertEqual(self.client.get(reverse('seller_articles_panel')).status_code, 403)
+        self.assertEqual(self.client.get(reverse('seller_orders_panel')).status_code, 403)
+
+
+class SellerStatsTests(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(username='vendeur', password='x', role='seller')
+        self.other = User.objects.create_user(username='autre', password='x', role='seller')
+
+    def counters(self, seller):
+        return SellerStats.objects.values(
+            'articles_count', 'orders_count', 'orders_pending', 'orders_confirmed', 'orders_cancelled'
+        ).get(seller=seller)
+
+    def test_counters_follow_articles_and_orders(self):
+        articles = [
+            Article.objects.create(title=f'Article {index}', description='Description',
+                                   price=Decimal('5.00'), seller=self.seller)
+            for index in range(3)
+        ]
+        orders = [
+            Order.objects.create(article=article, seller=self.seller, client_name='Client', client_phone='0600000000')
+            for article in articles
+        ]
+        orders[0].status = 'confirmed'
+        orders[0].save()
+        orders[1].status = 'cancelled'
+        orders[1].save(update_fields=['status'])
+        orders[2].delete()
+        articles[2].delete()
+
+        self.assertEqual(self.counters(self.seller), {
+            'articles_count': 2, 'orders_count': 2, 'orders_pending': 0, 'orders_confirmed': 1, 'orders_cancelled': 1,
+        })
+        self.assertEqual(reconcile(apply=False), [])
+
+    def test_reconcile_fixes_drift(self):
+        # bulk_create n'envoie pas de signaux : compteurs absents puis corrigés
+        Article.objects.bulk_create([
+            Article(title='Lampe', description='Lampe', price=Decimal('5.00'), seller=self.other) for _ in range(2)
+        ])
+        article = Article.objects.create(title='Chaise', description='Chaise', price=Decimal('5.00'), seller=self.seller)
+        SellerStats.objects.filter(seller=self.seller).update(articles_count=F('articles_count') + 5)
+
+        drift = reconcile()
+        self.assertEqual(drift, [
+            (self.seller.pk, {'articles_count': (6, 1)}),
+            (self.other.pk, {'articles_count': (0, 2)}),
+        ])
+        self.assertEqual(self.counters(self.other)['articles_count'], 2)
+        self.assertEqual(reconcile(), [])
+        article.delete()
+        self.assertEqual(self.counters(self.seller)['articles_count'], 0)
+
+    def test_top_sellers_uses_counters(self):
+        for seller, count in ((self.seller, 1), (self.other, 2)):
+            for _ in range(count):
+                Article.objects.create(title='Lampe', description='Lampe', price=Decimal('5.00'), seller=seller)
+        self.other.role = 'client'
+        self.other.save()
+
+        with self.assertNumQueries(1):
+            leaders = [entry.seller.username for entry in top_sellers(5)]
+        self.assertEqual(leaders, ['vendeur'])
@@ -1,9 +1,9 @@
 from django.urls import path
 from .views import (
-    home, seller_dashboard, edit_article, delete_article, order_detail,
+    home, seller_dashboard, seller_articles_panel, seller_orders_panel, edit_article, delete_article, order_detail,
     admin_dashboard, admin_users, admin_user_toggle_status, admin_user_change_role,
     admin_articles, admin_article_delete, admin_orders, admin_notifications,
-    admin_notification_mark_read, admin_stats
+    admin_notification_mark_read, admin_notifications_bulk, admin_stats, admin_stats_timeseries
 )
 
 urlpatterns = [
@@ -12,6 +12,8 @@ urlpatterns = [
 
     # Dashboard vendeur
     path('dashboard/', seller_dashboard, name='seller_dashboard'),
+    path('dashboard/panels/articles/', seller_articles_panel, name='seller_articles_panel'),
+    path('dashboard/panels/orders/', seller_orders_panel, name='seller_orders_panel'),
     path('dashboard/article/<int:article_id>/edit/', edit_article, name='edit_article'),
     path('dashboard/article/<int:article_id>/delete/', delete_article, name='delete_article'),
     path('dashboard/order/<int:order_id>/', order_detail, name='order_detail'),
@@ -25,6 +27,8 @@ urlpatterns = [
     path('admin-dashboard/articles/<int:article_id>/delete/', admin_article_delete, name='admin_article_delete'),
     path('admin-dashboard/orders/', admin_orders, name='admin_orders'),
     path('admin-dashboard/notifications/', admin_notifications, name='admin_notifications'),
+    path('admin-dashboard/notifications/bulk/', admin_notifications_bulk, name='admin_notifications_bulk'),
     path('admin-dashboard/notifications/<int:notification_id>/mark-read/', admin_notification_mark_read, name='admin_notification_mark_read'),
     path('admin-dashboard/stats/', admin_stats, name='admin_stats'),
+    path('admin-dashboard/stats/timeseries/', admin_stats_timeseries, name='admin_stats_timeseries'),
 ]
@@ -1,32 +1,36 @@
 
 from articles.models import Article
-from articles.forms import ArticleSearchForm
+from articles.forms import ArticleSearchForm, SellerFilterForm, save_with_deferred_image
+from articles.search import search_articles
+from articles.facets import compute_facets, price_range_condition
+from articles.cache import CATALOG, cache_anonymous_page
 from orders.models import Order
 from notifications.models import Notification
+from notifications import stream, unread
 from users.models import User
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.paginator import Paginator
-from django.db.models import Q, Count, Sum
+from django.http import HttpResponseForbidden, JsonResponse
+from . import seller_stats
+from .pagination import paginate
+from .models import DailyStats
+from .stats import get_stats, time_series
+from django.db.models import Q, Sum
 from django.contrib import messages
-from django.utils import timezone
-from datetime import timedelta
 from django import forms
 
+@cache_anonymous_page(lambda request: [CATALOG])
 def home(request):
     """Page d'accueil avec recherche et filtres"""
     form = ArticleSearchForm(request.GET or None)
-    articles = Article.objects.all()
+    articles = Article.objects.for_cards()
 
     # Appliquer les filtres si le formulaire est valide
     if form.is_valid():
-        # Recherche textuelle
+        # Recherche plein texte (annote les résultats avec search_rank)
         search = form.cleaned_data.get('search')
         if search:
-            articles = articles.filter(
-                Q(title__icontains=search) |
-                Q(description__icontains=search)
-            )
+            articles = search_articles(articles, search)
 
         # Filtre par vendeur
         seller = form.cleaned_data.get('seller')
@@ -36,18 +40,7 @@ def home(request):
         # Filtre par gamme de prix prédéfinie
         price_range = form.cleaned_data.get('price_range')
         if price_range:
-            if price_range == '0-50':
-                articles = articles.filter(price__lt=50)
-            elif price_range == '50-100':
-                articles = articles.filter(price__gte=50, price__lt=100)
-            elif price_range == '100-250':
-                articles = articles.filter(price__gte=100, price__lt=250)
-            elif price_range == '250-500':
-                articles = articles.filter(price__gte=250, price__lt=500)
-            elif price_range == '500-1000':
-                articles = articles.filter(price__gte=500, price__lt=1000)
-            elif price_range == '1000+':
-                articles = articles.filter(price__gte=1000)
+            articles = articles.filter(price_range_condition(price_range))
 
         # Filtre par prix personnalisé
         min_price = form.cleaned_data.get('min_price')
@@ -57,29 +50,42 @@ def home(request):
         if max_price:
             articles = articles.filter(price__lte=max_price)
 
-        # Tri
+        # Tri (l'id est ajouté par le paginateur pour départager les égalités)
         sort_by = form.cleaned_data.get('sort_by')
         if sort_by:
-            articles = articles.order_by(sort_by)
+            ordering = [sort_by]
+        elif search:
+            # Sans tri explicite, les résultats les plus pertinents d'abord
+            ordering = ['-search_rank', '-created_at']
         else:
-            articles = articles.order_by('-created_at')
+            ordering = ['-created_at']
     else:
         # Par défaut, trier par date de création décroissante
-        articles = articles.order_by('-created_at')
+        ordering = ['-created_at']
 
-    # Pagination
-    paginator = Paginator(articles, 12)  # 12 articles par page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Pagination par curseur, 12 articles par page
+    page_obj = paginate(request, articles, 12, ordering)
 
     # Statistiques pour l'affichage
-    total_articles = articles.count()
+    total_articles = page_obj.paginator.count
+
+    # Nombre de résultats par gamme de prix et par vendeur (une requête groupée, en cache)
+    facets = compute_facets(form.cleaned_data if form.is_valid() else {})
+    form.show_facets(facets)
+    top_sellers = []
+    if form.fields['seller'].is_autocomplete:
+        labels = dict(form.fields['seller'].choices)
+        top_sellers = [
+            {'id': seller_id, 'label': labels.get(seller_id, ''), 'count': count}
+            for seller_id, count in sorted(facets['seller'].items(), key=lambda item: -item[1])[:5]
+        ]
 
     context = {
         'form': form,
         'page_obj': page_obj,
         'articles': page_obj,  # Pour compatibilité avec le template existant
         'total_articles': total_articles,
+        'top_sellers': top_sellers,
         'page_title': 'Bienvenue sur Articlo',
         'has_filters': any([
             form.cleaned_data.get('search') if form.is_valid() else False,
@@ -99,7 +105,7 @@ class OrderStatusForm(forms.ModelForm):
 @login_required
 def order_detail(request, order_id):
     user = request.user
-    order = get_object_or_404(Order, id=order_id, seller=user)
+    order = get_object_or_404(Order.objects.select_related('article'), id=order_id, seller=user)
     if request.method == 'POST':
         form = OrderStatusForm(request.POST, instance=order)
         if form.is_valid():
@@ -129,35 +135,74 @@ def edit_article(request, article_id):
     if request.method == 'POST':
         form = ArticleForm(request.POST, request.FILES, instance=article)
         if form.is_valid():
-            form.save()
+            save_with_deferred_image(form)
             return redirect('seller_dashboard')
     else:
         form = ArticleForm(instance=article)
     return render(request, 'dashboard/edit_article.html', {'form': form, 'article': article})
 
+# Lignes par page des listes du tableau de bord vendeur
+SELLER_PANEL_SIZE = 20
+
+
 @login_required
 def seller_dashboard(request):
+    """
+    Tableau de bord vendeur : compteurs du vendeur (une ligne SellerStats) et
+    notifications récentes. Les listes d'articles et de commandes sont chargées
+    à part, page par page (seller_articles_panel / seller_orders_panel).
+    """
     user = request.user
     if user.role != 'seller':
         return render(request, 'dashboard/not_authorized.html')
-    articles = Article.objects.filter(seller=user)
-    orders = Order.objects.filter(seller=user)
-    notifications = Notification.objects.filter(recipient=user).order_by('-created_at')[:10]
-    stats = {
-        'articles_count': articles.count(),
-        'orders_count': orders.count(),
-        'orders_pending': orders.filter(status='pending').count(),
-        'orders_confirmed': orders.filter(status='confirmed').count(),
-    }
+    notifications = list(
+        Notification.objects.filter(recipient=user)
+        .only('id', 'title', 'message', 'is_read', 'created_at').order_by('-created_at')[:10]
+    )
     context = {
-        'articles': articles,
-        'orders': orders,
         'notifications': notifications,
-        'stats': stats,
+        'notification_stream_url': stream.url(user, notifications[0].pk if notifications else 0),
+        'stats': seller_stats.for_seller(user),
     }
     return render(request, 'dashboard/seller_dashboard.html', context)
 
 
+@login_required
+def seller_articles_panel(request):
+    """Fragment HTML : une page des articles du vendeur"""
+    if request.user.role != 'seller':
+        return HttpResponseForbidden()
+    articles = Article.objects.filter(seller=request.user).only('id', 'title', 'price', 'created_at')
+    page_obj = paginate(request, articles, SELLER_PANEL_SIZE, ['-created_at'])
+    return render(request, 'dashboard/panels/seller_articles.html', {
+        'page_obj': page_obj,
+        'panel_url': request.path,
+    })
+
+
+@login_required
+def seller_orders_panel(request):
+    """Fragment HTML : une page des commandes reçues, filtrées par statut (onglets)"""
+    if request.user.role != 'seller':
+        return HttpResponseForbidden()
+    orders = (
+        Order.objects.filter(seller=request.user).select_related('article')
+        .only('id', 'client_name', 'status', 'created_at', 'article__id', 'article__title')
+    )
+    status = request.GET.get('status', '')
+    if status in dict(Order.STATUS_CHOICES):
+        orders = orders.filter(status=status)
+    else:
+        status = ''
+    page_obj = paginate(request, orders, SELLER_PANEL_SIZE, ['-created_at'])
+    return render(request, 'dashboard/panels/seller_orders.html', {
+        'page_obj': page_obj,
+        'panel_url': request.path,
+        'status': status,
+        'statuses': Order.STATUS_CHOICES,
+    })
+
+
 # ============================================================================
 # VUES ADMIN
 # ============================================================================
@@ -177,53 +222,20 @@ def admin_required(view_func):
 @admin_required
 def admin_dashboard(request):
     """Dashboard principal pour les administrateurs"""
-    # Statistiques générales
-    total_users = User.objects.count()
-    total_sellers = User.objects.filter(role='seller').count()
-    total_clients = User.objects.filter(role='client').count()
-    total_articles = Article.objects.count()
-    total_orders = Order.objects.count()
-
-    # Statistiques des 30 derniers jours
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    new_users_30d = User.objects.filter(date_joined__gte=thirty_days_ago).count()
-    new_articles_30d = Article.objects.filter(created_at__gte=thirty_days_ago).count()
-    new_orders_30d = Order.objects.filter(created_at__gte=thirty_days_ago).count()
-
-    # Statistiques des commandes par statut
-    orders_pending = Order.objects.filter(status='pending').count()
-    orders_confirmed = Order.objects.filter(status='confirmed').count()
-    orders_cancelled = Order.objects.filter(status='cancelled').count()
-
-    # Top vendeurs (par nombre d'articles)
-    top_sellers = User.objects.filter(role='seller').annotate(
-        articles_count=Count('articles')
-    ).order_by('-articles_count')[:5]
+    # Statistiques générales (une requête agrégée par table)
+    stats = get_stats()
+
+    # Top vendeurs (par nombre d'articles), lus dans les compteurs SellerStats
+    top_sellers = seller_stats.top_sellers(5)
 
     # Articles récents
-    recent_articles = Article.objects.select_related('seller').order_by('-created_at')[:5]
+    recent_articles = Article.objects.for_cards().order_by('-created_at')[:5]
 
     # Commandes récentes
     recent_orders = Order.objects.select_related('article', 'seller').order_by('-created_at')[:5]
 
-    # Notifications non lues
-    unread_notifications = Notification.objects.filter(is_read=False).count()
-
     context = {
-        'stats': {
-            'total_users': total_users,
-            'total_sellers': total_sellers,
-            'total_clients': total_clients,
-            'total_articles': total_articles,
-            'total_orders': total_orders,
-            'new_users_30d': new_users_30d,
-            'new_articles_30d': new_articles_30d,
-            'new_orders_30d': new_orders_30d,
-            'orders_pending': orders_pending,
-            'orders_confirmed': orders_confirmed,
-            'orders_cancelled': orders_cancelled,
-            'unread_notifications': unread_notifications,
-        },
+        'stats': stats,
         'top_sellers': top_sellers,
         'recent_articles': recent_articles,
         'recent_orders': recent_orders,
@@ -253,12 +265,8 @@ def admin_users(request):
             Q(last_name__icontains=search)
         )
 
-    users = users.order_by('-date_joined')
-
     # Pagination
-    paginator = Paginator(users, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, users, 20, ['-date_joined'])
 
     context = {
         'page_obj': page_obj,
@@ -313,10 +321,11 @@ def admin_user_change_role(request, user_id):
 def admin_articles(request):
     """Gestion des articles"""
     # Filtres
-    seller_filter = request.GET.get('seller', '')
+    seller_form = SellerFilterForm(request.GET)
+    seller_filter = seller_form.cleaned_data['seller'] if seller_form.is_valid() else None
     search = request.GET.get('search', '')
 
-    articles = Article.objects.select_related('seller').all()
+    articles = Article.objects.for_cards()
 
     if seller_filter:
         articles = articles.filter(seller_id=seller_filter)
@@ -327,21 +336,13 @@ def admin_articles(request):
             Q(description__icontains=search)
         )
 
-    articles = articles.order_by('-created_at')
-
     # Pagination
-    paginator = Paginator(articles, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-
-    # Liste des vendeurs pour le filtre
-    sellers = User.objects.filter(role='seller').order_by('username')
+    page_obj = paginate(request, articles, 20, ['-created_at'])
 
     context = {
         'page_obj': page_obj,
         'articles': page_obj,
-        'sellers': sellers,
-        'seller_filter': seller_filter,
+        'seller_form': seller_form,
         'search': search,
         'page_title': 'Gestion des articles'
     }
@@ -373,10 +374,15 @@ def admin_orders(request):
     """Gestion des commandes"""
     # Filtres
     status_filter = request.GET.get('status', '')
-    seller_filter = request.GET.get('seller', '')
+    seller_form = SellerFilterForm(request.GET)
+    seller_filter = seller_form.cleaned_data['seller'] if seller_form.is_valid() else None
     search = request.GET.get('search', '')
 
-    orders = Order.objects.select_related('article', 'seller').all()
+    orders = Order.objects.select_related('article', 'seller').only(
+        'id', 'client_name', 'client_phone', 'client_email', 'message', 'status', 'created_at',
+        'article__id', 'article__title', 'article__price', 'article__images', 'article__image_variants',
+        'article__pending_image', 'seller__id', 'seller__username', 'seller__first_name', 'seller__last_name',
+    )
 
     if status_filter:
         orders = orders.filter(status=status_filter)
@@ -392,24 +398,18 @@ def admin_orders(request):
             Q(article__title__icontains=search)
         )
 
-    orders = orders.order_by('-created_at')
-
     # Pagination
-    paginator = Paginator(orders, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, orders, 20, ['-created_at'])
 
     # Listes pour les filtres
-    sellers = User.objects.filter(role='seller').order_by('username')
     status_choices = Order.STATUS_CHOICES
 
     context = {
         'page_obj': page_obj,
         'orders': page_obj,
-        'sellers': sellers,
+        'seller_form': seller_form,
         'status_choices': status_choices,
         'status_filter': status_filter,
-        'seller_filter': seller_filter,
         'search': search,
         'page_title': 'Gestion des commandes'
     }
@@ -417,33 +417,81 @@ def admin_orders(request):
     return render(request, 'dashboard/admin_orders.html', context)
 
 
+class NotificationBulkForm(forms.Form):
+    """Action groupée sur les notifications cochées (ou sur toutes celles de l'administrateur)"""
+    ACTIONS = [
+        ('mark_read', 'Marquer comme lues'),
+        ('delete', 'Supprimer'),
+        ('mark_all_read', 'Marquer les miennes comme lues'),
+    ]
+    action = forms.ChoiceField(choices=ACTIONS)
+    notifications = forms.ModelMultipleChoiceField(queryset=Notification.objects.all(), required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get('action') in ('mark_read', 'delete') and not cleaned_data.get('notifications'):
+            raise forms.ValidationError('Aucune notification sélectionnée.')
+        return cleaned_data
+
+
 @admin_required
 def admin_notifications(request):
     """Gestion des notifications"""
-    notifications = Notification.objects.select_related('recipient').order_by('-created_at')
+    notifications = Notification.objects.select_related('recipient').only(
+        'id', 'title', 'message', 'is_read', 'created_at', 'recipient__id', 'recipient__username',
+        'recipient__first_name', 'recipient__last_name', 'recipient__role',
+    )
 
     # Pagination
-    paginator = Paginator(notifications, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, notifications, 20, ['-created_at'])
 
     context = {
         'page_obj': page_obj,
         'notifications': page_obj,
+        'bulk_actions': NotificationBulkForm.ACTIONS,
         'page_title': 'Gestion des notifications'
     }
 
     return render(request, 'dashboard/admin_notifications.html', context)
 
 
+@admin_required
+def admin_notifications_bulk(request):
+    """
+    Actions groupées : notifications cochées marquées comme lues ou
+    supprimées, ou toutes celles de l'administrateur connecté marquées comme
+    lues (par lots, voir notifications/unread.py).
+    """
+    if request.method != 'POST':
+        return redirect('admin_notifications')
+    form = NotificationBulkForm(request.POST)
+    if not form.is_valid():
+        for error in form.non_field_errors() or ['Action invalide.']:
+            messages.error(request, error)
+        return redirect('admin_notifications')
+
+    action = form.cleaned_data['action']
+    selected = form.cleaned_data['notifications']
+    if action == 'mark_all_read':
+        count = unread.mark_all_read(request.user)
+        messages.success(request, f'{count} notification(s) marquée(s) comme lue(s).')
+    elif action == 'mark_read':
+        count = unread.mark_read(selected)
+        messages.success(request, f'{count} notification(s) marquée(s) comme lue(s).')
+    else:
+        count = unread.delete(selected)
+        messages.success(request, f'{count} notification(s) supprimée(s).')
+    return redirect('admin_notifications')
+
+
 @admin_required
 def admin_notification_mark_read(request, notification_id):
     """Marquer une notification comme lue"""
-    notification = get_object_or_404(Notification, id=notification_id)
+    notification = get_object_or_404(Notification.objects.only('id'), id=notification_id)
 
     if request.method == 'POST':
-        notification.is_read = True
-        notification.save()
+        # Décrémente le compteur de non lues du destinataire (une seule fois)
+        unread.mark_read(Notification.objects.filter(pk=notification.pk))
         messages.success(request, 'Notification marquée comme lue.')
 
     return redirect('admin_notifications')
@@ -452,44 +500,11 @@ def admin_notification_mark_read(request, notification_id):
 @admin_required
 def admin_stats(request):
     """Statistiques détaillées"""
-    # Statistiques par période
-    today = timezone.now().date()
-    week_ago = today - timedelta(days=7)
-    month_ago = today - timedelta(days=30)
-
-    stats = {
-        'users': {
-            'total': User.objects.count(),
-            'week': User.objects.filter(date_joined__date__gte=week_ago).count(),
-            'month': User.objects.filter(date_joined__date__gte=month_ago).count(),
-            'by_role': {
-                'admin': User.objects.filter(role='admin').count(),
-                'seller': User.objects.filter(role='seller').count(),
-                'client': User.objects.filter(role='client').count(),
-            }
-        },
-        'articles': {
-            'total': Article.objects.count(),
-            'week': Article.objects.filter(created_at__date__gte=week_ago).count(),
-            'month': Article.objects.filter(created_at__date__gte=month_ago).count(),
-        },
-        'orders': {
-            'total': Order.objects.count(),
-            'week': Order.objects.filter(created_at__date__gte=week_ago).count(),
-            'month': Order.objects.filter(created_at__date__gte=month_ago).count(),
-            'by_status': {
-                'pending': Order.objects.filter(status='pending').count(),
-                'confirmed': Order.objects.filter(status='confirmed').count(),
-                'cancelled': Order.objects.filter(status='cancelled').count(),
-            }
-        }
-    }
+    # Statistiques par période (une requête agrégée par table)
+    stats = get_stats()
 
     # Top vendeurs
-    top_sellers = User.objects.filter(role='seller').annotate(
-        articles_count=Count('articles'),
-        orders_count=Count('received_orders')
-    ).order_by('-articles_count', '-orders_count')[:10]
+    top_sellers = seller_stats.top_sellers(10)
 
     context = {
         'stats': stats,
@@ -498,3 +513,22 @@ def admin_stats(request):
     }
 
     return render(request, 'dashboard/admin_stats.html', context)
+
+
+@admin_required
+def admin_stats_timeseries(request):
+    """Série journalière (JSON) d'une métrique pour les graphiques de statistiques"""
+    metric = request.GET.get('metric', 'orders')
+    if metric not in dict(DailyStats.METRIC_CHOICES):
+        return JsonResponse({'error': 'Métrique inconnue.'}, status=400)
+
+    try:
+        days = min(max(int(request.GET.get('days', 30)), 1), 365)
+    except ValueError:
+        days = 30
+
+    seller = None
+    if request.GET.get('seller'):
+        seller = get_object_or_404(User, id=request.GET['seller'], role='seller')
+
+    return JsonResponse(time_series(metric, days=days, seller=seller))
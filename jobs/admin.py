@@ -0,0 +1,17 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'run_at', 'locked_by', 'created_at')
+    list_filter = ('status', 'name')
+    readonly_fields = ('payload', 'last_error', 'locked_at', 'locked_by', 'created_at')
+    actions = ['retry']
+
+    @admin.action(description='Relancer les tâches sélectionnées')
+    def retry(self, request, queryset):
+        queryset.exclude(status='running').update(
+            status='pending', attempts=0, last_error='', run_at=timezone.now()
+        )
@@ -0,0 +1,41 @@
+import signal
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from jobs.queue import release_stale, run_pending, worker_name
+
+
+class Command(BaseCommand):
+    help = "Exécute les tâches en arrière-plan (file en base de données)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Traiter les tâches dues puis quitter')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Attente (s) quand la file est vide')
+        parser.add_argument('--batch-size', type=int, default=10, help='Tâches réservées par passage')
+        parser.add_argument('--stale-after', type=int, default=600,
+                            help='Délai (s) après lequel une tâche « en cours » est remise en file')
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        worker = worker_name()
+        stale_after = timedelta(seconds=options['stale_after'])
+        self.stdout.write(f'Worker {worker} démarré.')
+        processed = 0
+        while not self.stopping:
+            release_stale(stale_after)
+            count = run_pending(worker, options['batch_size'])
+            processed += count
+            if options['once'] and not count:
+                break
+            if not count:
+                time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(f'{processed} tâche(s) exécutée(s).'))
+
+    def stop(self, signum, frame):
+        # Termine la tâche en cours avant de quitter
+        self.stopping = True
@@ -0,0 +1,121 @@
+"""
+File de tâches en base de données, sans broker externe.
+
+Les tâches sont des fonctions déclarées dans le module `tasks.py` d'une
+application avec le décorateur `@task('nom')`, puis mises en file avec
+`enqueue('nom', **arguments)` : la ligne Job est créée dans la transaction
+courante et n'est visible du worker qu'après son commit.
+
+Le worker (`python manage.py run_jobs`) réserve les tâches dues par une mise à
+jour conditionnelle (`status='pending'` → `'running'`), ce qui permet à
+plusieurs workers de se partager la file sans verrou applicatif. Une tâche en
+erreur est relancée avec un délai croissant jusqu'à `max_attempts`.
+
+Avec JOBS_INLINE=True (tests, développement sans worker), la tâche est
+exécutée dans le processus courant juste après le commit.
+"""
+
+import logging
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+# Délai avant nouvelle tentative : RETRY_DELAY * 2^(tentatives - 1)
+RETRY_DELAY = timedelta(seconds=30)
+
+
+def task(name):
+    """Déclare une fonction comme tâche exécutable par le worker"""
+    def decorator(func):
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def get_task(name):
+    return _registry[name]
+
+
+def enqueue(name, delay=None, max_attempts=3, **payload):
+    """Met une tâche en file ; le payload doit être sérialisable en JSON"""
+    if name not in _registry:
+        raise KeyError(f"Tâche inconnue : {name}")
+    job = Job.objects.create(
+        name=name, payload=payload, max_attempts=max_attempts,
+        run_at=timezone.now() + (delay or timedelta()),
+    )
+    if getattr(settings, 'JOBS_INLINE', False):
+        transaction.on_commit(lambda: run_job(job.pk, worker='inline'))
+    return job
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim(worker, limit=10):
+    """Réserve jusqu'à `limit` tâches dues pour ce worker et retourne leurs ids"""
+    due = Job.objects.filter(status='pending', run_at__lte=timezone.now()).values_list('id', flat=True)
+    claimed = []
+    for job_id in due[:limit]:
+        # Mise à jour conditionnelle : un seul worker obtient la tâche
+        if Job.objects.filter(pk=job_id, status='pending').update(
+            status='running', locked_at=timezone.now(), locked_by=worker, attempts=F('attempts') + 1,
+        ):
+            claimed.append(job_id)
+    return claimed
+
+
+def run_job(job_id, worker=None):
+    """Exécute une tâche réservée (ou, en mode inline, une tâche en attente)"""
+    if worker == 'inline':
+        claimed = Job.objects.filter(pk=job_id, status='pending').update(
+            status='running', locked_at=timezone.now(), locked_by=worker, attempts=F('attempts') + 1,
+        )
+        if not claimed:
+            return False
+    job = Job.objects.get(pk=job_id)
+    try:
+        get_task(job.name)(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception('Échec de la tâche %s', job)
+        if job.attempts >= job.max_attempts:
+            Job.objects.filter(pk=job.pk).update(status='failed', last_error=error, locked_at=None)
+        else:
+            Job.objects.filter(pk=job.pk).update(
+                status='pending', last_error=error, locked_at=None, locked_by='',
+                run_at=timezone.now() + RETRY_DELAY * 2 ** (job.attempts - 1),
+            )
+        return False
+    # Les tâches terminées ne sont pas conservées
+    Job.objects.filter(pk=job.pk).delete()
+    return True
+
+
+def release_stale(timeout):
+    """Remet en file les tâches restées « en cours » (worker arrêté brutalement)"""
+    return Job.objects.filter(status='running', locked_at__lt=timezone.now() - timeout).update(
+        status='pending', locked_at=None, locked_by='',
+    )
+
+
+def run_pending(worker=None, limit=10):
+    """Réserve et exécute les tâches dues ; retourne le nombre de tâches traitées"""
+    worker = worker or worker_name()
+    job_ids = claim(worker, limit)
+    for job_id in job_ids:
+        run_job(job_id, worker)
+    return len(job_ids)
@@ -0,0 +1,69 @@
+import io
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import Job
+from .queue import claim, enqueue, release_stale, run_pending, task
+
+calls = []
+
+
+@task('tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task('tests.fail')
+def fail():
+    raise RuntimeError('échec')
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_worker_runs_due_jobs_and_removes_them(self):
+        enqueue('tests.record', value=1)
+        enqueue('tests.record', value=2, delay=timedelta(hours=1))
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls, [1])
+        self.assertEqual(list(Job.objects.values_list('status', flat=True)), ['pending'])
+
+    def test_job_is_claimed_by_a_single_worker(self):
+        enqueue('tests.record', value=1)
+        self.assertEqual(len(claim('worker-a')), 1)
+        self.assertEqual(claim('worker-b'), [])
+
+    def test_failures_are_retried_with_backoff_then_marked_failed(self):
+        job = enqueue('tests.fail', max_attempts=2)
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('pending', 1))
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('RuntimeError', job.last_error)
+
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+
+    def test_stale_running_jobs_are_released(self):
+        enqueue('tests.record', value=1)
+        claim('worker-a')
+        Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(release_stale(timedelta(minutes=10)), 1)
+        call_command('run_jobs', '--once', stdout=io.StringIO())
+        self.assertEqual(calls, [1])
+
+    @override_settings(JOBS_INLINE=True)
+    def test_inline_mode_runs_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue('tests.record', value=3)
+            self.assertEqual(calls, [])
+        self.assertEqual(calls, [3])
+        self.assertFalse(Job.objects.exists())
@@ -1,9 +1,54 @@
 from django.contrib import admin
 
-from .models import Notification
+from . import unread
+from .models import Notification, NotificationArchive, NotificationDigest
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
+    """
+    Les suppressions et les changements de `is_read` passent par
+    notifications/unread.py pour garder les compteurs de non lues exacts.
+    """
     list_display = ('title', 'recipient', 'is_read', 'created_at')
     list_filter = ('is_read', 'recipient', 'created_at')
     search_fields = ('title', 'message', 'recipient__username')
+
+    def get_readonly_fields(self, request, obj=None):
+        # Changer de destinataire fausserait les deux compteurs
+        return ('recipient',) if obj else ()
+
+    def save_model(self, request, obj, form, change):
+        read_changed = change and 'is_read' in form.changed_data
+        if read_changed:
+            # Ancien état enregistré tel quel, le nouveau est appliqué ci-dessous
+            obj.is_read = not obj.is_read
+        super().save_model(request, obj, form, change)
+        notification = Notification.objects.filter(pk=obj.pk)
+        if not change:
+            if not obj.is_read:
+                unread.increment([obj.recipient_id])
+        elif read_changed and not obj.is_read:
+            unread.mark_read(notification)
+            obj.is_read = True
+        elif read_changed:
+            if notification.filter(is_read=True).update(is_read=False):
+                unread.increment([obj.recipient_id])
+            obj.is_read = False
+
+    def delete_model(self, request, obj):
+        unread.delete(Notification.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        unread.delete(queryset)
+
+
+@admin.register(NotificationArchive)
+class NotificationArchiveAdmin(admin.ModelAdmin):
+    list_display = ('title', 'recipient', 'created_at', 'archived_at')
+    list_filter = ('archived_at',)
+    search_fields = ('title', 'message', 'recipient__username')
+
+
+@admin.register(NotificationDigest)
+class NotificationDigestAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'events', 'first_event_id', 'last_event_id')
@@ -0,0 +1,11 @@
+from django.utils.functional import SimpleLazyObject
+
+from . import unread
+
+
+def unread_notifications(request):
+    """
+    Nombre de notifications non lues de l'utilisateur connecté (badge de
+    base.html) : lu en cache et seulement si le template l'affiche.
+    """
+    return {'unread_notifications': SimpleLazyObject(lambda: unread.count_for(request.user))}
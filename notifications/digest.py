@@ -0,0 +1,107 @@
+"""
+Résumés périodiques des administrateurs (`python manage.py send_notification_digest`).
+
+Avec NOTIFICATIONS_ADMIN_DIGEST, chaque événement de commande ajoute une
+ligne à NotificationEvent dans la transaction de la commande, au lieu d'une
+notification par administrateur. La commande, planifiée (toutes les 15
+minutes par exemple), regroupe les événements arrivés depuis le résumé
+précédent en une seule notification par administrateur : nombre de
+commandes, meilleurs vendeurs, confirmations et annulations.
+
+Seuls les événements plus anciens que SETTLE_DELAY sont résumés : un
+identifiant peut être attribué avant le commit d'une transaction encore en
+cours, qui ne doit pas être dépassée par le curseur.
+
+La notification par événement (NOTIFICATIONS_ADMIN_FANOUT) peut rester
+active en parallèle ou être coupée.
+"""
+
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+
+from . import services
+from .models import NotificationDigest, NotificationEvent
+
+SETTLE_DELAY = timedelta(seconds=60)
+
+TOP_SELLERS = 3
+
+
+def record(kind, order, status=''):
+    """Ajoute un événement au journal (une ligne, dans la transaction courante)"""
+    NotificationEvent.objects.create(kind=kind, order_id=order.pk, seller_id=order.seller_id, status=status)
+
+
+def pending(now=None):
+    """Événements pas encore résumés et assez anciens pour l'être"""
+    last = NotificationDigest.objects.order_by('-last_event_id').values_list('last_event_id', flat=True).first()
+    events = NotificationEvent.objects.filter(created_at__lte=(now or timezone.now()) - SETTLE_DELAY)
+    if last is not None:
+        events = events.filter(id__gt=last)
+    return events
+
+
+def build(events):
+    """
+    Titre et message du résumé ; None s'il n'y a aucun événement.
+    Deux requêtes : nombres par type et statut, puis meilleurs vendeurs.
+    """
+    counts = {
+        (row['kind'], row['status']): row for row in
+        events.order_by().values('kind', 'status').annotate(
+            total=Count('id'), start=Min('created_at'), end=Max('created_at'),
+        )
+    }
+    if not counts:
+        return None
+    placed = sum(row['total'] for (kind, _), row in counts.items() if kind == 'order_placed')
+    confirmed = counts.get(('order_status', 'confirmed'), {}).get('total', 0)
+    cancelled = counts.get(('order_status', 'cancelled'), {}).get('total', 0)
+    start = timezone.localtime(min(row['start'] for row in counts.values()))
+    end = timezone.localtime(max(row['end'] for row in counts.values()))
+
+    title = f"{placed} nouvelle(s) commande(s) entre {start:%H:%M} et {end:%H:%M}"
+    lines = [f"Du {start:%d/%m/%Y %H:%M} au {end:%d/%m/%Y %H:%M} : {placed} nouvelle(s) commande(s)."]
+    if placed:
+        top_sellers = (
+            events.filter(kind='order_placed').order_by().values('seller__username')
+            .annotate(total=Count('id')).order_by('-total', 'seller__username')[:TOP_SELLERS]
+        )
+        lines.append('Meilleurs vendeurs : ' + ', '.join(
+            f"{row['seller__username']} ({row['total']})" for row in top_sellers
+        ) + '.')
+    if confirmed or cancelled:
+        lines.append(f"{confirmed} commande(s) confirmée(s), {cancelled} annulée(s) par les vendeurs.")
+    return title, '\n'.join(lines)
+
+
+def send_digest(now=None, dry_run=False):
+    """
+    Résume les événements en attente et l'envoie à chaque administrateur
+    (une notification par administrateur, en une insertion). Retourne le
+    NotificationDigest créé, ou None s'il n'y avait rien à résumer (ou si une
+    autre exécution l'a déjà fait). Avec `dry_run`, retourne (titre, message)
+    sans rien écrire.
+    """
+    events = pending(now)
+    bounds = events.aggregate(first=Min('id'), last=Max('id'))
+    if bounds['first'] is None:
+        return None
+    # Bornes figées : les événements arrivés pendant le calcul iront au résumé suivant
+    events = NotificationEvent.objects.filter(id__gte=bounds['first'], id__lte=bounds['last'])
+    title, message = build(events)
+    if dry_run:
+        return title, message
+    try:
+        with transaction.atomic():
+            digest = NotificationDigest.objects.create(
+                first_event_id=bounds['first'], last_event_id=bounds['last'], events=events.count(),
+            )
+            services.send(services.admin_ids(), title, message, f'digest:{digest.pk}')
+    except IntegrityError:
+        # Exécution concurrente : ces événements sont déjà résumés
+        return None
+    return digest
@@ -0,0 +1,208 @@
+"""
+Test de charge du flux temps réel des notifications (notifications/stream.py).
+
+Contre un serveur ASGI (uvicorn lancé pour l'occasion ou URL existante) :
+1. ouvre `connections` connexions au flux, réparties entre `users`
+   vendeurs (sessions en base, voir dashboard.benchmark.session_cookies) ;
+2. les garde inactives `hold` secondes (seuls les commentaires de maintien
+   circulent) et relève la mémoire du serveur si son processus est connu ;
+3. écrit `notifications` notifications depuis ce processus, donc hors du
+   serveur : elles arrivent par la lecture périodique de la base, le chemin
+   des autres workers, et la latence mesurée en est la borne haute ;
+4. mesure pour chacune le délai de réception sur toutes les connexions de
+   son destinataire, puis supprime les notifications écrites.
+
+Le client n'utilise qu'asyncio (une coroutine par connexion, aucun thread) ;
+il relève la limite de descripteurs de fichiers du processus au maximum
+autorisé. Utilisé par `python manage.py stream_loadtest`.
+"""
+
+import asyncio
+import itertools
+import statistics
+import sys
+import time
+from urllib.parse import urlsplit
+
+from django.urls import reverse
+
+from dashboard.benchmark import http_server, session_cookies, summarize
+from users.models import User
+from .models import Notification
+
+# Connexions ouvertes en parallèle pendant la montée en charge
+CONNECT_CONCURRENCY = 200
+
+# Délai maximal de réception d'une notification (secondes)
+DELIVERY_TIMEOUT = 15
+
+
+def raise_file_limit():
+    """Limite de descripteurs du processus portée au maximum autorisé ; retourne la limite"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard != resource.RLIM_INFINITY and soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        soft = hard
+    return soft
+
+
+def resident_memory(pid):
+    """Mémoire résidente (Mo) d'un processus, None si illisible (hors Linux)"""
+    try:
+        with open(f'/proc/{pid}/status', encoding='ascii') as file:
+            for line in file:
+                if line.startswith('VmRSS:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        return None
+    return None
+
+
+def uvicorn_server(workers=1, timeout=30):
+    """Lance uvicorn (config.asgi) sur un port libre ; produit son URL et son processus"""
+    return http_server(lambda port: [
+        sys.executable, '-m', 'uvicorn', 'config.asgi:application',
+        '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers),
+        '--log-level', 'warning', '--no-access-log',
+    ], 'uvicorn', timeout)
+
+
+class Connection:
+    """Connexion au flux ; note l'heure de réception de chaque identifiant d'événement"""
+
+    def __init__(self, recipient_id):
+        self.recipient_id = recipient_id
+        self.received = {}
+        self.connect_time = None
+        self.reader = self.writer = None
+        self.task = None
+
+    async def open(self, host, port, request):
+        begin = time.perf_counter()
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        self.writer.write(request)
+        await self.writer.drain()
+        status = await self.reader.readline()
+        if b' 200 ' not in status:
+            raise ConnectionError(status.decode('latin1').strip() or 'connexion fermée')
+        while (await self.reader.readline()) not in (b'\r\n', b''):
+            pass
+        self.connect_time = time.perf_counter() - begin
+        self.task = asyncio.create_task(self.listen())
+
+    async def listen(self):
+        # Les lignes de taille des blocs (Transfer-Encoding: chunked) ne commencent jamais par « id: »
+        while line := await self.reader.readline():
+            if line.startswith(b'id: '):
+                self.received[int(line[4:])] = time.perf_counter()
+
+    def close(self):
+        if self.task is not None:
+            self.task.cancel()
+        if self.writer is not None:
+            self.writer.close()
+
+
+def stream_request(target, cookies):
+    headers = {
+        'Host': target.netloc,
+        'Accept': 'text/event-stream',
+        'Cookie': '; '.join(f'{name}={value}' for name, value in cookies.items()),
+    }
+    path = target.path.rstrip('/') + reverse('notifications:stream')
+    lines = [f'GET {path} HTTP/1.1'] + [f'{name}: {value}' for name, value in headers.items()]
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin1')
+
+
+async def _run(target, recipients, requests, connections, hold, notifications, server_pid, log):
+    host, port = target.hostname, target.port or 80
+    report = {'connections': connections, 'recipients': len(recipients), 'failed': 0}
+    if server_pid:
+        report['server_rss_mb_before'] = resident_memory(server_pid)
+
+    opened = []
+    semaphore = asyncio.Semaphore(CONNECT_CONCURRENCY)
+
+    async def connect(recipient_id):
+        connection = Connection(recipient_id)
+        async with semaphore:
+            try:
+                await connection.open(host, port, requests[recipient_id])
+            except (OSError, ConnectionError) as exc:
+                report['failed'] += 1
+                report.setdefault('first_error', str(exc))
+                connection.close()
+                return
+        opened.append(connection)
+
+    started = time.perf_counter()
+    ids = itertools.islice(itertools.cycle(requests), connections)
+    await asyncio.gather(*(connect(recipient_id) for recipient_id in ids))
+    report['connect_seconds'] = round(time.perf_counter() - started, 2)
+    report['connect'] = summarize([connection.connect_time for connection in opened], 0, report['failed'])
+    log(f"{len(opened)} connexions ouvertes en {report['connect_seconds']} s ({report['failed']} échec(s))")
+
+    await asyncio.sleep(hold)
+    report['open_after_hold'] = sum(not connection.task.done() for connection in opened)
+    if server_pid:
+        report['server_rss_mb'] = resident_memory(server_pid)
+    log(f"{report['open_after_hold']} connexions toujours ouvertes après {hold} s d'inactivité")
+
+    sent = {}
+    created = []
+    try:
+        for number, recipient in zip(range(notifications), itertools.cycle(recipients)):
+            notification = await asyncio.to_thread(
+                Notification.objects.create, recipient=recipient,
+                title='Test de charge', message=f'Notification {number + 1}/{notifications}',
+            )
+            created.append(notification.pk)
+            sent[notification.pk] = (recipient.pk, time.perf_counter())
+            await asyncio.sleep(0.05)
+
+        expected = {
+            pk: [connection for connection in opened if connection.recipient_id == recipient_id]
+            for pk, (recipient_id, _) in sent.items()
+        }
+        deadline = time.monotonic() + DELIVERY_TIMEOUT
+        while time.monotonic() < deadline and not all(
+            pk in connection.received for pk, targets in expected.items() for connection in targets
+        ):
+            await asyncio.sleep(0.1)
+
+        latencies, missing = [], 0
+        for pk, targets in expected.items():
+            for connection in targets:
+                if pk in connection.received:
+                    latencies.append(connection.received[pk] - sent[pk][1])
+                else:
+                    missing += 1
+        report['delivery'] = summarize(latencies, 0, missing)
+        report['delivery']['expected'] = sum(len(targets) for targets in expected.values())
+        if latencies:
+            report['delivery']['stdev_ms'] = round(statistics.pstdev(latencies) * 1000, 3)
+    finally:
+        for connection in opened:
+            connection.close()
+        await asyncio.to_thread(lambda: Notification.objects.filter(pk__in=created).delete())
+    return report
+
+
+def run(base_url, connections=1000, users=50, hold=30, notifications=20, server_pid=None, log=print):
+    """Joue le test de charge contre `base_url` et retourne le rapport"""
+    recipients = list(User.objects.filter(role='seller', is_active=True).order_by('id')[:users])
+    if not recipients:
+        raise RuntimeError('Aucun vendeur ; lancez `generate_data` pour créer des données')
+    target = urlsplit(base_url)
+    # Sessions ouvertes avant la boucle asyncio (ORM synchrone)
+    requests = {user.pk: stream_request(target, session_cookies(user)) for user in recipients}
+    limit = raise_file_limit()
+    if limit is not None and limit < connections + 100:
+        log(f'Attention : limite de {limit} descripteurs de fichiers pour {connections} connexions')
+    report = asyncio.run(_run(target, recipients, requests, connections, hold, notifications, server_pid, log))
+    report['file_limit'] = limit
+    return report
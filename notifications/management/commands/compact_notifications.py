@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from notifications import retention
+
+
+class Command(BaseCommand):
+    help = (
+        "Supprime (ou archive) par lots les notifications lues plus anciennes que la durée "
+        "de rétention (NOTIFICATIONS_RETENTION_DAYS) ; à planifier chaque nuit"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help=f'Durée de rétention en jours (défaut : {settings.NOTIFICATIONS_RETENTION_DAYS})')
+        mode = parser.add_mutually_exclusive_group()
+        mode.add_argument('--archive', dest='archive', action='store_true', default=None,
+                          help='Copier dans NotificationArchive avant de supprimer')
+        mode.add_argument('--no-archive', dest='archive', action='store_false', help='Supprimer sans archiver')
+        parser.add_argument('--batch-size', type=int, default=retention.BATCH_SIZE, help='Notifications par transaction')
+        parser.add_argument('--pause', type=float, default=0.1, help='Pause entre deux lots (secondes)')
+        parser.add_argument('--dry-run', action='store_true', help='Compter les notifications expirées sans rien supprimer')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size doit être positif')
+
+        def log(progress):
+            if options['verbosity'] > 1:
+                self.stdout.write(f"Lot {progress['batches']} : {progress['deleted']} supprimée(s)")
+
+        result = retention.compact(
+            days=options['days'], archive=options['archive'], batch_size=options['batch_size'],
+            pause=options['pause'], dry_run=options['dry_run'], log=log,
+        )
+        if options['dry_run']:
+            self.stdout.write(
+                f"{result['expired']} notification(s) lue(s) et {result['events']} événement(s) expiré(s) "
+                f"(rien n'a été supprimé)."
+            )
+            return
+        message = f"{result['deleted']} notification(s) supprimée(s) en {result['batches']} lot(s)"
+        if result['archived']:
+            message += f", {result['archived']} archivée(s)"
+        if result['events']:
+            message += f", {result['events']} événement(s) du journal supprimé(s)"
+        self.stdout.write(self.style.SUCCESS(message + '.'))
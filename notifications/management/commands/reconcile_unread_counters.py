@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from notifications.unread import reconcile
+
+
+class Command(BaseCommand):
+    help = "Recalcule les compteurs de notifications non lues (UnreadCounter) et corrige les écarts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Afficher les écarts sans les corriger")
+
+    def handle(self, *args, **options):
+        drift = reconcile(apply=not options['dry_run'])
+        for user_id, (stored, expected) in drift:
+            self.stdout.write(f'Utilisateur {user_id} : {stored} -> {expected}')
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Compteurs à jour.'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(drift)} utilisateur(s) avec un compteur faux (non corrigé).'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{len(drift)} utilisateur(s) corrigé(s).'))
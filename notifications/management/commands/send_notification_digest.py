@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from notifications import digest
+
+
+class Command(BaseCommand):
+    help = (
+        "Envoie aux administrateurs le résumé des événements de commande survenus depuis le "
+        "résumé précédent (NOTIFICATIONS_ADMIN_DIGEST) ; à planifier toutes les 15 minutes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Afficher le résumé sans l'envoyer")
+
+    def handle(self, *args, **options):
+        result = digest.send_digest(dry_run=options['dry_run'])
+        if result is None:
+            self.stdout.write('Aucun événement à résumer.')
+        elif options['dry_run']:
+            title, message = result
+            self.stdout.write(f'{title}\n{message}')
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'Résumé de {result.events} événement(s) envoyé aux administrateurs.'
+            ))
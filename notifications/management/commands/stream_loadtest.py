@@ -0,0 +1,55 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from notifications import loadtest
+
+
+class Command(BaseCommand):
+    help = (
+        "Ouvre des milliers de connexions inactives au flux temps réel des notifications "
+        "d'un serveur ASGI, puis mesure le délai de réception de nouvelles notifications"
+    )
+
+    def add_arguments(self, parser):
+        server = parser.add_mutually_exclusive_group(required=True)
+        server.add_argument('--url', help='Serveur ASGI déjà lancé (ex: http://127.0.0.1:8000)')
+        server.add_argument('--uvicorn', action='store_true', help='Lancer uvicorn (config.asgi) pour la mesure')
+        parser.add_argument('--server-pid', type=int, help='Processus du serveur (--url) dont relever la mémoire')
+        parser.add_argument('--connections', type=int, default=2000, help='Connexions ouvertes')
+        parser.add_argument('--users', type=int, default=50, help='Vendeurs destinataires (connexions réparties)')
+        parser.add_argument('--hold', type=int, default=30, help="Secondes d'inactivité avant l'envoi")
+        parser.add_argument('--notifications', type=int, default=20, help='Notifications envoyées')
+        parser.add_argument('--output', help='Écrire le rapport JSON dans ce fichier')
+
+    def handle(self, *args, **options):
+        run_options = {
+            'connections': options['connections'], 'users': options['users'], 'hold': options['hold'],
+            'notifications': options['notifications'], 'log': self.stdout.write,
+        }
+        try:
+            if options['uvicorn']:
+                # Un seul worker : toutes les connexions dans le processus dont la mémoire est relevée
+                with loadtest.uvicorn_server() as (url, pid):
+                    report = loadtest.run(url, server_pid=pid, **run_options)
+            else:
+                report = loadtest.run(options['url'], server_pid=options['server_pid'], **run_options)
+        except RuntimeError as exc:
+            raise CommandError(exc)
+
+        delivery = report['delivery']
+        self.stdout.write(
+            f"Réception : {delivery['requests']}/{delivery['expected']}  p50 {delivery['p50_ms']:.1f}  "
+            f"p95 {delivery['p95_ms']:.1f}  p99 {delivery['p99_ms']:.1f}  max {delivery['max_ms']:.1f} ms"
+        )
+        if report.get('server_rss_mb') is not None:
+            self.stdout.write(
+                f"Mémoire du serveur : {report['server_rss_mb_before']} Mo au repos, "
+                f"{report['server_rss_mb']} Mo avec {report['open_after_hold']} connexions"
+            )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, indent=2, ensure_ascii=False)
+            self.stdout.write(f"Rapport écrit dans {options['output']}")
+        if delivery['errors']:
+            raise SystemExit(1)
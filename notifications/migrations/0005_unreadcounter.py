@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:46
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def backfill_unread_counters(apps, schema_editor):
+    """Compteurs calculés depuis les notifications non lues existantes"""
+    UnreadCounter = apps.get_model('notifications', 'UnreadCounter')
+    Notification = apps.get_model('notifications', 'Notification')
+
+    unread = (
+        Notification.objects.filter(is_read=False).values_list('recipient_id')
+        .annotate(total=Count('id')).order_by()
+    )
+    UnreadCounter.objects.bulk_create(
+        [UnreadCounter(user_id=user_id, unread=total) for user_id, total in unread],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_query_indexes'),
+        ('notifications', '0004_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='unread_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_unread_counters, migrations.RunPython.noop),
+    ]
@@ -8,6 +8,98 @@ class Notification(models.Model):
     message = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
+    # Événement à l'origine de la notification (ex: "order:12:placed"), vide si aucun
+    event_key = models.CharField(max_length=100, blank=True, default='')
+
+    class Meta:
+        indexes = [
+            # Notifications d'un utilisateur, des plus récentes (tableaux de bord, liste) ;
+            # is_read en dernière colonne : les compteurs total/non lues lisent l'index seul
+            models.Index(fields=['recipient', '-created_at', 'is_read'], name='notification_recipient_created'),
+            # Non lues (index partiel : compteur et liste des non lues)
+            models.Index(
+                fields=['recipient', '-created_at'], name='notification_unread',
+                condition=models.Q(is_read=False),
+            ),
+            # Liste admin de toutes les notifications
+            models.Index(fields=['-created_at', '-id'], name='notification_created_id'),
+        ]
+        constraints = [
+            # Un même événement n'est notifié qu'une fois à chaque destinataire
+            models.UniqueConstraint(
+                fields=['recipient', 'event_key'],
+                condition=~models.Q(event_key=''),
+                name='notification_unique_event',
+            ),
+        ]
 
     def __str__(self):
         return f"Notification pour {self.recipient.username}: {self.title}"
+
+
+class UnreadCounter(models.Model):
+    """
+    Nombre de notifications non lues d'un utilisateur (voir notifications/unread.py).
+
+    Incrémenté à l'envoi, décrémenté au marquage comme lue, par des UPDATE
+    avec F() ; recalculable avec `python manage.py reconcile_unread_counters`.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='unread_counter')
+    unread = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id} : {self.unread} non lue(s)"
+
+
+class NotificationArchive(models.Model):
+    """
+    Notification lue retirée de la table principale par la rétention
+    (notifications/retention.py, NOTIFICATIONS_ARCHIVE=True) ; garde son identifiant.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    title = models.CharField(max_length=255)
+    message = models.TextField()
+    event_key = models.CharField(max_length=100, blank=True, default='')
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Notification archivée pour {self.recipient_id}: {self.title}"
+
+
+class NotificationEvent(models.Model):
+    """
+    Journal des événements de commande, en ajout seul (une ligne par
+    événement, quel que soit le nombre d'administrateurs) : les résumés
+    périodiques des administrateurs en sont tirés (notifications/digest.py).
+    """
+    KIND_CHOICES = (
+        ('order_placed', 'Nouvelle commande'),
+        ('order_status', 'Changement de statut'),
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    order = models.ForeignKey('orders.Order', on_delete=models.CASCADE, related_name='+')
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    # Nouveau statut (changements de statut seulement)
+    status = models.CharField(max_length=10, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} (commande #{self.order_id})"
+
+
+class NotificationDigest(models.Model):
+    """
+    Résumé envoyé aux administrateurs : couvre les événements d'identifiant
+    first_event_id à last_event_id. Le dernier résumé sert de point de départ
+    au suivant ; l'unicité de first_event_id empêche deux exécutions
+    simultanées de résumer les mêmes événements.
+    """
+    first_event_id = models.BigIntegerField(unique=True)
+    last_event_id = models.BigIntegerField()
+    events = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Résumé des événements {self.first_event_id} à {self.last_event_id}"
@@ -0,0 +1,109 @@
+"""
+Rétention des notifications (`python manage.py compact_notifications`).
+
+Les notifications lues créées depuis plus de NOTIFICATIONS_RETENTION_DAYS
+jours sont supprimées ; avec NOTIFICATIONS_ARCHIVE, elles sont d'abord
+copiées dans NotificationArchive. Les non lues ne sont jamais touchées (les
+compteurs de non lues restent donc justes).
+
+Le travail est découpé en lots de `batch_size` lignes, chacun dans sa propre
+transaction courte : les verrous ne portent que sur un lot et les écritures
+de l'application passent entre deux lots (`pause`). Les lots sont parcourus
+par date de création puis identifiant, à partir de la fin du lot précédent
+(pagination par clé) : les notifications non lues anciennes ne sont lues
+qu'une fois.
+
+Le journal des résumés (NotificationEvent) est purgé de la même façon : les
+événements déjà résumés et plus anciens que la durée de rétention.
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .models import Notification, NotificationArchive, NotificationDigest, NotificationEvent
+
+BATCH_SIZE = 1000
+
+ARCHIVED_FIELDS = ('id', 'recipient_id', 'title', 'message', 'event_key', 'created_at')
+
+
+def expired(days):
+    """Notifications lues créées il y a plus de `days` jours"""
+    return Notification.objects.filter(is_read=True, created_at__lt=timezone.now() - timedelta(days=days))
+
+
+def expired_events(days):
+    """Événements du journal déjà résumés et créés il y a plus de `days` jours"""
+    last = NotificationDigest.objects.aggregate(last=Max('last_event_id'))['last']
+    if last is None:
+        return NotificationEvent.objects.none()
+    return NotificationEvent.objects.filter(id__lte=last, created_at__lt=timezone.now() - timedelta(days=days))
+
+
+def compact_events(days, batch_size=BATCH_SIZE, pause=0.0):
+    """Supprime par lots les événements expirés (jamais modifiés : pas de verrou)"""
+    events = expired_events(days).order_by('id').values_list('id', flat=True)
+    deleted = 0
+    while True:
+        ids = list(events[:batch_size])
+        if not ids:
+            break
+        deleted += NotificationEvent.objects.filter(id__in=ids).delete()[0]
+        if len(ids) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return deleted
+
+
+def compact(days=None, archive=None, batch_size=BATCH_SIZE, pause=0.0, dry_run=False, log=None):
+    """
+    Supprime (ou archive puis supprime) les notifications expirées, puis les
+    événements expirés ; retourne {'expired': nombre trouvé, 'deleted': ...,
+    'archived': ..., 'batches': ..., 'events': événements supprimés}.
+    """
+    days = settings.NOTIFICATIONS_RETENTION_DAYS if days is None else days
+    archive = settings.NOTIFICATIONS_ARCHIVE if archive is None else archive
+    result = {'expired': 0, 'deleted': 0, 'archived': 0, 'batches': 0, 'events': 0}
+    if days <= 0:
+        return result
+    candidates = expired(days).order_by('created_at', 'id')
+    if dry_run:
+        result['expired'] = candidates.count()
+        result['events'] = expired_events(days).count()
+        return result
+
+    position = None
+    while True:
+        batch = candidates
+        if position is not None:
+            created_at, pk = position
+            batch = batch.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+        with transaction.atomic():
+            rows = list(batch.select_for_update().values(*ARCHIVED_FIELDS)[:batch_size])
+            if not rows:
+                break
+            if archive:
+                NotificationArchive.objects.bulk_create(
+                    [NotificationArchive(**row) for row in rows], ignore_conflicts=True,
+                )
+                result['archived'] += len(rows)
+            deleted, _ = Notification.objects.filter(pk__in=[row['id'] for row in rows], is_read=True).delete()
+
+        position = rows[-1]['created_at'], rows[-1]['id']
+        result['expired'] += len(rows)
+        result['deleted'] += deleted
+        result['batches'] += 1
+        if log:
+            log(result)
+        if len(rows) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    result['events'] = compact_events(days, batch_size, pause)
+    return result
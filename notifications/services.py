@@ -0,0 +1,126 @@
+"""
+Envoi groupé des notifications liées aux commandes.
+
+Chaque événement résout ses destinataires une seule fois (identifiants des
+administrateurs gardés en cache), écrit toutes ses lignes en un seul
+`bulk_create` et ne s'exécute qu'après le commit de la transaction qui a créé
+ou modifié la commande. Les notifications d'un même événement portent une clé
+(`event_key`) unique par destinataire : rejouer un événement n'écrit rien.
+Les compteurs de non lues des destinataires (notifications/unread.py) sont
+incrémentés dans la même transaction.
+
+Les destinataires connectés au flux temps réel (notifications/stream.py) les
+reçoivent dès le commit.
+
+Avec NOTIFICATIONS_DEFER_ADMIN_FANOUT, les notifications des administrateurs
+sont écrites par une tâche en arrière-plan (`notifications.fanout`). Avec
+NOTIFICATIONS_ADMIN_DIGEST, chaque événement est aussi ajouté au journal
+résumé périodiquement pour les administrateurs (notifications/digest.py) ;
+NOTIFICATIONS_ADMIN_FANOUT=False supprime alors la notification par
+événement de chaque administrateur.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from jobs.queue import enqueue
+from users.models import User
+from . import digest, stream, unread
+from .models import Notification
+
+ADMIN_IDS_CACHE_KEY = 'notifications:admin_ids'
+ADMIN_IDS_TIMEOUT = 3600
+
+
+def admin_ids():
+    """Identifiants des administrateurs (cache invalidé par notifications/signals.py)"""
+    return cache.get_or_set(
+        ADMIN_IDS_CACHE_KEY,
+        lambda: list(User.objects.filter(role='admin').order_by('id').values_list('id', flat=True)),
+        ADMIN_IDS_TIMEOUT,
+    )
+
+
+def forget_admin_ids():
+    cache.delete(ADMIN_IDS_CACHE_KEY)
+
+
+def send(recipient_ids, title, message, event_key=''):
+    """
+    Écrit une notification par destinataire en une requête et incrémente
+    leurs compteurs de non lues ; ignore celles déjà envoyées.
+    """
+    recipient_ids = list(dict.fromkeys(recipient_ids))
+    if event_key and recipient_ids:
+        # Événement rejoué : seuls les destinataires pas encore notifiés sont comptés
+        already_sent = set(
+            Notification.objects.filter(event_key=event_key, recipient_id__in=recipient_ids)
+            .values_list('recipient_id', flat=True)
+        )
+        recipient_ids = [recipient_id for recipient_id in recipient_ids if recipient_id not in already_sent]
+    notifications = [
+        Notification(recipient_id=recipient_id, title=title, message=message, event_key=event_key)
+        for recipient_id in recipient_ids
+    ]
+    if notifications:
+        with transaction.atomic():
+            Notification.objects.bulk_create(notifications, ignore_conflicts=bool(event_key))
+            unread.increment(recipient_ids)
+        # Connexions ouvertes dans ce processus : distribution sans attendre la lecture périodique
+        transaction.on_commit(lambda: stream.publish(recipient_ids))
+    return len(notifications)
+
+
+def send_to_admins(title, message, event_key=''):
+    """Notification à tous les administrateurs, immédiate ou différée selon la configuration"""
+    if not getattr(settings, 'NOTIFICATIONS_ADMIN_FANOUT', True):
+        return
+    if getattr(settings, 'NOTIFICATIONS_DEFER_ADMIN_FANOUT', False):
+        enqueue('notifications.fanout', title=title, message=message, event_key=event_key)
+    else:
+        send(admin_ids(), title, message, event_key)
+
+
+def _order_placed(order):
+    article = order.article
+    event_key = f'order:{order.pk}:placed'
+    send(
+        [order.seller_id],
+        "Nouvelle commande reçue !",
+        f"{order.client_name} souhaite commander votre article '{article.title}' "
+        f"au prix de {article.price}€. "
+        f"Contactez-le au {order.client_phone}.",
+        event_key,
+    )
+    send_to_admins(
+        "Nouvelle commande sur la plateforme",
+        f"Commande #{order.pk} : {order.client_name} a commandé "
+        f"'{article.title}' chez {order.seller.username}.",
+        event_key,
+    )
+
+
+def _record(kind, order, status=''):
+    # Journal des résumés : écrit avec la commande, annulé avec elle
+    if getattr(settings, 'NOTIFICATIONS_ADMIN_DIGEST', False):
+        digest.record(kind, order, status)
+
+
+def notify_order_placed(order):
+    """Notifie le vendeur et les administrateurs d'une nouvelle commande (après commit)"""
+    _record('order_placed', order)
+    transaction.on_commit(lambda: _order_placed(order))
+
+
+def notify_status_change(order, old_status):
+    """Notifie les administrateurs d'une confirmation ou d'une annulation (après commit)"""
+    if order.status not in ('confirmed', 'cancelled'):
+        return
+    _record('order_status', order, order.status)
+    title = f"Commande #{order.pk} - Statut mis à jour"
+    message = (
+        f"Le vendeur {order.seller.username} a changé le statut de "
+        f"'{old_status}' vers '{order.status}' pour la commande de {order.client_name}."
+    )
+    transaction.on_commit(lambda: send_to_admins(title, message))
@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from notifications import services
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def forget_cached_admins(sender, instance, update_fields=None, **kwargs):
+    """La liste des administrateurs en cache peut avoir changé"""
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    services.forget_admin_ids()
@@ -0,0 +1,308 @@
+"""
+Diffusion en temps réel des notifications (Server-Sent Events).
+
+Chaque connexion au flux (`notifications:stream`) est une coroutine de la
+boucle asyncio du serveur ASGI : une connexion inactive ne coûte qu'une
+file d'attente, pas un thread. Un seul lecteur par processus (`Broker`)
+interroge la base et distribue les nouvelles notifications aux abonnés :
+- immédiatement après le commit qui les a écrites dans ce processus
+  (`services.send` appelle `publish`) ;
+- toutes les POLL_INTERVAL secondes sinon : notifications écrites par un
+  autre worker ou par la file de tâches (`run_jobs`).
+La lecture porte sur les notifications créées depuis la précédente, avec une
+marge (POLL_OVERLAP) pour les transactions validées en retard ; les
+identifiants déjà distribués sont ignorés.
+
+À la reconnexion, le navigateur envoie l'en-tête Last-Event-ID : les
+notifications manquées sont renvoyées avant le flux. Sous WSGI (gunicorn),
+qui ne sait pas garder une réponse ouverte sans bloquer un thread, la vue
+renvoie seulement ces notifications manquées et le navigateur se reconnecte
+après RETRY_MS.
+
+L'application reste servie en WSGI ; le flux est servi par un processus
+ASGI séparé (config/asgi.py, qui ne sert que les requêtes text/event-stream)
+à l'adresse NOTIFICATIONS_STREAM_URL. Ce service n'étant pas sur l'origine
+du site, la page lui transmet un jeton signé (`url()`) à la place du cookie
+de session ; NOTIFICATIONS_STREAM_ORIGINS liste les origines autorisées à
+lire le flux (CORS).
+"""
+
+import asyncio
+import datetime
+import json
+import logging
+import threading
+import time
+
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+# Intervalle de lecture de la base et marge de relecture (secondes)
+POLL_INTERVAL = 2
+POLL_OVERLAP = datetime.timedelta(seconds=10)
+
+# Commentaire envoyé aux connexions inactives (proxys qui coupent les connexions muettes)
+KEEPALIVE = 20
+
+# Durée maximale d'une connexion : le navigateur se reconnecte avec Last-Event-ID
+MAX_DURATION = 15 * 60
+
+# Notifications manquées renvoyées à la reconnexion
+REPLAY_LIMIT = 50
+
+# Délai de reconnexion indiqué au navigateur (millisecondes)
+RETRY_MS = 5000
+WSGI_RETRY_MS = 15000
+
+# Notifications en attente par connexion (au-delà, le client est déconnecté et rejouera)
+QUEUE_SIZE = 100
+
+FIELDS = ('id', 'recipient_id', 'title', 'message', 'created_at')
+
+# Jeton d'accès au flux depuis une autre origine (EventSource se reconnecte avec la même URL)
+TOKEN_SALT = 'notifications.stream'
+TOKEN_MAX_AGE = datetime.timedelta(hours=12)
+
+
+def url(user, last_event_id=0):
+    """
+    URL du flux pour une page de `user` : même origine, ou service ASGI
+    séparé (NOTIFICATIONS_STREAM_URL) avec un jeton signé.
+    """
+    params = {'last_event_id': last_event_id}
+    base = getattr(settings, 'NOTIFICATIONS_STREAM_URL', '')
+    if base:
+        params['token'] = signing.dumps(user.pk, salt=TOKEN_SALT)
+    return base.rstrip('/') + reverse('notifications:stream') + '?' + urlencode(params)
+
+
+def user_from_token(token):
+    """Identifiant de l'utilisateur du jeton ; None s'il est invalide ou expiré"""
+    try:
+        user_id = signing.loads(token, salt=TOKEN_SALT, max_age=TOKEN_MAX_AGE)
+    except (signing.BadSignature, TypeError):
+        return None
+    return user_id if isinstance(user_id, int) else None
+
+
+def event(row):
+    """Message SSE d'une notification"""
+    data = json.dumps({
+        'id': row['id'],
+        'title': row['title'],
+        'message': row['message'],
+        'created_at': row['created_at'].isoformat(),
+    }, ensure_ascii=False)
+    return f"id: {row['id']}\nevent: notification\ndata: {data}\n\n"
+
+
+def replay(recipient_id, last_event_id):
+    """Notifications postérieures à `last_event_id` (au plus REPLAY_LIMIT, plus anciennes d'abord)"""
+    if last_event_id is None:
+        return []
+    return list(
+        Notification.objects.filter(recipient_id=recipient_id, id__gt=last_event_id)
+        .order_by('id').values(*FIELDS)[:REPLAY_LIMIT]
+    )
+
+
+def parse_event_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class Subscription:
+    def __init__(self, recipient_id):
+        self.recipient_id = recipient_id
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+        self.closed = False
+
+    def deliver(self, row):
+        try:
+            self.queue.put_nowait(row)
+        except asyncio.QueueFull:
+            # Client trop lent : la connexion est fermée, il rejouera depuis son dernier identifiant
+            self.close()
+
+    def close(self):
+        """Termine le flux (depuis la boucle) : réveille la connexion en attente"""
+        self.closed = True
+        try:
+            self.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+
+
+class Broker:
+    """Abonnés du processus et lecteur unique des nouvelles notifications"""
+
+    def __init__(self):
+        self.subscriptions = {}
+        self.loop = None
+        self.wakeup = None
+        self.poller = None
+        self.since = None
+        self.delivered = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return sum(len(subscriptions) for subscriptions in self.subscriptions.values())
+
+    def subscribe(self, recipient_id):
+        """Abonnement d'une connexion ; à appeler depuis la boucle du serveur"""
+        loop = asyncio.get_running_loop()
+        subscription = Subscription(recipient_id)
+        with self._lock:
+            if self.loop is not loop:
+                self.loop, self.wakeup, self.poller = loop, asyncio.Event(), None
+            self.subscriptions.setdefault(recipient_id, set()).add(subscription)
+            if self.poller is None or self.poller.done():
+                self.since = timezone.now()
+                self.poller = loop.create_task(self._poll())
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Fin d'un abonnement (depuis n'importe quel thread, plusieurs fois sans effet)"""
+        with self._lock:
+            subscriptions = self.subscriptions.get(subscription.recipient_id)
+            if subscriptions is None or subscription not in subscriptions:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self.subscriptions[subscription.recipient_id]
+            idle = not self.subscriptions
+        if idle:
+            # Le lecteur s'arrête sans attendre la fin de son intervalle
+            self.publish()
+
+    def publish(self, recipient_ids=None):
+        """
+        Réveille le lecteur (depuis n'importe quel thread) si l'un des
+        destinataires est abonné dans ce processus.
+        """
+        with self._lock:
+            loop, wakeup = self.loop, self.wakeup
+            if loop is None or loop.is_closed():
+                return
+            if recipient_ids is not None and self.subscriptions.keys().isdisjoint(recipient_ids):
+                return
+        loop.call_soon_threadsafe(wakeup.set)
+
+    def fetch(self):
+        """Notifications créées depuis la lecture précédente (marge comprise) et pas encore distribuées"""
+        now = timezone.now()
+        rows = list(
+            Notification.objects.filter(created_at__gte=self.since - POLL_OVERLAP)
+            .order_by('id').values(*FIELDS)
+        )
+        self.since = now
+        horizon = time.monotonic() - 2 * POLL_OVERLAP.total_seconds()
+        self.delivered = {pk: seen for pk, seen in self.delivered.items() if seen >= horizon}
+        fresh = [row for row in rows if row['id'] not in self.delivered]
+        self.delivered.update(dict.fromkeys((row['id'] for row in fresh), time.monotonic()))
+        return fresh
+
+    def dispatch(self, rows):
+        with self._lock:
+            targets = [(row, list(self.subscriptions.get(row['recipient_id'], ()))) for row in rows]
+        for row, subscriptions in targets:
+            for subscription in subscriptions:
+                subscription.deliver(row)
+
+    async def _poll(self):
+        # S'arrête dès qu'il n'y a plus d'abonnés ; relancé par le prochain abonnement
+        while self.subscriptions:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            if not self.subscriptions:
+                break
+            try:
+                rows = await sync_to_async(self.fetch)()
+            except Exception:
+                # Base indisponible : nouvel essai à l'intervalle suivant
+                logger.exception('Lecture des notifications impossible')
+                continue
+            self.dispatch(rows)
+
+
+broker = Broker()
+
+
+def publish(recipient_ids=None):
+    broker.publish(recipient_ids)
+
+
+class EventStream:
+    """
+    Contenu du flux d'une connexion : reprise, puis nouvelles notifications
+    et commentaires de maintien. Le flux s'arrête quand `disconnected` (futur
+    résolu à la déconnexion du client, voir config/streaming.py) est résolu ;
+    `close()` est appelé par Django à la fin de la réponse et libère
+    l'abonnement.
+    """
+
+    def __init__(self, recipient_id, last_event_id=None, disconnected=None):
+        self.recipient_id = recipient_id
+        self.last_event_id = last_event_id
+        self.disconnected = disconnected
+        self.subscription = None
+
+    def already_seen(self, row, subscribed_at):
+        # La lecture périodique relit les notifications récentes : celles que le client a déjà
+        if self.last_event_id is not None:
+            return row['id'] <= self.last_event_id
+        return row['created_at'] < subscribed_at
+
+    async def __aiter__(self):
+        self.subscription = subscription = broker.subscribe(self.recipient_id)
+        subscribed_at = timezone.now()
+        if self.disconnected is not None:
+            self.disconnected.add_done_callback(lambda _: subscription.close())
+        try:
+            yield f'retry: {RETRY_MS}\n\n'
+            sent = set()
+            for row in await sync_to_async(replay)(self.recipient_id, self.last_event_id):
+                sent.add(row['id'])
+                yield event(row)
+
+            deadline = time.monotonic() + MAX_DURATION
+            while not subscription.closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(subscription.queue.get(), min(KEEPALIVE, remaining))
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                if row is None:
+                    break
+                if row['id'] not in sent and not self.already_seen(row, subscribed_at):
+                    yield event(row)
+        finally:
+            self.close()
+
+    def close(self):
+        if self.subscription is not None:
+            broker.unsubscribe(self.subscription)
+
+
+def backlog(recipient_id, last_event_id=None):
+    """Réponse complète sous WSGI : notifications manquées puis délai de reconnexion"""
+    parts = [f'retry: {WSGI_RETRY_MS}\n\n']
+    parts.extend(event(row) for row in replay(recipient_id, last_event_id))
+    return ''.join(parts)
@@ -0,0 +1,8 @@
+from jobs.queue import task
+from .services import admin_ids, send
+
+
+@task('notifications.fanout')
+def fanout(title, message, event_key=''):
+    """Notifications des administrateurs, écrites hors de la requête du client"""
+    send(admin_ids(), title, message, event_key)
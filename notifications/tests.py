@@ -1,3 +1,355 @@
-from django.test import TestCase
+import asyncio
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from articles.models import Article
+from orders.models import Order
+from users.models import User
+from . import digest, retention, services, stream, unread
+from .context_processors import unread_notifications
+from .models import Notification, NotificationArchive, NotificationEvent, UnreadCounter
+
+
+class NotificationStreamTests(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(username='vendeur', password='x', role='seller')
+        self.other = User.objects.create_user(username='autre', password='x', role='seller')
+        self.first, self.second = [
+            Notification.objects.create(recipient=self.seller, title=f'Titre {number}', message='Message')
+            for number in (1, 2)
+        ]
+        Notification.objects.create(recipient=self.other, title='Pas pour moi', message='Message')
+        self.url = reverse('notifications:stream')
+
+    def test_anonymous_forbidden(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_wsgi_returns_missed_notifications(self):
+        self.client.force_login(self.seller)
+        response = self.client.get(self.url, headers={'Last-Event-ID': str(self.first.pk)})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        content = response.content.decode()
+        self.assertTrue(content.startswith(f'retry: {stream.WSGI_RETRY_MS}'))
+        self.assertIn(f'id: {self.second.pk}\nevent: notification\n', content)
+        self.assertNotIn(f'id: {self.first.pk}\n', content)
+        self.assertNotIn('Pas pour moi', content)
+
+        # Première connexion : reprise depuis la dernière notification affichée
+        content = self.client.get(self.url, {'last_event_id': self.second.pk}).content.decode()
+        self.assertNotIn('event: notification', content)
+
+    @override_settings(NOTIFICATIONS_STREAM_URL='https://flux.example.com', NOTIFICATIONS_STREAM_ORIGINS=['https://site.example.com'])
+    def test_token_grants_access_from_the_site_origin(self):
+        url = stream.url(self.seller, self.first.pk)
+        self.assertTrue(url.startswith('https://flux.example.com' + self.url))
+        path = url.removeprefix('https://flux.example.com')
+        response = self.client.get(path, headers={'Origin': 'https://site.example.com'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Access-Control-Allow-Origin'], 'https://site.example.com')
+        self.assertIn(f'id: {self.second.pk}\n', response.content.decode())
+
+        self.assertNotIn('Access-Control-Allow-Origin', self.client.get(path, headers={'Origin': 'https://autre.example.com'}))
+        self.assertEqual(self.client.get(self.url, {'token': 'forgé'}).status_code, 403)
+
+    async def test_asgi_entry_point_serves_only_event_streams(self):
+        from config.asgi import application
+
+        scope = {'type': 'http', 'method': 'GET', 'path': '/', 'query_string': b'', 'headers': []}
+        communicator = ApplicationCommunicator(application, scope)
+        await communicator.send_input({'type': 'http.request'})
+        self.assertEqual((await communicator.receive_output())['status'], 404)
+        await communicator.wait()
+
+    def test_send_publishes_after_commit(self):
+        with mock.patch.object(stream, 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                services.send([self.seller.pk, self.seller.pk], 'Titre', 'Message')
+                publish.assert_not_called()
+        publish.assert_called_once_with([self.seller.pk])
+
+    async def test_asgi_stream_replays_then_delivers(self):
+        await sync_to_async(self.async_client.force_login)(self.seller)
+        response = await self.async_client.get(self.url, headers={'Last-Event-ID': str(self.first.pk)})
+        self.assertTrue(response.streaming)
+        content = response.streaming_content
+        try:
+            self.assertEqual(await anext(content), f'retry: {stream.RETRY_MS}\n\n'.encode())
+            self.assertIn(f'id: {self.second.pk}\n'.encode(), await anext(content))
+            self.assertEqual(len(stream.broker), 1)
+
+            notification = await Notification.objects.acreate(recipient=self.seller, title='Nouvelle', message='M')
+            await Notification.objects.acreate(recipient=self.other, title='Pas pour moi', message='M')
+            stream.publish([self.seller.pk])
+            # Déjà envoyée par la reprise, la deuxième n'est pas répétée
+            received = await asyncio.wait_for(anext(content), 5)
+            self.assertIn(f'id: {notification.pk}\n'.encode(), received)
+            self.assertIn('Nouvelle'.encode(), received)
+        finally:
+            # Comme le gestionnaire ASGI en fin de réponse (déconnexion comprise)
+            await content.aclose()
+            response.close()
+        self.assertEqual(len(stream.broker), 0)
+
+
+class UnreadCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.seller = User.objects.create_user(username='vendeur', password='x', role='seller')
+        self.admin = User.objects.create_user(username='admin', password='x', role='admin')
+
+    def send(self, recipients, event_key=''):
+        with self.captureOnCommitCallbacks(execute=True):
+            services.send([user.pk for user in recipients], 'Titre', 'Message', event_key)
+
+    def counter(self, user):
+        return UnreadCounter.objects.get(user=user).unread
+
+    def test_counters_follow_sends_and_mark_read(self):
+        self.send([self.seller, self.admin], 'order:1:placed')
+        self.send([self.seller, self.admin], 'order:1:placed')  # événement rejoué : rien de plus
+        self.send([self.seller])
+        self.assertEqual((self.counter(self.seller), self.counter(self.admin)), (2, 1))
+
+        notifications = Notification.objects.filter(recipient=self.seller)
+        first = notifications.filter(pk=notifications.earliest('id').pk)
+        self.assertEqual(unread.mark_read(first), 1)
+        # Déjà lue : pas de second décompte
+        self.assertEqual(unread.mark_read(first), 0)
+        self.assertEqual(self.counter(self.seller), 1)
+        self.assertEqual(unread.reconcile(), [])
+
+        UnreadCounter.objects.filter(user=self.seller).update(unread=7)
+        self.assertEqual(unread.reconcile(), [(self.seller.pk, (7, 1))])
+        self.assertEqual(self.counter(self.seller), 1)
+
+    def test_badge_endpoint_revalidates_with_etag(self):
+        url = reverse('notifications:unread_count')
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.send([self.seller])
+        self.client.force_login(self.seller)
+        response = self.client.get(url)
+        self.assertEqual(response.json(), {'unread': 1})
+        self.assertIn('no-cache', response['Cache-Control'])
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+
+        self.send([self.seller])
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'unread': 2})
+
+    def test_context_processor_costs_no_query_when_cached(self):
+        self.send([self.seller])
+        request = RequestFactory().get('/')
+        request.user = self.seller
+        self.assertEqual(str(unread_notifications(request)['unread_notifications']), '1')
+        with self.assertNumQueries(0):
+            self.assertEqual(str(unread_notifications(request)['unread_notifications']), '1')
+            # Pas lu par le template : pas de lecture du tout
+            unread_notifications(request)
+
+
+class BulkNotificationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.seller = User.objects.create_user(username='vendeur', password='x', role='seller')
+        self.other = User.objects.create_user(username='autre', password='x', role='seller')
+        self.admin = User.objects.create_user(username='admin', password='x', role='admin')
+        for number in range(5):
+            services.send([self.seller.pk, self.other.pk], f'Titre {number}', 'Message')
+
+    def counters(self):
+        return dict(UnreadCounter.objects.values_list('user_id', 'unread'))
+
+    def test_bulk_operations_keep_counters_exact(self):
+        notifications = Notification.objects.filter(recipient__in=[self.seller, self.other])
+        selected = notifications.filter(title__in=['Titre 0', 'Titre 1'])
+        # Un lot : sélection verrouillée, UPDATE des notifications, UPDATE des
+        # compteurs (plus SAVEPOINT / RELEASE de la transaction du lot)
+        with self.assertNumQueries(5):
+            self.assertEqual(unread.mark_read(selected), 4)
+        self.assertEqual(self.counters(), {self.seller.pk: 3, self.other.pk: 3})
+
+        # Lues et non lues mélangées : seules les non lues sont décomptées
+        with self.assertNumQueries(5):
+            self.assertEqual(unread.delete(notifications.filter(title__in=['Titre 1', 'Titre 2'])), 4)
+        self.assertEqual(self.counters(), {self.seller.pk: 2, self.other.pk: 2})
+
+        self.assertEqual(unread.mark_all_read(self.seller), 2)
+        self.assertEqual(self.counters(), {self.seller.pk: 0, self.other.pk: 2})
+        self.assertEqual(unread.reconcile(), [])
+
+    def test_batches(self):
+        with mock.patch.object(unread, 'BATCH_SIZE', 3):
+            self.assertEqual(unread.mark_read(Notification.objects.all()), 10)
+        self.assertEqual(self.counters(), {self.seller.pk: 0, self.other.pk: 0})
+
+    def test_admin_bulk_view(self):
+        self.client.force_login(self.admin)
+        url = reverse('admin_notifications_bulk')
+        ids = list(Notification.objects.filter(recipient=self.seller).values_list('id', flat=True)[:2])
+
+        self.client.post(url, {'action': 'mark_read', 'notifications': ids})
+        self.assertEqual(self.counters()[self.seller.pk], 3)
+        self.client.post(url, {'action': 'delete', 'notifications': ids})
+        self.assertFalse(Notification.objects.filter(pk__in=ids).exists())
+        # Sans sélection : refusé
+        self.client.post(url, {'action': 'delete'})
+        self.assertEqual(Notification.objects.count(), 8)
+        # Seulement les notifications de l'administrateur connecté
+        services.send([self.admin.pk], 'Admin', 'Message')
+        self.client.post(url, {'action': 'mark_all_read'})
+        self.assertEqual(self.counters(), {self.seller.pk: 3, self.other.pk: 5, self.admin.pk: 0})
+        self.assertEqual(unread.reconcile(), [])
+
+        self.client.force_login(self.seller)
+        self.client.post(url, {'action': 'delete', 'notifications': ids})
+        self.assertEqual(Notification.objects.count(), 9)
+
+    def test_seller_mark_all_read(self):
+        self.client.force_login(self.seller)
+        response = self.client.post(reverse('notifications:mark_all_read'))
+        self.assertRedirects(response, reverse('seller_dashboard'))
+        self.assertEqual(self.counters(), {self.seller.pk: 0, self.other.pk: 5})
+
+    def test_django_admin_keeps_counters_exact(self):
+        self.client.force_login(User.objects.create_superuser(username='root', password='x'))
+        notification = Notification.objects.filter(recipient=self.seller).first()
+        url = reverse('admin:notifications_notification_change', args=[notification.pk])
+        data = {'title': notification.title, 'message': notification.message, 'event_key': ''}
+
+        self.client.post(url, {**data, 'is_read': 'on'})
+        self.assertEqual(self.counters()[self.seller.pk], 4)
+        self.client.post(url, data)
+        self.assertEqual(self.counters()[self.seller.pk], 5)
+
+        ids = list(Notification.objects.filter(recipient=self.other).values_list('id', flat=True)[:2])
+        self.client.post(reverse('admin:notifications_notification_changelist'), {
+            'action': 'delete_selected', '_selected_action': ids, 'post': 'yes',
+        })
+        self.client.post(reverse('admin:notifications_notification_delete', args=[notification.pk]), {'post': 'yes'})
+        self.assertEqual(self.counters(), {self.seller.pk: 4, self.other.pk: 3})
+        self.assertEqual(unread.reconcile(), [])
+
+
+class RetentionTests(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(username='vendeur', password='x', role='seller')
+        now = timezone.now()
+        for number in range(5):
+            for is_read in (True, False):
+                notification = Notification.objects.create(
+                    recipient=self.seller, title=f'Ancienne {number}', message='M', is_read=is_read,
+                )
+                Notification.objects.filter(pk=notification.pk).update(created_at=now - timedelta(days=100))
+        Notification.objects.create(recipient=self.seller, title='Récente', message='M', is_read=True)
+
+    def test_compact_deletes_only_old_read_notifications(self):
+        self.assertEqual(retention.compact(90, dry_run=True)['expired'], 5)
+        self.assertEqual(Notification.objects.count(), 11)
+
+        result = retention.compact(90, archive=False, batch_size=2)
+        self.assertEqual((result['deleted'], result['batches']), (5, 3))
+        self.assertEqual(Notification.objects.filter(is_read=True).count(), 1)
+        self.assertEqual(Notification.objects.filter(is_read=False).count(), 5)
+        self.assertFalse(NotificationArchive.objects.exists())
+
+    def test_compact_archives_before_deleting(self):
+        call_command('compact_notifications', days=90, archive=True, batch_size=2, pause=0, stdout=StringIO())
+        self.assertEqual(NotificationArchive.objects.count(), 5)
+        self.assertEqual(
+            set(NotificationArchive.objects.values_list('title', flat=True)),
+            {f'Ancienne {number}' for number in range(5)},
+        )
+        self.assertEqual(retention.compact(0)['deleted'], 0)
+
+
+@override_settings(NOTIFICATIONS_ADMIN_DIGEST=True, NOTIFICATIONS_ADMIN_FANOUT=False)
+class DigestTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.sellers = [
+            User.objects.create_user(username=f'vendeur{index}', password='x', role='seller') for index in range(2)
+        ]
+        self.admins = [
+            User.objects.create_user(username=f'admin{index}', password='x', role='admin') for index in range(3)
+        ]
+        self.articles = [
+            Article.objects.create(title='Lampe', description='D', price=Decimal('25.00'), seller=seller)
+            for seller in self.sellers
+        ]
+
+    def place_orders(self, article, count):
+        with self.captureOnCommitCallbacks(execute=True):
+            return [
+                Order.objects.create(article=article, seller=article.seller, client_name='C', client_phone='06')
+                for _ in range(count)
+            ]
+
+    def later(self):
+        return timezone.now() + digest.SETTLE_DELAY
+
+    def test_events_are_logged_instead_of_fanned_out(self):
+        orders = self.place_orders(self.articles[0], 3) + self.place_orders(self.articles[1], 1)
+        order = orders[0]
+        order.status = 'cancelled'
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()
+            services.notify_status_change(order, 'pending')
+
+        self.assertEqual(NotificationEvent.objects.count(), 5)
+        # Les vendeurs sont toujours notifiés, les administrateurs plus à chaque événement
+        self.assertFalse(Notification.objects.filter(recipient__in=self.admins).exists())
+        self.assertEqual(Notification.objects.count(), 4)
+
+        # Trop récents : laissés au résumé suivant
+        self.assertIsNone(digest.send_digest())
+        with self.captureOnCommitCallbacks(execute=True):
+            summary = digest.send_digest(self.later())
+        self.assertEqual(summary.events, 5)
+        for admin in self.admins:
+            notification = Notification.objects.get(recipient=admin)
+            self.assertTrue(notification.title.startswith('4 nouvelle(s) commande(s)'))
+            self.assertIn('Meilleurs vendeurs : vendeur0 (3), vendeur1 (1).', notification.message)
+            self.assertIn('0 commande(s) confirmée(s), 1 annulée(s)', notification.message)
+        self.assertEqual(UnreadCounter.objects.get(user=self.admins[0]).unread, 1)
+
+        # Rien de nouveau : pas de second résumé
+        self.assertIsNone(digest.send_digest(self.later()))
+        self.place_orders(self.articles[1], 2)
+        self.assertEqual(digest.send_digest(self.later()).events, 2)
+        self.assertEqual(Notification.objects.filter(recipient=self.admins[0]).count(), 2)
+
+    def test_digest_query_count_does_not_depend_on_volume(self):
+        # Premier résumé : liste des administrateurs mise en cache, compteurs créés
+        self.place_orders(self.articles[0], 1)
+        digest.send_digest(self.later())
+        self.place_orders(self.articles[0], 2)
+        with CaptureQueriesContext(connection) as queries:
+            digest.send_digest(self.later())
+        self.place_orders(self.articles[0], 20)
+        self.place_orders(self.articles[1], 20)
+        with self.assertNumQueries(len(queries)):
+            digest.send_digest(self.later())
+
+    def test_retention_prunes_summarized_events(self):
+        self.place_orders(self.articles[0], 2)
+        digest.send_digest(self.later())
+        self.place_orders(self.articles[0], 1)
+        NotificationEvent.objects.update(created_at=timezone.now() - timedelta(days=100))
+        # Le dernier événement n'est pas encore résumé : gardé
+        self.assertEqual(retention.compact(90)['events'], 2)
+        self.assertEqual(NotificationEvent.objects.count(), 1)
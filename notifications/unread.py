@@ -0,0 +1,190 @@
+"""
+Compteurs de notifications non lues (table UnreadCounter).
+
+L'envoi (`services.send`) incrémente les compteurs de tous les destinataires
+en un UPDATE. Les opérations groupées (`mark_read`, `mark_all_read`,
+`delete`) traitent les notifications par lots verrouillés (SELECT ... FOR
+UPDATE) : une notification n'est décomptée qu'une fois même si deux
+requêtes simultanées la marquent comme lue ou la suppriment.
+
+Le badge de la barre de navigation (context processor) et l'endpoint
+`notifications:unread_count` lisent le compteur en cache ; l'entrée d'un
+utilisateur est effacée après le commit de chaque modification.
+`reconcile()` recalcule les compteurs depuis les notifications.
+"""
+
+from collections import Counter
+
+from django.apps import apps as global_apps
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, OuterRef, Subquery, When
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Notification, UnreadCounter
+
+UNREAD_CACHE_KEY = 'notifications:unread:{}'
+UNREAD_TIMEOUT = 300
+
+# Notifications modifiées ou supprimées par transaction (opérations groupées)
+BATCH_SIZE = 1000
+
+
+def _forget(user_ids):
+    keys = [UNREAD_CACHE_KEY.format(user_id) for user_id in user_ids]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def increment(user_ids):
+    """Une notification non lue de plus pour chaque utilisateur (nombre de requêtes constant)"""
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return
+    counters = UnreadCounter.objects.filter(user_id__in=user_ids)
+    if counters.update(unread=F('unread') + 1) < len(user_ids):
+        existing = set(counters.values_list('user_id', flat=True))
+        missing = [user_id for user_id in user_ids if user_id not in existing]
+        try:
+            with transaction.atomic():
+                UnreadCounter.objects.bulk_create([UnreadCounter(user_id=user_id, unread=1) for user_id in missing])
+        except IntegrityError:
+            # Lignes créées entre-temps par une autre requête
+            UnreadCounter.objects.filter(user_id__in=missing).update(unread=F('unread') + 1)
+    _forget(user_ids)
+
+
+def _decrement(counts):
+    """Retire counts[user_id] au compteur de chaque utilisateur, en un UPDATE"""
+    if not counts:
+        return
+    UnreadCounter.objects.filter(user_id__in=counts).update(unread=Greatest(
+        Case(*[When(user_id=user_id, then=F('unread') - count) for user_id, count in counts.items()],
+             default=F('unread')),
+        0,
+    ))
+
+
+def _recount(user_ids):
+    """
+    Compteurs recalculés depuis les notifications, en un UPDATE : un lot a
+    été modifié entre-temps par une autre requête (bases sans verrou de
+    ligne, comme SQLite).
+    """
+    unread = (
+        Notification.objects.filter(recipient_id=OuterRef('user_id'), is_read=False).order_by()
+        .values('recipient_id').annotate(total=Count('id')).values('total')
+    )
+    UnreadCounter.objects.filter(user_id__in=user_ids).update(unread=Coalesce(Subquery(unread), 0))
+
+
+def _in_batches(rows, apply):
+    """
+    Applique `apply` à des lots de BATCH_SIZE lignes (id, destinataire, lue)
+    du queryset `rows`, chaque lot verrouillé (SELECT ... FOR UPDATE) et
+    traité dans sa propre transaction. Retourne la somme des résultats.
+    """
+    total = 0
+    while True:
+        with transaction.atomic():
+            batch = list(rows.select_for_update()[:BATCH_SIZE])
+            if batch:
+                total += apply(batch)
+        if len(batch) < BATCH_SIZE:
+            return total
+
+
+def _mark_batch(batch):
+    updated = Notification.objects.filter(pk__in=[pk for pk, _ in batch], is_read=False).update(is_read=True)
+    counts = Counter(recipient_id for _, recipient_id in batch)
+    if updated == len(batch):
+        _decrement(counts)
+    else:
+        _recount(counts)
+    _forget(counts)
+    return updated
+
+
+def mark_read(notifications):
+    """
+    Marque comme lues les notifications du queryset et décrémente les
+    compteurs de leurs destinataires : par lot, un UPDATE des notifications
+    et un UPDATE des compteurs. Retourne le nombre de notifications marquées.
+    """
+    unread = notifications.filter(is_read=False).order_by().values_list('id', 'recipient_id')
+    return _in_batches(unread, _mark_batch)
+
+
+def mark_all_read(user):
+    """Toutes les notifications de l'utilisateur marquées comme lues"""
+    return mark_read(Notification.objects.filter(recipient_id=user.pk))
+
+
+def _delete_batch(batch):
+    removed, _ = Notification.objects.filter(pk__in=[pk for pk, _, _ in batch]).delete()
+    if removed == len(batch):
+        counts = Counter(recipient_id for _, recipient_id, is_read in batch if not is_read)
+        _decrement(counts)
+        _forget(counts)
+    else:
+        recipient_ids = {recipient_id for _, recipient_id, _ in batch}
+        _recount(recipient_ids)
+        _forget(recipient_ids)
+    return removed
+
+
+def delete(notifications):
+    """
+    Supprime les notifications du queryset (un DELETE par lot) et retire les
+    non lues des compteurs ; retourne le nombre de notifications supprimées.
+    """
+    return _in_batches(notifications.order_by().values_list('id', 'recipient_id', 'is_read'), _delete_batch)
+
+
+def count_for(user):
+    """Notifications non lues de l'utilisateur (0 pour un visiteur), lues en cache"""
+    if not user.is_authenticated:
+        return 0
+    key = UNREAD_CACHE_KEY.format(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = UnreadCounter.objects.filter(user_id=user.pk).values_list('unread', flat=True).first() or 0
+        cache.set(key, count, UNREAD_TIMEOUT)
+    return count
+
+
+def reconcile(apply=True, apps=global_apps):
+    """
+    Compare les compteurs aux notifications non lues.
+
+    Retourne la liste des écarts (user_id, (stocké, attendu)) et, avec
+    `apply`, les corrige.
+    """
+    Counters = apps.get_model('notifications', 'UnreadCounter')
+    Notification = apps.get_model('notifications', 'Notification')
+    expected = dict(
+        Notification.objects.filter(is_read=False).values_list('recipient_id')
+        .annotate(total=Count('id')).order_by()
+    )
+    stored = dict(Counters.objects.values_list('user_id', 'unread'))
+
+    drift = []
+    for user_id in stored.keys() | expected.keys():
+        actual, wanted = stored.get(user_id), expected.get(user_id, 0)
+        if (actual or 0) != wanted:
+            drift.append((user_id, (actual or 0, wanted)))
+
+    if apply and drift:
+        with transaction.atomic():
+            Counters.objects.bulk_create(
+                [Counters(user_id=user_id, unread=wanted) for user_id, (_, wanted) in drift if user_id not in stored],
+                batch_size=1000,
+            )
+            Counters.objects.bulk_update(
+                [Counters(user_id=user_id, unread=wanted) for user_id, (_, wanted) in drift if user_id in stored],
+                ['unread'], batch_size=1000,
+            )
+        if apps is global_apps:
+            # Pas pendant une migration : la table du cache n'existe peut-être pas encore
+            cache.delete_many([UNREAD_CACHE_KEY.format(user_id) for user_id, _ in drift])
+    return sorted(drift)
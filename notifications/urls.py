@@ -0,0 +1,10 @@
+from django.urls import path
+from . import views
+
+app_name = 'notifications'
+
+urlpatterns = [
+    path('stream/', views.notification_stream, name='stream'),
+    path('unread/', views.unread_count, name='unread_count'),
+    path('mark-all-read/', views.mark_all_read, name='mark_all_read'),
+]
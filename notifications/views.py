@@ -1,3 +1,78 @@
-from django.shortcuts import render
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseNotAllowed, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.shortcuts import redirect
+from django.utils.cache import get_conditional_response, patch_cache_control
 
-# Create your views here.
+from config.streaming import DISCONNECTED
+from . import stream, unread
+
+
+def _user_id(request):
+    # Session et utilisateur sont lus en base : hors de la boucle asyncio
+    user = request.user
+    if user.is_authenticated:
+        return user.pk
+    # Flux servi sur une autre origine (service ASGI) : jeton signé par la page
+    token = request.GET.get('token')
+    return stream.user_from_token(token) if token else None
+
+
+async def notification_stream(request):
+    """
+    Flux SSE des notifications de l'utilisateur connecté, ou de celui du jeton
+    `token` depuis une autre origine (voir stream.py).
+    La reprise part de l'en-tête Last-Event-ID, ou à la première connexion du
+    paramètre `last_event_id` (dernière notification affichée par la page).
+    """
+    user_id = await sync_to_async(_user_id)(request)
+    if user_id is None:
+        return HttpResponseForbidden()
+    last_event_id = stream.parse_event_id(
+        request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    )
+
+    if isinstance(request, ASGIRequest):
+        events = stream.EventStream(user_id, last_event_id, request.scope.get(DISCONNECTED))
+        response = StreamingHttpResponse(events, content_type='text/event-stream')
+        # Pas de mise en tampon par nginx (proxy de Render) ni de compression
+        response['X-Accel-Buffering'] = 'no'
+    else:
+        response = HttpResponse(
+            await sync_to_async(stream.backlog)(user_id, last_event_id), content_type='text/event-stream',
+        )
+    response['Cache-Control'] = 'no-cache'
+    origin = request.headers.get('Origin')
+    if origin and origin in getattr(settings, 'NOTIFICATIONS_STREAM_ORIGINS', []):
+        response['Access-Control-Allow-Origin'] = origin
+        response['Vary'] = 'Origin'
+    return response
+
+
+def unread_count(request):
+    """
+    Nombre de notifications non lues (badge), interrogé régulièrement par la
+    page : lu en cache, 304 si le navigateur a déjà ce nombre (ETag).
+    """
+    if not request.user.is_authenticated:
+        return HttpResponseForbidden()
+    count = unread.count_for(request.user)
+    etag = f'"unread-{count}"'
+    response = get_conditional_response(request, etag=etag) or JsonResponse({'unread': count})
+    response['ETag'] = etag
+    # Revalidé à chaque appel (If-None-Match), jamais gardé par un cache partagé
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@login_required
+def mark_all_read(request):
+    """Toutes les notifications de l'utilisateur connecté marquées comme lues"""
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    count = unread.mark_all_read(request.user)
+    messages.success(request, f'{count} notification(s) marquée(s) comme lue(s).')
+    return redirect('seller_dashboard')
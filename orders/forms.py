@@ -1,10 +1,14 @@
 from django import forms
+from . import placement
 from .models import Order
 
 
 class OrderForm(forms.ModelForm):
     """Formulaire de commande pour les clients"""
-    
+
+    # Jeton contre les envois répétés (voir orders/placement.py)
+    submission_token = forms.CharField(widget=forms.HiddenInput)
+
     class Meta:
         model = Order
         fields = ['client_name', 'client_phone', 'client_email', 'message']
@@ -42,14 +46,30 @@ class OrderForm(forms.ModelForm):
             'message': 'Ajoutez des questions ou précisions sur votre commande'
         }
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, article=None, **kwargs):
         super().__init__(*args, **kwargs)
+        self.article = article
+        self.submission_key = None
+        if article is not None:
+            self.fields['submission_token'].initial = placement.issue(article)
         # Rendre certains champs obligatoires
         self.fields['client_name'].required = True
         self.fields['client_phone'].required = True
         self.fields['client_email'].required = False
         self.fields['message'].required = False
 
+    def clean_submission_token(self):
+        """Jeton émis pour cet article et pas encore expiré"""
+        self.submission_key = placement.parse(self.cleaned_data.get('submission_token'), self.article)
+        if self.submission_key is None:
+            # Le formulaire réaffiché porte un nouveau jeton
+            self.data = self.data.copy()
+            self.data[self.add_prefix('submission_token')] = self.fields['submission_token'].initial
+            raise forms.ValidationError(
+                "Ce formulaire a expiré. Vérifiez vos informations et envoyez-le à nouveau."
+            )
+        return self.cleaned_data['submission_token']
+
     def clean_client_name(self):
         """Validation du nom client"""
         name = self.cleaned_data.get('client_name')
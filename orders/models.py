@@ -17,6 +17,30 @@ class Order(models.Model):
         ('cancelled', 'Annulée'),
     )
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    # Jeton du formulaire qui a créé la commande (orders/placement.py), vide pour les autres
+    submission_key = models.CharField(max_length=32, blank=True, default='', editable=False)
+
+    class Meta:
+        indexes = [
+            # Liste admin : toutes les commandes, ou filtrées par statut, des plus récentes
+            models.Index(fields=['-created_at', '-id'], name='order_created_id'),
+            models.Index(fields=['status', '-created_at', '-id'], name='order_status_created'),
+            # Commandes d'un vendeur (onglet « Toutes » ou par statut), pagination par curseur
+            models.Index(fields=['seller', '-created_at', '-id'], name='order_seller_created'),
+            models.Index(fields=['seller', 'status', '-created_at', '-id'], name='order_seller_status_created'),
+            # Commandes en attente d'un vendeur (index partiel : petite fraction des lignes)
+            models.Index(
+                fields=['seller', '-created_at'], name='order_pending_seller',
+                condition=models.Q(status='pending'),
+            ),
+        ]
+        constraints = [
+            # Un formulaire envoyé plusieurs fois (double clic, nouvelle tentative) ne crée qu'une commande
+            models.UniqueConstraint(
+                fields=['submission_key'], condition=~models.Q(submission_key=''),
+                name='order_unique_submission',
+            ),
+        ]
 
     def __str__(self):
         return f"Commande de {self.client_name} pour {self.article.title}"
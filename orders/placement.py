@@ -0,0 +1,113 @@
+"""
+Enregistrement des commandes, protégé contre les envois répétés.
+
+Le formulaire de commande porte un jeton caché : un identifiant aléatoire
+signé avec l'article et la date d'émission, valable SUBMISSION_MAX_AGE.
+Le premier envoi d'un jeton le réserve dans le cache (`cache.add`, atomique)
+puis enregistre la commande dans une seule transaction (commande, compteurs
+du vendeur, journal des notifications) ; les effets externes (notifications,
+flux temps réel, identifiant de la commande en cache) ne partent qu'après le
+commit. Un envoi répété du même jeton (double clic, nouvelle tentative du
+navigateur sur une requête lente) attend la fin du premier et retourne la
+même commande.
+
+La clé du jeton est aussi enregistrée sur la commande (contrainte d'unicité) :
+sans cache partagé entre les processus (locmem) ou après expiration de
+l'entrée, la base refuse le doublon.
+"""
+
+import time
+import uuid
+from datetime import timedelta
+
+from django.core import signing
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+
+from .models import Order
+
+SUBMISSION_SALT = 'orders.submission'
+SUBMISSION_MAX_AGE = timedelta(hours=2)
+SUBMISSION_CACHE_KEY = 'orders:submission:{}'
+# L'entrée du cache doit survivre au jeton lui-même
+SUBMISSION_TIMEOUT = int(SUBMISSION_MAX_AGE.total_seconds()) + 600
+PENDING = 'pending'
+
+# Attente maximale du résultat d'un envoi en cours avec le même jeton
+WAIT_TIMEOUT = 10
+WAIT_INTERVAL = 0.05
+
+
+def issue(article):
+    """Nouveau jeton pour le formulaire de commande de l'article"""
+    return signing.dumps({'k': uuid.uuid4().hex, 'a': article.pk}, salt=SUBMISSION_SALT)
+
+
+def parse(token, article):
+    """Clé du jeton ; None s'il est invalide, expiré ou émis pour un autre article"""
+    try:
+        data = signing.loads(token, salt=SUBMISSION_SALT, max_age=SUBMISSION_MAX_AGE)
+    except (signing.BadSignature, TypeError):
+        return None
+    if not isinstance(data, dict) or data.get('a') != article.pk:
+        return None
+    key = data.get('k')
+    return key if isinstance(key, str) and len(key) == 32 else None
+
+
+def _placed(key):
+    return Order.objects.filter(submission_key=key).first()
+
+
+def _wait_for(cache_key, key):
+    """
+    Commande créée par l'envoi en cours avec la même clé ; None si cet envoi a
+    échoué (entrée retirée du cache) ou n'a pas abouti à temps.
+    """
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        value = cache.get(cache_key)
+        if value is None:
+            return _placed(key)
+        if value != PENDING:
+            return Order.objects.filter(pk=value).first() or _placed(key)
+        time.sleep(WAIT_INTERVAL)
+    return _placed(key)
+
+
+def place(form, article, key):
+    """
+    Enregistre la commande du formulaire valide `form` ; retourne
+    (commande, créée). Si la clé a déjà servi, retourne la commande existante.
+    """
+    cache_key = SUBMISSION_CACHE_KEY.format(key)
+    claimed = cache.add(cache_key, PENDING, SUBMISSION_TIMEOUT)
+    if not claimed:
+        order = _wait_for(cache_key, key)
+        if order is not None:
+            return order, False
+
+    try:
+        with transaction.atomic():
+            order = form.save(commit=False)
+            order.article = article
+            order.seller = article.seller
+            order.submission_key = key
+            # Les notifications sont préparées par orders.signals et envoyées après le commit
+            order.save()
+            transaction.on_commit(lambda: cache.set(cache_key, order.pk, SUBMISSION_TIMEOUT))
+    except IntegrityError:
+        # Même clé enregistrée par un autre processus
+        order = _placed(key)
+        if order is None:
+            if claimed:
+                cache.delete(cache_key)
+            raise
+        cache.set(cache_key, order.pk, SUBMISSION_TIMEOUT)
+        return order, False
+    except Exception:
+        # Échec : le même formulaire pourra être renvoyé
+        if claimed:
+            cache.delete(cache_key)
+        raise
+    return order, True
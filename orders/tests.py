@@ -1,3 +1,186 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from articles.models import Article
+from config.testing import QueryBudgetMixin
+from jobs.queue import run_pending
+from notifications.models import Notification
+from notifications.services import notify_order_placed
+from users.models import User
+from . import placement
+from .models import Order
+
+
+class OrderNotificationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.seller = User.objects.create_user(username='vendeur', password='x', role='seller')
+        self.admins = [
+            User.objects.create_user(username=f'admin{index}', password='x', role='admin') for index in range(3)
+        ]
+        self.article = Article.objects.create(
+            title='Lampe de bureau', description='Description', price=Decimal('25.00'), seller=self.seller
+        )
+
+    def place_order(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('orders:order_article', args=[self.article.id]),
+                {'client_name': 'Client', 'client_phone': '0600000000',
+                 'submission_token': placement.issue(self.article)},
+            )
+        self.assertEqual(response.status_code, 302)
+        return Order.objects.latest('id')
+
+    def test_order_notifies_seller_and_each_admin_once(self):
+        order = self.place_order()
+        self.assertEqual(Notification.objects.filter(recipient=self.seller).count(), 1)
+        for admin in self.admins:
+            self.assertEqual(Notification.objects.filter(recipient=admin).count(), 1)
+        self.assertIn('0600000000', Notification.objects.get(recipient=self.seller).message)
+
+        # Rejouer l'événement n'écrit rien de plus
+        with self.captureOnCommitCallbacks(execute=True):
+            notify_order_placed(order)
+        self.assertEqual(Notification.objects.count(), 1 + len(self.admins))
+
+    def test_fan_out_query_count_does_not_depend_on_admin_count(self):
+        self.place_order()  # met en cache la liste des administrateurs
+        with CaptureQueriesContext(connection) as queries:
+            self.place_order()
+        query_count = len(queries)
+        inserts = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('INSERT') and '"notifications_notification"' in query['sql']
+        ]
+        # Une insertion groupée pour le vendeur, une pour les administrateurs
+        self.assertEqual(len(inserts), 2)
+
+        User.objects.create_user(username='admin3', password='x', role='admin')
+        self.place_order()
+        with self.assertNumQueries(query_count):
+            self.place_order()
+
+    @override_settings(NOTIFICATIONS_DEFER_ADMIN_FANOUT=True)
+    def test_admin_fan_out_can_be_deferred_to_a_job(self):
+        self.place_order()
+        self.assertEqual(Notification.objects.count(), 1)
+        run_pending()
+        self.assertEqual(Notification.objects.count(), 1 + len(self.admins))
+
+
+class OrderViewQueryBudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(username='vendeur', password='x', role='seller')
+        self.article = Article.objects.create(
+            title='Lampe', description='Lampe de bureau', price=Decimal('120.00'), seller=self.seller,
+        )
+        self.order = Order.objects.create(
+            article=self.article, seller=self.seller, client_name='Client', client_phone='0600000000',
+        )
+
+    def test_order_pages_budget(self):
+        self.assertQueryBudget(3, reverse('orders:order_article', args=[self.article.pk]))
+        self.assertQueryBudget(3, reverse('orders:success', args=[self.order.pk]))
+        self.assertQueryBudget(4, reverse('orders:detail', args=[self.order.pk]), user=self.seller)
+
+
+class OrderSubmissionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.seller = User.objects.create_user(username='vendeur', password='x', role='seller')
+        self.article = Article.objects.create(
+            title='Lampe', description='Lampe de bureau', price=Decimal('120.00'), seller=self.seller,
+        )
+        self.url = reverse('orders:order_article', args=[self.article.pk])
+        self.data = {
+            'client_name': 'Client', 'client_phone': '0600000000',
+            'submission_token': placement.issue(self.article),
+        }
+
+    def post(self, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, data)
+
+    def test_resubmitted_form_returns_the_same_order(self):
+        first = self.post(self.data)
+        order = Order.objects.get()
+        self.assertRedirects(first, reverse('orders:success', args=[order.pk]), fetch_redirect_response=False)
+        self.assertEqual(Notification.objects.count(), 1)
+
+        # Entrée du cache perdue (autre processus, expiration) : la contrainte d'unicité prend le relais
+        for clear in (False, True):
+            if clear:
+                cache.clear()
+            again = self.post(self.data)
+            self.assertEqual(again['Location'], first['Location'])
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(Notification.objects.count(), 1)
+
+        # Nouveau formulaire : nouvelle commande
+        self.post(dict(self.data, submission_token=placement.issue(self.article)))
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_invalid_or_expired_token_is_refused(self):
+        other = Article.objects.create(title='Table', description='D', price=Decimal('50.00'), seller=self.seller)
+        tokens = ['', 'forgé', placement.issue(other)]
+        with mock.patch.object(placement, 'SUBMISSION_MAX_AGE', timedelta(seconds=-1)):
+            tokens.append(placement.issue(self.article))
+            for token in tokens:
+                response = self.post(dict(self.data, submission_token=token))
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('submission_token', response.context['form'].errors)
+        # Formulaire réaffiché avec un jeton neuf
+        self.assertIsNotNone(placement.parse(response.context['form']['submission_token'].value(), self.article))
+        self.assertFalse(Order.objects.exists())
+
+    def test_failed_placement_releases_the_token(self):
+        with mock.patch.object(Order, 'save', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.post(self.data)
+        self.post(self.data)
+        self.assertEqual(Order.objects.count(), 1)
+
+
+class ConcurrentOrderSubmissionTests(TransactionTestCase):
+    def test_parallel_identical_submissions_create_one_order(self):
+        seller = User.objects.create_user(username='vendeur', password='x', role='seller')
+        User.objects.create_user(username='admin', password='x', role='admin')
+        article = Article.objects.create(title='Lampe', description='D', price=Decimal('120.00'), seller=seller)
+        url = reverse('orders:order_article', args=[article.pk])
+        data = {'client_name': 'Client', 'client_phone': '0600000000', 'submission_token': placement.issue(article)}
+
+        submissions = 8
+        barrier = threading.Barrier(submissions)
+        responses, errors = [], []
+
+        def submit():
+            try:
+                client = Client()
+                barrier.wait()
+                responses.append(client.post(url, data))
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=submit) for _ in range(submissions)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        order = Order.objects.get()
+        self.assertEqual({response.status_code for response in responses}, {302})
+        self.assertEqual({response['Location'] for response in responses}, {reverse('orders:success', args=[order.pk])})
+        # Notifications du vendeur et de l'administrateur envoyées une fois
+        self.assertEqual(Notification.objects.filter(event_key=f'order:{order.pk}:placed').count(), 2)
@@ -3,9 +3,9 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.http import Http404
 from articles.models import Article
-from notifications.models import Notification
-from users.models import User
+from notifications import services
 from users.decorators import not_seller_required
+from . import placement
 from .models import Order
 from .forms import OrderForm, OrderStatusForm
 
@@ -17,28 +17,26 @@ def seller_restriction_view(request):
 
 @not_seller_required
 def order_article(request, article_id):
-    """Vue pour commander un article"""
-    article = get_object_or_404(Article, id=article_id)
+    """
+    Vue pour commander un article. Un même formulaire envoyé plusieurs fois
+    (double clic, nouvelle tentative) ne crée qu'une commande (orders/placement.py).
+    """
+    article = get_object_or_404(Article.objects.select_related('seller'), id=article_id)
 
     if request.method == 'POST':
-        form = OrderForm(request.POST)
+        form = OrderForm(request.POST, article=article)
         if form.is_valid():
-            order = form.save(commit=False)
-            order.article = article
-            order.seller = article.seller
-            order.save()
-
-            # Créer des notifications
-            create_order_notifications(order)
-
-            messages.success(
-                request,
-                f'Votre commande pour "{article.title}" a été envoyée avec succès ! '
-                f'Le vendeur va vous contacter bientôt.'
-            )
+            order, created = placement.place(form, article, form.submission_key)
+
+            if created:
+                messages.success(
+                    request,
+                    f'Votre commande pour "{article.title}" a été envoyée avec succès ! '
+                    f'Le vendeur va vous contacter bientôt.'
+                )
             return redirect('orders:success', order_id=order.id)
     else:
-        form = OrderForm()
+        form = OrderForm(article=article)
 
     context = {
         'form': form,
@@ -51,7 +49,7 @@ def order_article(request, article_id):
 @not_seller_required
 def order_success(request, order_id):
     """Page de confirmation de commande"""
-    order = get_object_or_404(Order, id=order_id)
+    order = get_object_or_404(Order.objects.select_related('article__seller', 'seller'), id=order_id)
 
     context = {
         'order': order,
@@ -63,11 +61,12 @@ def order_success(request, order_id):
 @login_required
 def order_detail(request, order_id):
     """Vue pour voir le détail d'une commande (vendeur seulement)"""
-    order = get_object_or_404(Order, id=order_id)
+    order = get_object_or_404(Order.objects.select_related('article'), id=order_id)
 
     # Vérifier que l'utilisateur est le vendeur de cette commande
-    if order.seller != request.user:
+    if order.seller_id != request.user.id:
         raise Http404("Commande non trouvée")
+    order.seller = request.user
 
     if request.method == 'POST':
         form = OrderStatusForm(request.POST, instance=order)
@@ -77,7 +76,7 @@ def order_detail(request, order_id):
 
             # Créer une notification si le statut a changé
             if old_status != order.status:
-                create_status_change_notification(order, old_status)
+                services.notify_status_change(order, old_status)
 
             messages.success(
                 request,
@@ -94,44 +93,3 @@ def order_detail(request, order_id):
     }
     return render(request, 'orders/order_detail.html', context)
 
-
-def create_order_notifications(order):
-    """Créer les notifications pour une nouvelle commande"""
-    # Notification pour le vendeur
-    Notification.objects.create(
-        recipient=order.seller,
-        title="Nouvelle commande reçue !",
-        message=f"{order.client_name} souhaite commander votre article '{order.article.title}' "
-                f"au prix de {order.article.price}€. "
-                f"Contactez-le au {order.client_phone}."
-    )
-
-    # Notification pour les administrateurs
-    admins = User.objects.filter(role='admin')
-    for admin in admins:
-        Notification.objects.create(
-            recipient=admin,
-            title="Nouvelle commande sur la plateforme",
-            message=f"Commande #{order.id} : {order.client_name} a commandé "
-                    f"'{order.article.title}' chez {order.seller.username}."
-        )
-
-
-def create_status_change_notification(order, old_status):
-    """Créer une notification lors du changement de statut"""
-    status_messages = {
-        'confirmed': f"Bonne nouvelle ! Votre commande pour '{order.article.title}' a été confirmée par le vendeur.",
-        'cancelled': f"Votre commande pour '{order.article.title}' a été annulée par le vendeur."
-    }
-
-    if order.status in status_messages:
-        # Note: Ici on pourrait envoyer un email au client
-        # Pour l'instant, on crée juste une notification pour l'admin
-        admins = User.objects.filter(role='admin')
-        for admin in admins:
-            Notification.objects.create(
-                recipient=admin,
-                title=f"Commande #{order.id} - Statut mis à jour",
-                message=f"Le vendeur {order.seller.username} a changé le statut de "
-                        f"'{old_status}' vers '{order.status}' pour la commande de {order.client_name}."
-            )
@@ -3,7 +3,11 @@
 
 echo "🚀 Démarrage d'Articlo..."
 
-# Démarrer Gunicorn avec la configuration Django
+# Démarrer le worker des tâches en arrière-plan (images, envois vers le stockage)
+python manage.py run_jobs &
+
+# Démarrer Gunicorn avec la configuration Django (le flux temps réel des
+# notifications est servi à part : uvicorn config.asgi:application)
 exec gunicorn config.wsgi:application \
     --bind 0.0.0.0:$PORT \
     --workers 2 \
@@ -28,6 +28,14 @@ class User(AbstractUser):
         related_query_name='custom_user',
     )
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Listes par rôle (vendeurs triés par nom, admin des utilisateurs par inscription)
+            models.Index(fields=['role', 'username'], name='user_role_username'),
+            models.Index(fields=['role', '-date_joined'], name='user_role_joined'),
+            models.Index(fields=['-date_joined', '-id'], name='user_joined_id'),
+        ]
+
     def __str__(self):
         return f"{self.username} ({self.get_role_display()})"
 